@@ -0,0 +1,238 @@
+"""
+Plain-HTTP client for the appeals listing (DocumentRetriever.aspx).
+
+The listing is an ASP.NET WebForms page: paging is a form postback that
+carries __VIEWSTATE/__EVENTVALIDATION back to the server. This client replays
+those postbacks with requests, so no browser is needed. The Issue/Holding
+summaries are already in each page's HTML (collapsed), so one request per
+page returns everything appeals_parser.parse_page() needs.
+
+    client = AppealsClient()
+    for page_number, total_pages, html in client.iter_pages():
+        records = appeals_parser.parse_page(html)
+
+The whole paging state lives in the client's form fields, so a client can be
+copied with fork() and continued independently, e.g. from another thread.
+"""
+import copy
+import re
+
+import requests
+from bs4 import BeautifulSoup
+
+import appeals_parser
+
+BASE_URL = appeals_parser.BASE_URL
+
+# Id of the "next page" control at the top of the listing.
+NEXT_BUTTON_ID = "btnNextTop"
+
+# Optional direct page jump: the name of a page-number field and the id of the
+# control that submits it. Without them goto_page() uses the listing's
+# numbered pager links (see page_jump_target()) when the page has them.
+PAGE_JUMP_FIELD = None
+PAGE_JUMP_BUTTON_ID = None
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+}
+
+DO_POSTBACK_RE = re.compile(r"__doPostBack\('([^']*)','([^']*)'\)")
+# Numbered pager links of a GridView/DataPager: __doPostBack('ctl00$gvResults','Page$7').
+# The server accepts any Page$N for its pager target, not only the numbers shown.
+PAGER_POSTBACK_RE = re.compile(r"__doPostBack\('([^']+)','Page\$(?:\d+|First|Last|Next|Prev)'\)")
+
+
+class AppealsClientError(Exception):
+    """Raised when the page doesn't look like the WebForms listing we expect."""
+
+
+def parse_form_state(html):
+    """
+    Collects the fields the browser would post back: hidden inputs
+    (__VIEWSTATE, __EVENTVALIDATION, ...), text inputs, checked boxes and
+    selected options. Submit buttons are left out; postback() adds the one
+    being "clicked".
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    form = soup.find("form")
+    if form is None or form.find("input", attrs={"name": "__VIEWSTATE"}) is None:
+        raise AppealsClientError("No WebForms form with __VIEWSTATE found on the page.")
+
+    fields = {}
+    for element in form.find_all("input"):
+        name = element.get("name")
+        input_type = (element.get("type") or "text").lower()
+        if not name or input_type in ("submit", "image", "button", "reset", "file"):
+            continue
+        if input_type in ("checkbox", "radio") and not element.has_attr("checked"):
+            continue
+        fields[name] = element.get("value", "on" if input_type in ("checkbox", "radio") else "")
+    for select in form.find_all("select"):
+        name = select.get("name")
+        if not name:
+            continue
+        option = select.find("option", selected=True) or select.find("option")
+        if option is not None:
+            fields[name] = option.get("value", option.get_text())
+    for textarea in form.find_all("textarea"):
+        if textarea.get("name"):
+            fields[textarea["name"]] = textarea.get_text()
+    return fields
+
+
+def control_postback(html, control_id):
+    """
+    Works out the form data that "clicking" the control with `control_id`
+    submits: name=value for a submit input, name.x/name.y for an image button,
+    or __EVENTTARGET/__EVENTARGUMENT for a LinkButton (__doPostBack link).
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    control = soup.find(id=control_id)
+    if control is None:
+        raise AppealsClientError(f"Control #{control_id} not found on the page.")
+
+    if control.name == "input":
+        name = control.get("name", control_id)
+        if (control.get("type") or "").lower() == "image":
+            return {f"{name}.x": "1", f"{name}.y": "1"}
+        return {name: control.get("value", "")}
+
+    match = DO_POSTBACK_RE.search(control.get("href", "") + control.get("onclick", ""))
+    if match:
+        return {"__EVENTTARGET": match.group(1), "__EVENTARGUMENT": match.group(2)}
+    if control.name == "button":
+        return {control.get("name", control_id): control.get("value", "")}
+    raise AppealsClientError(f"Don't know how to post back control #{control_id} ({control.name}).")
+
+
+def page_jump_target(html):
+    """The __doPostBack target of the listing's numbered pager, or None if the page has none."""
+    match = PAGER_POSTBACK_RE.search(html or "")
+    return match.group(1) if match else None
+
+
+def page_jump_postback(html, page_number):
+    """Form data that jumps straight to `page_number`, or None if the page can't jump."""
+    target = page_jump_target(html)
+    if target is None:
+        return None
+    return {"__EVENTTARGET": target, "__EVENTARGUMENT": f"Page${page_number}"}
+
+
+class AppealsClient:
+    """Walks the appeals listing by replaying WebForms postbacks over HTTP."""
+
+    def __init__(self, session=None, base_url=BASE_URL, timeout=30, verify=True):
+        self.session = session or requests.Session()
+        self.session.headers.update(HEADERS)
+        self.base_url = base_url
+        self.timeout = timeout
+        self.verify = verify
+        self.html = None
+        self.fields = {}
+
+    # --- Page state ---
+    def _set_page(self, response):
+        response.raise_for_status()
+        self.html = response.text
+        self.fields = parse_form_state(self.html)
+        return self.html
+
+    @property
+    def pagination(self):
+        """(current_page, total_pages) of the page the client is on."""
+        try:
+            return appeals_parser.parse_pagination(self.html)
+        except (TypeError, ValueError) as e:
+            raise AppealsClientError(f"Pagination labels not found: {e}")
+
+    # --- Requests ---
+    def load(self):
+        """GETs the first listing page."""
+        return self._set_page(self.session.get(self.base_url, timeout=self.timeout, verify=self.verify))
+
+    def postback(self, extra_fields, overrides=None):
+        """
+        Posts the current form back with `extra_fields` (the control being
+        clicked) and optional field `overrides` (e.g. search box values).
+        """
+        data = dict(self.fields)
+        data.setdefault("__EVENTTARGET", "")
+        data.setdefault("__EVENTARGUMENT", "")
+        data.update(overrides or {})
+        data.update(extra_fields)
+        response = self.session.post(self.base_url, data=data, timeout=self.timeout, verify=self.verify)
+        return self._set_page(response)
+
+    def click(self, control_id, overrides=None):
+        """Posts back as if the control with `control_id` had been clicked."""
+        return self.postback(control_postback(self.html, control_id), overrides)
+
+    def next_page(self):
+        """Advances one page and checks the server actually moved."""
+        current_page, _ = self.pagination
+        self.click(NEXT_BUTTON_ID)
+        new_page, _ = self.pagination
+        if new_page != current_page + 1:
+            raise AppealsClientError(f"Next page postback went from page {current_page} to {new_page}.")
+        return self.html
+
+    def can_jump(self):
+        """True if goto_page() can reach any page in one postback."""
+        if self.html is None:
+            self.load()
+        return bool(PAGE_JUMP_FIELD and PAGE_JUMP_BUTTON_ID) or page_jump_target(self.html) is not None
+
+    def goto_page(self, page_number):
+        """
+        Moves to `page_number` (loading page 1 first if needed) and returns its
+        HTML. Jumps in one postback with the configured page-jump control or
+        the listing's pager; only a page with neither is reached by replaying
+        next-page postbacks.
+        """
+        if self.html is None:
+            self.load()
+        current_page, total_pages = self.pagination
+        if not 1 <= page_number <= total_pages:
+            raise AppealsClientError(f"Page {page_number} is outside 1..{total_pages}.")
+        if page_number == current_page:
+            return self.html
+        if PAGE_JUMP_FIELD and PAGE_JUMP_BUTTON_ID:
+            self.click(PAGE_JUMP_BUTTON_ID, overrides={PAGE_JUMP_FIELD: str(page_number)})
+        elif page_jump_target(self.html) is not None:
+            self.postback(page_jump_postback(self.html, page_number))
+        else:
+            if page_number < current_page:
+                self.load()
+                current_page = 1
+            while current_page < page_number:
+                self.next_page()
+                current_page += 1
+            return self.html
+        if self.pagination[0] != page_number:
+            raise AppealsClientError(f"Page jump to {page_number} landed on page {self.pagination[0]}.")
+        return self.html
+
+    def iter_pages(self):
+        """Yields (page_number, total_pages, html) for every listing page, starting at page 1."""
+        if self.html is None:
+            self.load()
+        while True:
+            current_page, total_pages = self.pagination
+            yield current_page, total_pages, self.html
+            if current_page >= total_pages:
+                return
+            self.next_page()
+
+    def fork(self):
+        """
+        Returns an independent client positioned on the same page, with its own
+        session (cookies copied), so it can continue paging in parallel.
+        """
+        session = requests.Session()
+        session.cookies.update(self.session.cookies)
+        clone = AppealsClient(session, self.base_url, self.timeout, self.verify)
+        clone.html = self.html
+        clone.fields = copy.deepcopy(self.fields)
+        return clone
@@ -0,0 +1,526 @@
+"""
+One crawler for the appeals listing, with pluggable outputs.
+
+Each listing page is fetched and parsed once, and its records are handed to
+every sink that was asked for:
+
+    CsvSink    - appeals_data.csv style table
+    ExcelSink  - the summary table (.xlsx)
+    JsonlSink  - one JSON object per decision, appended as pages arrive
+    PdfSink    - queues each decision PDF on a DownloadPool / PdfStore
+
+so a full run with PDFs and a summary-only run are the same pass with
+different flags:
+
+    python appeals_crawler.py --csv appeals_data.csv --pdfs "G:/My Drive/LexiMentis scraped data"
+    python appeals_crawler.py --excel appeals_summary.xlsx --date-from 2024-01-01
+
+Pages are walked over plain HTTP (appeals_client.py) with a Chrome fallback,
+or in parallel shards (appeals_shards.py). Incremental runs, filters and the
+response archive work the same for every combination of sinks.
+"""
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+
+import requests
+
+import appeals_filters
+import appeals_parser
+import appeals_state
+import exporters
+import response_archive
+from appeals_client import AppealsClient, AppealsClientError
+from appeals_shards import crawl_shards, HttpPageWorker, SeleniumPageWorker
+from pdf_downloader import DownloadPool
+from pdf_store import PdfStore, clean_file_name
+
+BASE_URL = appeals_parser.BASE_URL
+FIELDNAMES = appeals_parser.FIELDNAMES
+DEFAULT_ARCHIVE_PATH = "appeals_pages.warc.gz"
+
+
+# --- Sinks ---
+class Sink:
+    """
+    Receives each page's records. add() may be called from several shard
+    threads, but never concurrently (the crawler holds a lock).
+    """
+
+    def start(self, session):
+        """Called with the requests session of the crawl once it has one."""
+
+    def add(self, page_number, records):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def abort(self):
+        """Called instead of close() when the crawl failed."""
+        self.close()
+
+
+class _TableSink(Sink):
+    """
+    Streams the table to disk as pages arrive (see exporters.py). Sharded
+    crawls deliver pages out of order; pages ahead of the next one due are
+    spilled to a temporary file rather than kept in memory, so the output is
+    still newest-first and memory stays flat.
+
+    The table is written to "<path>.part" and replaces `path` only when the
+    crawl finishes, so a failed run leaves the previous output in place. With
+    merge=True the new rows are written first, then the existing file's rows
+    that weren't seen again.
+    """
+
+    exporter_class = None
+
+    def __init__(self, path, merge=False):
+        self.path = path
+        self.merge = merge
+        self.out_path = path + ".part"
+        self.exporter = self.exporter_class(self.out_path, FIELDNAMES)
+        self.seen = set()  # Appeals Numbers written, for the merge
+        self.next_page = 1
+        self.spill = None
+        self.spilled = {}  # page number -> [(offset, length)] in the spill file
+
+    def _write(self, records):
+        for record in records:
+            key = record.get("Appeals Number")
+            if self.merge:
+                if key in self.seen:
+                    continue
+                self.seen.add(key)
+            self.exporter.write(record)
+
+    def _read_spilled(self, page_number):
+        records = []
+        for offset, length in self.spilled.pop(page_number):
+            self.spill.seek(offset)
+            records += json.loads(self.spill.read(length))
+        return records
+
+    def add(self, page_number, records):
+        if page_number > self.next_page:
+            if self.spill is None:
+                self.spill = tempfile.TemporaryFile()
+            data = json.dumps(records, ensure_ascii=False).encode("utf-8")
+            self.spill.seek(0, os.SEEK_END)
+            self.spilled.setdefault(page_number, []).append((self.spill.tell(), len(data)))
+            self.spill.write(data)
+            return
+        # The page that was due (or a re-read of an earlier one by a fallback crawl)
+        self._write(records)
+        if page_number == self.next_page:
+            self.next_page += 1
+            while self.next_page in self.spilled:
+                self._write(self._read_spilled(self.next_page))
+                self.next_page += 1
+
+    def _finish(self):
+        # Pages after a gap (e.g. a failed shard) still come out in page order
+        for page_number in sorted(self.spilled):
+            self._write(self._read_spilled(page_number))
+        if self.spill is not None:
+            self.spill.close()
+
+    def close(self):
+        self._finish()
+        if self.merge and os.path.exists(self.path):
+            self._write(exporters.read_rows(self.path))
+        self.exporter.close()
+        os.replace(self.out_path, self.path)
+
+    def abort(self):
+        self._finish()
+        self.exporter.close()
+        print(f"Crawl failed; {self.path} left unchanged, rows so far in {self.out_path}")
+
+
+class CsvSink(_TableSink):
+    """The full table as CSV; with merge=True new rows are merged into the existing file."""
+
+    exporter_class = exporters.CsvExporter
+
+    def close(self):
+        super().close()
+        print(f"Data saved to CSV file: {self.path}")
+
+
+class ExcelSink(_TableSink):
+    """The summary table as .xlsx, written through a constant-memory workbook (needs openpyxl)."""
+
+    exporter_class = exporters.XlsxExporter
+
+    def __init__(self, path, merge=False):
+        try:
+            super().__init__(path, merge)
+            self.enabled = True
+        except ImportError:
+            print("openpyxl not installed; Excel file not created.")
+            self.enabled = False
+
+    def add(self, page_number, records):
+        if self.enabled:
+            super().add(page_number, records)
+
+    def close(self):
+        if self.enabled:
+            super().close()
+            print(f"Data saved to Excel file: {self.path}")
+
+    def abort(self):
+        if self.enabled:
+            super().abort()
+
+
+class JsonlSink(Sink):
+    """Appends one JSON object per decision as soon as its page is parsed."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "a", encoding="utf-8")
+
+    def add(self, page_number, records):
+        for record in records:
+            self._file.write(json.dumps(dict(record, Page=page_number), ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+        print(f"Records appended to JSONL file: {self.path}")
+
+
+class PdfSink(Sink):
+    """Downloads each decision PDF in the background (see pdf_downloader.py)."""
+
+    def __init__(self, folder, workers=4, use_store=True, verify=True):
+        self.folder = folder
+        self.workers = workers
+        self.verify = verify
+        os.makedirs(folder, exist_ok=True)
+        self.store = PdfStore(folder) if use_store else None
+        self.downloads = None
+
+    def start(self, session):
+        if self.downloads is None:
+            self.downloads = DownloadPool(session, self.folder, workers=self.workers,
+                                          verify=self.verify, store=self.store)
+        else:
+            # Fallback crawl with a new session (e.g. Chrome cookies)
+            self.downloads.session.cookies.update(session.cookies)
+
+    def add(self, page_number, records):
+        for record in records:
+            self.downloads.submit(record["PDF URL"], clean_file_name(record["File Name"]),
+                                  appeals_number=record["Appeals Number"])
+
+    def close(self):
+        if self.downloads is not None:
+            self.downloads.close()
+        if self.store is not None:
+            self.store.close()
+            print("PDF index written to:", os.path.join(self.folder, "index.csv"))
+
+
+# --- Crawler ---
+class AppealsCrawler:
+    """
+    Walks the listing once and feeds every page's records to `sinks`.
+
+    criteria: appeals_filters.SearchCriteria for a filtered, partial crawl.
+    state: appeals_state.CrawlState for an incremental crawl (stops at the
+        first page of known decisions).
+    """
+
+    def __init__(self, sinks, criteria=None, state=None, archive_path=DEFAULT_ARCHIVE_PATH,
+                 use_http_client=True, shard_workers=1, shard_with_chrome=False,
+                 extraction_mode="script", summary_mode="dom", verify=True):
+        self.sinks = sinks
+        self.criteria = criteria or appeals_filters.SearchCriteria()
+        # Criteria still to be checked per record; narrowed once the search
+        # form tells us what the server applies.
+        self.record_filter = self.criteria
+        self.state = state
+        self.archive_path = archive_path
+        self.use_http_client = use_http_client
+        self.shard_workers = shard_workers
+        self.shard_with_chrome = shard_with_chrome
+        self.extraction_mode = extraction_mode
+        self.summary_mode = summary_mode
+        self.verify = verify
+        self.archive = None
+        self.new_records = 0
+        self._emitted = set()
+        self._lock = threading.Lock()
+
+    # --- Per page ---
+    def _start_sinks(self, session):
+        for sink in self.sinks:
+            sink.start(session)
+
+    def _emit(self, page_number, html, records):
+        """Archives the page and passes its (filtered, not yet emitted) records to every sink."""
+        with self._lock:
+            if self.archive is not None and html is not None:
+                self.archive.write_record(BASE_URL, html, meta={"page": page_number})
+            # A Chrome fallback re-reads pages the HTTP crawl already emitted
+            records = [record for record in records
+                       if self.record_filter.matches(record) and record["PDF URL"] not in self._emitted]
+            self._emitted.update(record["PDF URL"] for record in records)
+            for sink in self.sinks:
+                sink.add(page_number, records)
+            return records
+
+    def _should_stop(self, page_number, page_rows, records):
+        if self.state is not None:
+            all_known = self.state.page_all_known(records)
+            self.new_records += self.state.add(records)
+            if all_known:
+                print(f"Page {page_number} holds only known decisions; stopping incremental crawl.")
+                return True
+        if self.criteria.past_window(page_rows):
+            print(f"Page {page_number} is older than --date-from; stopping filtered crawl.")
+            return True
+        return False
+
+    # --- Fast path: walk the listing over plain HTTP ---
+    def crawl_with_http_client(self):
+        client = AppealsClient(verify=self.verify)
+        if self.criteria:
+            self.record_filter = self.criteria.without(appeals_filters.apply_server_filters(client, self.criteria))
+        self._start_sinks(client.session)
+        for current_page, total_pages, html in client.iter_pages():
+            print(f"Processing page {current_page} of {total_pages}...")
+            page_rows = appeals_parser.parse_page(html)
+            records = self._emit(current_page, html, page_rows)
+            if self._should_stop(current_page, page_rows, records):
+                break
+
+    # --- Parallel path: crawl page ranges in independent sessions ---
+    def crawl_sharded(self):
+        def process_page(page_number, html):
+            print(f"Processing page {page_number}...")
+            return self._emit(page_number, html, appeals_parser.parse_page(html))
+
+        # Every shard submits the same search before paging, so shard pages line up.
+        if self.criteria:
+            self.record_filter = self.criteria.without(
+                appeals_filters.apply_server_filters(AppealsClient(verify=self.verify), self.criteria))
+        if self.shard_with_chrome:
+            make_worker = lambda: SeleniumPageWorker(criteria=self.criteria)
+        else:
+            make_worker = lambda: HttpPageWorker(verify=self.verify, criteria=self.criteria)
+        # The sinks (PDF downloads) get the cookies of a session that has
+        # opened the listing, as in the serial crawls
+        session = requests.Session()
+        session.verify = self.verify
+        seed = make_worker()
+        try:
+            seed.open(1)
+            session.cookies.update(seed.cookies())
+        finally:
+            seed.close()
+        self._start_sinks(session)
+        # The sinks have every record already; don't hold a second copy
+        _, failed_shards = crawl_shards(process_page, self.shard_workers, make_worker, keep_records=False)
+        if failed_shards:
+            print("Pages missing from failed shards:", [(first, last) for first, last, _ in failed_shards])
+
+    # --- Fallback: drive Chrome through the listing ---
+    def crawl_with_selenium(self):
+        from selenium import webdriver
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        driver = webdriver.Chrome()  # Make sure chromedriver is in your PATH
+        try:
+            driver.get(BASE_URL)
+            wait = WebDriverWait(driver, 15)
+            wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "table.table")))
+            if self.criteria:
+                self.record_filter = self.criteria.without(
+                    appeals_filters.apply_server_filters_selenium(driver, self.criteria))
+
+            # --- Create a requests session and copy Selenium cookies into it ---
+            session = requests.Session()
+            for cookie in driver.get_cookies():
+                session.cookies.set(cookie['name'], cookie['value'])
+            self._start_sinks(session)
+
+            def read_summary(data_target):
+                toggle_link = driver.find_element(By.CSS_SELECTOR, f"a.toggle-summary[data-target='{data_target}']")
+                # Click the toggle to reveal the summary details
+                driver.execute_script("arguments[0].click();", toggle_link)
+                wait.until(EC.visibility_of_element_located((By.CSS_SELECTOR, data_target)))
+                summary_div = driver.find_element(By.CSS_SELECTOR, data_target)
+                issue_text = summary_div.find_element(By.CSS_SELECTOR, ".col-sm-4 p").text.strip()
+                holding_text = summary_div.find_element(By.CSS_SELECTOR, ".col-sm-6 p").text.strip()
+                return issue_text, holding_text
+
+            total_pages = int(driver.find_element(By.ID, "lblTotalPagesTop").text)
+            current_page = int(driver.find_element(By.ID, "lblPageNumberTop").text)
+            while current_page <= total_pages:
+                print(f"Processing page {current_page} of {total_pages}...")
+                html = driver.page_source if self.archive is not None else None
+                page_rows = self._read_page(driver, read_summary)
+                records = self._emit(current_page, html, page_rows)
+                if self._should_stop(current_page, page_rows, records) or current_page >= total_pages:
+                    break
+
+                next_btn = driver.find_element(By.ID, "btnNextTop")
+                driver.execute_script("arguments[0].click();", next_btn)
+                # Wait until the page number updates to current_page + 1
+                WebDriverWait(driver, 15).until(
+                    lambda d: int(d.find_element(By.ID, "lblPageNumberTop").text) == current_page + 1
+                )
+                current_page += 1
+                time.sleep(1)  # Allow additional time for the new page to settle
+        finally:
+            driver.quit()
+
+    def _read_page(self, driver, read_summary):
+        # One bulk table read; summaries from the hidden DOM or by clicking each toggle
+        read_from_dom = self.summary_mode == "dom"
+        page_records = []
+        for row in appeals_parser.extract_listing(driver, self.extraction_mode, with_summaries=read_from_dom):
+            issue_text = ""
+            holding_text = ""
+            if not row["Summary Target"]:
+                print("No summary row found for record", row["PDF URL"])
+            elif read_from_dom:
+                issue_text, holding_text = row["Issue"], row["Holding"]
+            else:
+                try:
+                    issue_text, holding_text = read_summary(row["Summary Target"])
+                except Exception as e:
+                    print("Error processing summary for record", row["PDF URL"], ":", e)
+            page_records.append({
+                "Appeals Number": row["Appeals Number"],
+                "File Name": row["File Name"],
+                "Order Date": row["Order Date"],
+                "Issue": issue_text,
+                "Holding": holding_text,
+                "PDF URL": row["PDF URL"]
+            })
+        return page_records
+
+    # --- Whole run ---
+    def run(self):
+        if self.criteria:
+            print("Filtered crawl:", self.criteria)
+        self.archive = response_archive.ResponseArchive(self.archive_path) if self.archive_path else None
+        finished = False
+        try:
+            if self.shard_workers > 1 and self.state is None:
+                self.crawl_sharded()
+            else:
+                crawled = False
+                if self.use_http_client:
+                    try:
+                        self.crawl_with_http_client()
+                        crawled = True
+                    except (AppealsClientError, requests.RequestException) as e:
+                        print("HTTP client failed, falling back to Chrome:", e)
+                if not crawled:
+                    self.crawl_with_selenium()
+            finished = True
+        finally:
+            if self.archive is not None:
+                self.archive.close()
+            for sink in self.sinks:
+                if finished:
+                    sink.close()
+                else:
+                    sink.abort()
+
+        # --- Incremental mode: remember what we've seen ---
+        if self.state is not None:
+            print(f"{self.new_records} new decisions since the last run.")
+            self.state.save()
+        elif self.criteria:
+            print(f"{len(self._emitted)} decisions match the filters.")
+        return len(self._emitted)
+
+
+# --- Command line interface ---
+def build_parser():
+    parser = argparse.ArgumentParser(description="Crawl the appeals decisions listing once into any set of outputs.")
+    outputs = parser.add_argument_group("outputs (any combination, filled from the same pass)")
+    outputs.add_argument("--csv", help="Table of all decisions as CSV")
+    outputs.add_argument("--excel", help="Summary table as .xlsx")
+    outputs.add_argument("--jsonl", help="Append one JSON object per decision")
+    outputs.add_argument("--pdfs", metavar="FOLDER", help="Download every decision PDF into FOLDER")
+    outputs.add_argument("--no-pdf-store", dest="pdf_store", action="store_false",
+                         help="Save PDFs under their file names instead of the content-addressed store")
+    outputs.add_argument("--download-workers", type=int, default=4, help="Parallel PDF downloads (default: %(default)s)")
+    outputs.add_argument("--archive", default=DEFAULT_ARCHIVE_PATH,
+                         help="Append raw listing pages here for offline re-parsing (default: %(default)s)")
+    outputs.add_argument("--no-archive", dest="archive", action="store_const", const=None)
+
+    crawl = parser.add_argument_group("crawl")
+    crawl.add_argument("--selenium", dest="http_client", action="store_false",
+                       help="Drive Chrome instead of replaying the postbacks over HTTP")
+    crawl.add_argument("--extraction", choices=["script", "page_source"], default="script",
+                       help="How the Chrome crawl reads each page's table (default: %(default)s)")
+    crawl.add_argument("--summaries", choices=["dom", "click"], default="dom",
+                       help="How the Chrome crawl reads Issue/Holding (default: %(default)s)")
+    crawl.add_argument("--shards", type=int, default=1, help="Crawl in N parallel page-range shards")
+    crawl.add_argument("--chrome-shards", action="store_true", help="Use headless Chrome sessions for the shards")
+    crawl.add_argument("--incremental", action="store_true",
+                       help="Stop at the first page of known decisions and merge into the existing outputs")
+    crawl.add_argument("--state", default=appeals_state.DEFAULT_STATE_PATH,
+                       help="Incremental crawl state (default: %(default)s)")
+    crawl.add_argument("--insecure", dest="verify", action="store_false", help="Skip TLS certificate checks")
+
+    appeals_filters.add_filter_arguments(parser)
+    return parser
+
+
+def build_sinks(args, merge=False):
+    sinks = []
+    if args.csv:
+        sinks.append(CsvSink(args.csv, merge=merge))
+    if args.excel:
+        sinks.append(ExcelSink(args.excel, merge=merge))
+    if args.jsonl:
+        sinks.append(JsonlSink(args.jsonl))
+    if args.pdfs:
+        sinks.append(PdfSink(args.pdfs, workers=args.download_workers, use_store=args.pdf_store, verify=args.verify))
+    return sinks
+
+
+def main(argv=None, defaults=None):
+    """
+    Runs a crawl from the command line. `defaults` pre-set any option (by its
+    dest name) so the per-site scripts can keep their own configuration.
+    """
+    parser = build_parser()
+    if defaults:
+        parser.set_defaults(**defaults)
+    args = parser.parse_args(argv)
+
+    criteria = appeals_filters.criteria_from_args(args)
+    # A filtered crawl sees only part of the listing, so it doesn't touch the incremental state.
+    state = None
+    if args.incremental and not criteria:
+        state = appeals_state.CrawlState.load(args.state, seed_csv=args.csv)
+    sinks = build_sinks(args, merge=bool(state is not None or criteria))
+    if not sinks:
+        parser.error("choose at least one output: --csv, --excel, --jsonl or --pdfs")
+
+    crawler = AppealsCrawler(sinks, criteria, state, archive_path=args.archive,
+                             use_http_client=args.http_client, shard_workers=args.shards,
+                             shard_with_chrome=args.chrome_shards, extraction_mode=args.extraction,
+                             summary_mode=args.summaries, verify=args.verify)
+    return crawler.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+"""
+Filtered, partial crawls of the appeals listing.
+
+Command-line options select an order-date window, an appeals-number range
+and/or search text. Before paging, the crawler fills the listing's own search
+controls on DocumentRetriever.aspx and submits them, so the server returns
+only matching pages. The controls are located by their field names (see
+SEARCH_FIELD_PATTERNS, or pin them with SEARCH_FIELDS). Date and
+appeals-number criteria are always enforced on each parsed record as well,
+since a guessed field may be the wrong one, and a date window stops the crawl
+once the newest-first listing has moved past it. Search text is left to the
+server when the form takes it.
+
+A filter the server evidently ignored (a record on the first filtered page
+falls outside it) is reported with a WARNING, as are criteria the form can't
+take at all. Such a crawl reads pages the server would have left out; pin the
+controls in SEARCH_FIELDS to avoid that.
+"""
+import re
+from datetime import datetime
+
+import lxml.html
+
+import appeals_parser
+
+# Date format the site's date boxes expect (and the listing displays).
+SEARCH_DATE_FORMAT = "%m/%d/%Y"
+
+# Form field names for each criterion, when known. Fields left as None are
+# looked up with SEARCH_FIELD_PATTERNS.
+SEARCH_FIELDS = {"date_from": None, "date_to": None, "appeals_from": None, "appeals_to": None, "text": None}
+SEARCH_BUTTON_ID = None
+
+# Regexes matched (case-insensitively) against input names/ids to find the
+# search controls when SEARCH_FIELDS doesn't name them.
+SEARCH_FIELD_PATTERNS = {
+    "date_from": r"(from|start|begin).*date|date.*(from|start|begin)",
+    "date_to": r"(to|end|thru|through).*date|date.*(to|end|thru|through)$",
+    "appeals_from": r"(appeal|docket).*(from|start|begin)|(from|start|begin).*(appeal|docket)",
+    "appeals_to": r"(appeal|docket).*(to|end)$|(to|end).*(appeal|docket)",
+    "text": r"search|keyword|txt(text|query)|query",
+}
+SEARCH_BUTTON_PATTERN = r"(btn|button).*(search|filter|go|submit)|(search|filter).*(btn|button)"
+
+
+class SearchCriteria:
+    """The filters requested for a crawl. Unset criteria are None."""
+
+    def __init__(self, date_from=None, date_to=None, appeals_from=None, appeals_to=None, text=None):
+        self.date_from = date_from
+        self.date_to = date_to
+        self.appeals_from = appeals_from
+        self.appeals_to = appeals_to
+        self.text = text
+
+    def __bool__(self):
+        return any(value is not None for value in vars(self).values())
+
+    def __repr__(self):
+        return "SearchCriteria(" + ", ".join(f"{k}={v!r}" for k, v in vars(self).items() if v is not None) + ")"
+
+    def form_values(self):
+        """Criterion name -> value as the site's form expects it."""
+        values = {}
+        for name, value in vars(self).items():
+            if value is None:
+                continue
+            values[name] = value.strftime(SEARCH_DATE_FORMAT) if hasattr(value, "strftime") else str(value)
+        return values
+
+    def without(self, applied):
+        """
+        The criteria still to be checked per record once the server has
+        applied `applied`. Only text is left to the server, since its search
+        may match more than the listing shows (e.g. decision text); date and
+        appeals-number checks are cheap and pass for rows the server filtered.
+        """
+        return SearchCriteria(**{name: (None if name == "text" and name in applied else value)
+                                 for name, value in vars(self).items()})
+
+    # --- Record-level checks, for criteria the server didn't apply ---
+    def matches(self, record):
+        order_date = parse_order_date(record.get("Order Date", ""))
+        if self.date_from and (order_date is None or order_date < self.date_from):
+            return False
+        if self.date_to and (order_date is None or order_date > self.date_to):
+            return False
+        number = appeals_number_key(record.get("Appeals Number", ""))
+        if self.appeals_from and number < appeals_number_key(self.appeals_from):
+            return False
+        if self.appeals_to and number > appeals_number_key(self.appeals_to):
+            return False
+        if self.text:
+            haystack = " ".join(str(value) for value in record.values()).lower()
+            if self.text.lower() not in haystack:
+                return False
+        return True
+
+    def past_window(self, records):
+        """
+        True once a page is entirely older than date_from. The listing is
+        newest-first, so no later page can match either.
+        """
+        if not self.date_from or not records:
+            return False
+        dates = [parse_order_date(record.get("Order Date", "")) for record in records]
+        return all(date is not None and date < self.date_from for date in dates)
+
+
+def parse_order_date(value):
+    try:
+        return datetime.strptime(value.strip(), SEARCH_DATE_FORMAT).date()
+    except (AttributeError, ValueError):
+        return None
+
+
+def appeals_number_key(value):
+    # Compare appeals numbers by their numeric parts, e.g. "AP-00-0456-789".
+    return tuple(int(part) for part in re.findall(r"\d+", value or ""))
+
+
+def _parse_date_argument(value):
+    for date_format in ("%Y-%m-%d", SEARCH_DATE_FORMAT):
+        try:
+            return datetime.strptime(value, date_format).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognised date {value!r}; use YYYY-MM-DD or MM/DD/YYYY.")
+
+
+def add_filter_arguments(parser):
+    group = parser.add_argument_group("filters (applied through the site's search form)")
+    group.add_argument("--date-from", type=_parse_date_argument, help="Earliest order date (YYYY-MM-DD)")
+    group.add_argument("--date-to", type=_parse_date_argument, help="Latest order date (YYYY-MM-DD)")
+    group.add_argument("--appeals-from", help="Lowest appeals number")
+    group.add_argument("--appeals-to", help="Highest appeals number")
+    group.add_argument("--search", dest="text", help="Search text")
+    return parser
+
+
+def criteria_from_args(args):
+    return SearchCriteria(args.date_from, args.date_to, args.appeals_from, args.appeals_to, args.text)
+
+
+# --- Locating the site's search controls ---
+def find_search_controls(html):
+    """
+    Returns ({criterion: form field name}, search button id) for the search
+    controls present on the page; criteria without a control are left out.
+    """
+    tree = lxml.html.fromstring(html)
+    inputs = [element for element in tree.xpath("//form//input[@name] | //form//select[@name]")
+              if (element.get("type") or "text").lower() in ("text", "date", "search", "select-one", "number")
+              or element.tag == "select"]
+
+    fields = {}
+    for criterion, pattern in SEARCH_FIELD_PATTERNS.items():
+        if SEARCH_FIELDS.get(criterion):
+            fields[criterion] = SEARCH_FIELDS[criterion]
+            continue
+        for element in inputs:
+            label = f"{element.get('name')} {element.get('id') or ''}"
+            if element.get("name") not in fields.values() and re.search(pattern, label, re.IGNORECASE):
+                fields[criterion] = element.get("name")
+                break
+
+    button_id = SEARCH_BUTTON_ID
+    if button_id is None:
+        for element in tree.xpath("//form//input[@type='submit' or @type='image'][@id] | //form//a[@id] "
+                                  "| //form//button[@id]"):
+            if re.search(SEARCH_BUTTON_PATTERN, element.get("id"), re.IGNORECASE):
+                button_id = element.get("id")
+                break
+    return fields, button_id
+
+
+def server_side_criteria(html, criteria):
+    """The criteria the search form on `html` can apply (empty without a search button)."""
+    fields, button_id = find_search_controls(html)
+    if button_id is None:
+        return set()
+    return {name for name in criteria.form_values() if name in fields}
+
+
+def ignored_criteria(html, criteria, applied, fields):
+    """
+    The date and appeals-number criteria in `applied` that the filtered page
+    `html` shows the server ignored (a record on it falls outside them),
+    with a warning for each. One page can only show a filter was ignored, not
+    that it was applied: the newest-first first page of an unfiltered listing
+    passes a date_from check too. Text isn't checked, since the server may
+    match text the listing doesn't show.
+    """
+    records = appeals_parser.parse_page(html)
+    ignored = set()
+    for name in sorted(applied - {"text"}):
+        check = SearchCriteria(**{name: getattr(criteria, name)})
+        if not all(check.matches(record) for record in records):
+            print(f"WARNING: the server ignored the {name} filter (form field {fields[name]!r}). "
+                  f"Pin the field in SEARCH_FIELDS.")
+            ignored.add(name)
+    return ignored
+
+
+def _report(criteria, submitted):
+    client_side = sorted(set(criteria.form_values()) - submitted)
+    if client_side:
+        print(f"WARNING: filters {client_side} are not applied by the server; they are checked on each "
+              f"record after parsing, so the crawl reads pages the server would have left out.")
+    if submitted:
+        print(f"Filters submitted through the search form: {sorted(submitted)} "
+              f"(dates and appeals numbers are also checked on each record)")
+
+
+def apply_server_filters(client, criteria):
+    """
+    Submits `criteria` through the search form of an AppealsClient. Returns
+    the set of criteria submitted, less any the first filtered page shows the
+    server ignored (see ignored_criteria).
+    """
+    if client.html is None:
+        client.load()
+    fields, button_id = find_search_controls(client.html)
+    applied = server_side_criteria(client.html, criteria)
+    if applied:
+        values = criteria.form_values()
+        client.click(button_id, overrides={fields[name]: values[name] for name in applied})
+        applied -= ignored_criteria(client.html, criteria, applied, fields)
+    _report(criteria, applied)
+    return applied
+
+
+def apply_server_filters_selenium(driver, criteria, wait_seconds=15):
+    """apply_server_filters() for the Chrome fallback: types the values and clicks search."""
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    fields, button_id = find_search_controls(driver.page_source)
+    applied = server_side_criteria(driver.page_source, criteria)
+    if not applied:
+        _report(criteria, applied)
+        return applied
+    values = {name: value for name, value in criteria.form_values().items() if name in applied}
+    for name, value in values.items():
+        element = driver.find_element(By.NAME, fields[name])
+        element.clear()
+        element.send_keys(value)
+    old_table = driver.find_element(By.CSS_SELECTOR, "table.table")
+    driver.execute_script("arguments[0].click();", driver.find_element(By.ID, button_id))
+    # The postback replaces the page; wait for the old table to go stale
+    WebDriverWait(driver, wait_seconds).until(lambda d: not _is_attached(old_table))
+    applied -= ignored_criteria(driver.page_source, criteria, applied, fields)
+    _report(criteria, applied)
+    return applied
+
+
+def _is_attached(element):
+    try:
+        element.is_enabled()
+        return True
+    except Exception:
+        return False
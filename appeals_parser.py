@@ -0,0 +1,246 @@
+"""
+HTML parsing for the Kansas workers' compensation appeals listing
+(appealsdecisions.dol.ks.gov/DocumentRetriever.aspx).
+
+These functions work on page source rather than live WebDriver elements, so
+one snapshot of a page (driver.page_source, an HTTP response, or a page saved
+in a response archive) is parsed locally with lxml in a few milliseconds:
+
+    python appeals_parser.py appeals_pages.warc.gz --csv appeals_data.csv
+
+extract_listing() is the Selenium entry point: it reads the whole table in a
+single WebDriver round trip instead of several calls per row.
+"""
+import argparse
+import json
+from urllib.parse import urljoin
+
+import lxml.html
+
+import exporters
+import response_archive
+
+BASE_URL = "https://appealsdecisions.dol.ks.gov/DocumentRetriever.aspx"
+
+FIELDNAMES = ["Appeals Number", "File Name", "Order Date", "Issue", "Holding", "PDF URL"]
+
+
+def _has_class(name):
+    # XPath equivalent of the CSS class selector ".name"
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+ROWS_XPATH = f"//table[{_has_class('table')}]//tbody//tr"
+PDF_LINK_XPATH = f".//td[{_has_class('shorter-width-column')}]//a"
+APPEALS_NUMBER_XPATH = f".//td[{_has_class('appealsId-column')}]//b"
+TOGGLE_XPATH = f".//a[{_has_class('toggle-summary')}]"
+ISSUE_XPATH = f".//*[{_has_class('col-sm-4')}]//p"
+HOLDING_XPATH = f".//*[{_has_class('col-sm-6')}]//p"
+
+
+def _tree(html):
+    # Accept a parsed tree too, so callers can parse a page once for several lookups.
+    return lxml.html.fromstring(html) if isinstance(html, (str, bytes)) else html
+
+
+def _text(elements):
+    return " ".join(elements[0].text_content().split()) if elements else ""
+
+
+def parse_pagination(html):
+    """Returns (current_page, total_pages) from the top pagination labels."""
+    tree = _tree(html)
+    current_page = int(_text(tree.xpath("//*[@id='lblPageNumberTop']")))
+    total_pages = int(_text(tree.xpath("//*[@id='lblTotalPagesTop']")))
+    return current_page, total_pages
+
+
+def parse_listing(html):
+    """
+    Parses the record rows of one listing page.
+
+    Returns dicts with the table fields plus "Summary Target", the selector of
+    the collapsed details block (e.g. "#row0details") holding the record's
+    Issue/Holding summary. Rows that aren't records are skipped.
+    """
+    tree = _tree(html)
+    # Ignore empty spacer rows, as the WebDriver path does
+    rows = [row for row in tree.xpath(ROWS_XPATH) if row.text_content().strip()]
+
+    records = []
+    i = 0
+    while i < len(rows):
+        row = rows[i]
+        pdf_links = row.xpath(PDF_LINK_XPATH)
+        appeals_cells = row.xpath(APPEALS_NUMBER_XPATH)
+        cells = row.xpath(".//td")
+        if not pdf_links or not appeals_cells or len(cells) < 3:
+            i += 1
+            continue
+
+        summary_target = None
+        if i + 1 < len(rows):
+            toggle_links = rows[i + 1].xpath(TOGGLE_XPATH)
+            if toggle_links:
+                summary_target = toggle_links[0].get("data-target")
+
+        records.append({
+            "Appeals Number": _text(appeals_cells),
+            "File Name": _text(pdf_links),
+            "Order Date": _text(cells[2:3]),
+            "PDF URL": urljoin(BASE_URL, pdf_links[0].get("href", "")),
+            "Summary Target": summary_target,
+        })
+        i += 2  # Skip the summary row
+    return records
+
+
+def parse_summaries(html):
+    """
+    Reads every Issue/Holding summary on a page, including collapsed ones.
+
+    Returns {summary_target: (issue, holding)}, e.g. {"#row0details": (...)}.
+    """
+    tree = _tree(html)
+    elements_by_id = {element.get("id"): element for element in tree.xpath("//*[@id]")}
+    summaries = {}
+    for toggle_link in tree.xpath(f"//a[{_has_class('toggle-summary')}][@data-target]"):
+        target = toggle_link.get("data-target")
+        summary_div = elements_by_id.get(target.lstrip("#"))
+        if summary_div is None:
+            continue
+        summaries[target] = (
+            _text(summary_div.xpath(ISSUE_XPATH)),
+            _text(summary_div.xpath(HOLDING_XPATH)),
+        )
+    return summaries
+
+
+def parse_page(html):
+    """Parses a listing page into complete records (table fields plus summaries)."""
+    tree = _tree(html)
+    summaries = parse_summaries(tree)
+    records = []
+    for row in parse_listing(tree):
+        issue, holding = summaries.get(row.pop("Summary Target"), ("", ""))
+        records.append({
+            "Appeals Number": row["Appeals Number"],
+            "File Name": row["File Name"],
+            "Order Date": row["Order Date"],
+            "Issue": issue,
+            "Holding": holding,
+            "PDF URL": row["PDF URL"],
+        })
+    return records
+
+
+# --- Selenium: read the whole table in one round trip ---
+
+# Runs in the browser and returns the record rows as a JSON string, mirroring
+# parse_listing(). One execute_script call replaces the find_element /
+# get_attribute calls that would otherwise be made for every row. When
+# arguments[0] is true each row also carries its Issue/Holding, read from the
+# collapsed details block via textContent, so no toggle has to be clicked.
+TABLE_SCRIPT = """
+var withSummaries = arguments[0];
+function clean(element) {
+    return element ? element.textContent.replace(/\\s+/g, " ").trim() : "";
+}
+var rows = Array.prototype.filter.call(
+    document.querySelectorAll("table.table tbody tr"),
+    function (row) { return row.innerText.trim() !== ""; });
+var records = [];
+for (var i = 0; i < rows.length; i++) {
+    var link = rows[i].querySelector("td.shorter-width-column a");
+    var number = rows[i].querySelector("td.appealsId-column b");
+    var cells = rows[i].querySelectorAll("td");
+    if (!link || !number || cells.length < 3) { continue; }
+    var toggle = i + 1 < rows.length ? rows[i + 1].querySelector("a.toggle-summary") : null;
+    var target = toggle ? toggle.getAttribute("data-target") : null;
+    var record = {
+        "Appeals Number": number.innerText.trim(),
+        "File Name": link.innerText.trim(),
+        "Order Date": cells[2].innerText.trim(),
+        "PDF URL": link.href,
+        "Summary Target": target
+    };
+    if (withSummaries) {
+        var details = target ? document.querySelector(target) : null;
+        record["Issue"] = details ? clean(details.querySelector(".col-sm-4 p")) : "";
+        record["Holding"] = details ? clean(details.querySelector(".col-sm-6 p")) : "";
+    }
+    records.push(record);
+    i++;  // Skip the summary row
+}
+return JSON.stringify(records);
+"""
+
+
+def extract_listing(driver, mode="script", with_summaries=False):
+    """
+    Reads the record rows of the page currently loaded in `driver`.
+
+    mode="script" runs TABLE_SCRIPT in the browser; mode="page_source" pulls
+    the page source once and parses it locally with lxml. Either way the rows
+    cost one WebDriver round trip in total. Returns parse_listing()-style
+    dicts; with_summaries=True adds "Issue" and "Holding" read straight from
+    the hidden summary blocks in that same round trip.
+    """
+    if mode == "script":
+        records = json.loads(driver.execute_script(TABLE_SCRIPT, with_summaries))
+        for record in records:
+            record["PDF URL"] = urljoin(BASE_URL, record["PDF URL"])
+        return records
+    if mode == "page_source":
+        tree = _tree(driver.page_source)
+        records = parse_listing(tree)
+        if with_summaries:
+            summaries = parse_summaries(tree)
+            for record in records:
+                record["Issue"], record["Holding"] = summaries.get(record["Summary Target"], ("", ""))
+        return records
+    raise ValueError(f"Unknown extraction mode: {mode!r}")
+
+
+def reparse_archive(archive_path):
+    """
+    Re-runs the listing parser over every archived page. A decision captured
+    in several runs is reported once, with its most recently archived data.
+    """
+    records = {}
+    for record in response_archive.iter_records(archive_path):
+        if record.status != 200:
+            continue
+        for parsed in parse_page(record.text):
+            records[parsed["PDF URL"]] = parsed
+    return list(records.values())
+
+
+# --- Command line interface: rebuild outputs from an archive ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-parse archived appeals listing pages.")
+    parser.add_argument("archive", help="Archive written by the appeals scrapers (.warc.gz)")
+    parser.add_argument("--csv", default="appeals_data.csv", help="CSV output (default: %(default)s)")
+    parser.add_argument("--excel", help="Optional Excel output")
+    args = parser.parse_args(argv)
+
+    all_records = reparse_archive(args.archive)
+
+    # CSV and the write-only workbook are filled in one pass (see exporters.py)
+    outputs = [exporters.CsvExporter(args.csv, FIELDNAMES)]
+    if args.excel:
+        try:
+            outputs.append(exporters.XlsxExporter(args.excel, FIELDNAMES))
+        except ImportError:
+            print("openpyxl not installed; Excel file not created.")
+            args.excel = None
+    with exporters.MultiExporter(outputs) as out:
+        for record in all_records:
+            out.write(record)
+    print(f"Re-parsed {out.rows} records into {args.csv}")
+    if args.excel:
+        print(f"Data saved to Excel file: {args.excel}")
+
+
+if __name__ == "__main__":
+    main()
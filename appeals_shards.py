@@ -0,0 +1,188 @@
+"""
+Parallel, sharded crawling of the appeals listing.
+
+The page range 1..total_pages is split into contiguous shards, one per
+worker. Each worker opens its own session (an HTTP client or a headless
+Chrome), jumps straight to the first page of its shard with one pager
+postback and processes its pages independently. Results are merged back in page order. A shard that
+fails is retried from the first page it hadn't finished, with a fresh
+session, while the other shards carry on.
+
+    records, failed = crawl_shards(process_page, workers=4)
+
+`process_page(page_number, html)` is called from worker threads and must be
+thread-safe; it returns that page's records.
+
+Sharding needs that jump: if the listing has no pager control to jump with
+(see appeals_client.page_jump_target), reaching page N would mean replaying
+N-1 next-page postbacks per shard, so the crawl runs as a single shard
+instead and says so.
+
+Workers given SearchCriteria (see appeals_filters.py) submit the listing's
+search form before paging, so every shard walks the same filtered listing.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import appeals_filters
+import appeals_parser
+from appeals_client import AppealsClient, page_jump_target
+
+# Attempts per shard after its first failure.
+SHARD_RETRIES = 2
+
+
+class HttpPageWorker:
+    """Shard worker that pages with plain-HTTP postbacks (see appeals_client.py)."""
+
+    def __init__(self, verify=True, criteria=None):
+        self.client = AppealsClient(verify=verify)
+        self.criteria = criteria
+
+    def open(self, page_number):
+        if self.criteria and self.client.html is None:
+            appeals_filters.apply_server_filters(self.client, self.criteria)
+        return self.client.goto_page(page_number)
+
+    def can_jump(self):
+        return self.client.can_jump()
+
+    def next(self):
+        return self.client.next_page()
+
+    def cookies(self):
+        return self.client.session.cookies
+
+    def close(self):
+        self.client.session.close()
+
+
+class SeleniumPageWorker:
+    """Shard worker driving its own headless Chrome session."""
+
+    def __init__(self, headless=True, timeout=15, criteria=None):
+        from selenium import webdriver
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        self._By = By
+        self._WebDriverWait = WebDriverWait
+        self.timeout = timeout
+        options = webdriver.ChromeOptions()
+        if headless:
+            options.add_argument("--headless=new")
+        self.driver = webdriver.Chrome(options=options)
+        self.driver.get(appeals_parser.BASE_URL)
+        WebDriverWait(self.driver, timeout).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, "table.table")))
+        if criteria:
+            appeals_filters.apply_server_filters_selenium(self.driver, criteria, timeout)
+
+    def _page_number(self):
+        return int(self.driver.find_element(self._By.ID, "lblPageNumberTop").text)
+
+    def next(self):
+        current_page = self._page_number()
+        next_btn = self.driver.find_element(self._By.ID, "btnNextTop")
+        self.driver.execute_script("arguments[0].click();", next_btn)
+        self._WebDriverWait(self.driver, self.timeout).until(
+            lambda d: int(d.find_element(self._By.ID, "lblPageNumberTop").text) == current_page + 1
+        )
+        return self.driver.page_source
+
+    def can_jump(self):
+        return page_jump_target(self.driver.page_source) is not None
+
+    def cookies(self):
+        return {cookie["name"]: cookie["value"] for cookie in self.driver.get_cookies()}
+
+    def open(self, page_number):
+        if self._page_number() == page_number:
+            return self.driver.page_source
+        target = page_jump_target(self.driver.page_source)
+        if target is None:
+            while self._page_number() < page_number:
+                self.next()
+            return self.driver.page_source
+        self.driver.execute_script("__doPostBack(arguments[0], arguments[1]);", target, f"Page${page_number}")
+        self._WebDriverWait(self.driver, self.timeout).until(
+            lambda d: int(d.find_element(self._By.ID, "lblPageNumberTop").text) == page_number
+        )
+        return self.driver.page_source
+
+    def close(self):
+        self.driver.quit()
+
+
+def shard_ranges(total_pages, shards):
+    """Splits 1..total_pages into up to `shards` contiguous (first, last) ranges."""
+    shards = max(1, min(shards, total_pages))
+    size, extra = divmod(total_pages, shards)
+    ranges = []
+    first = 1
+    for n in range(shards):
+        last = first + size - 1 + (1 if n < extra else 0)
+        ranges.append((first, last))
+        first = last + 1
+    return ranges
+
+
+def _run_shard(first, last, make_worker, process_page, results, keep_records=True):
+    page_number = first  # first page of the shard not yet processed
+    for attempt in range(SHARD_RETRIES + 1):
+        worker = None
+        try:
+            worker = make_worker()
+            html = worker.open(page_number)
+            while True:
+                records = process_page(page_number, html)
+                results[page_number] = records if keep_records else None
+                if page_number == last:
+                    return
+                page_number += 1
+                html = worker.next()
+        except Exception as e:
+            if attempt == SHARD_RETRIES:
+                raise
+            print(f"Shard {first}-{last} failed at page {page_number} ({e}); retrying from there...")
+        finally:
+            if worker is not None:
+                worker.close()
+
+
+def crawl_shards(process_page, workers=4, make_worker=HttpPageWorker, total_pages=None, keep_records=True):
+    """
+    Crawls every listing page across `workers` parallel shards.
+
+    Returns (records, failed_shards): all records in page order, and the
+    (first, last, error) of any shard that still failed after its retries.
+    The pages those shards did finish are kept. With keep_records=False the
+    records are only passed to process_page and `records` is empty.
+    """
+    if total_pages is None or workers > 1:
+        probe = make_worker()
+        try:
+            _, total_pages = appeals_parser.parse_pagination(probe.open(1))
+            if workers > 1 and total_pages > 1 and not probe.can_jump():
+                print("WARNING: the listing has no page-jump control, so shards could only reach their "
+                      "first page by replaying every page before it. Crawling in a single shard.")
+                workers = 1
+        finally:
+            probe.close()
+
+    results = {}
+    failed_shards = []
+    ranges = shard_ranges(total_pages, workers)
+    print(f"Crawling {total_pages} pages in {len(ranges)} shards: {ranges}")
+    with ThreadPoolExecutor(max_workers=len(ranges), thread_name_prefix="appeals-shard") as pool:
+        futures = {pool.submit(_run_shard, first, last, make_worker, process_page, results, keep_records): (first, last)
+                   for first, last in ranges}
+        for future, (first, last) in futures.items():
+            try:
+                future.result()
+            except Exception as e:
+                print(f"Shard {first}-{last} gave up: {e}")
+                failed_shards.append((first, last, e))
+
+    records = [record for page_number in sorted(results) for record in results[page_number] or ()]
+    return records, failed_shards
@@ -0,0 +1,81 @@
+"""
+Crawl state for incremental runs of the appeals scrapers.
+
+The listing is newest-first, so a daily refresh only needs the first page or
+two. CrawlState remembers every Appeals Number seen so far plus a watermark
+(newest order date, last run time), and tells the crawler to stop paging once
+a whole page contains only decisions it already has. New rows are then merged
+into the existing CSV/Excel output instead of rewriting it from scratch.
+"""
+import csv
+import json
+import os
+from datetime import datetime, timezone
+
+DEFAULT_STATE_PATH = "appeals_state.json"
+
+
+def _order_date_key(value):
+    # Order dates are shown as MM/DD/YYYY; compare them as YYYY-MM-DD.
+    try:
+        return datetime.strptime(value.strip(), "%m/%d/%Y").strftime("%Y-%m-%d")
+    except (AttributeError, ValueError):
+        return ""
+
+
+class CrawlState:
+    """Seen Appeals Numbers plus crawl watermark, persisted as JSON."""
+
+    def __init__(self, path=DEFAULT_STATE_PATH):
+        self.path = path
+        self.seen = set()
+        self.watermark = {"last_run": None, "newest_order_date": None, "records": 0}
+
+    @classmethod
+    def load(cls, path=DEFAULT_STATE_PATH, seed_csv=None):
+        """
+        Loads state from `path`. When there is no state file yet but a previous
+        full crawl left `seed_csv`, its Appeals Numbers seed the seen set.
+        """
+        state = cls(path)
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as state_file:
+                data = json.load(state_file)
+            state.seen = set(data.get("seen", []))
+            state.watermark.update(data.get("watermark", {}))
+        elif seed_csv and os.path.exists(seed_csv):
+            state.add(read_csv_records(seed_csv))
+        return state
+
+    def is_known(self, record):
+        return record["Appeals Number"] in self.seen
+
+    def page_all_known(self, records):
+        """True when every record on a page was already seen (and the page isn't empty)."""
+        return bool(records) and all(self.is_known(record) for record in records)
+
+    def add(self, records):
+        """Marks records as seen and advances the order-date watermark. Returns the count of new ones."""
+        new = 0
+        for record in records:
+            if record["Appeals Number"] not in self.seen:
+                self.seen.add(record["Appeals Number"])
+                new += 1
+            order_date = _order_date_key(record.get("Order Date", ""))
+            if order_date and order_date > (self.watermark["newest_order_date"] or ""):
+                self.watermark["newest_order_date"] = order_date
+        return new
+
+    def save(self):
+        self.watermark["last_run"] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        self.watermark["records"] = len(self.seen)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as state_file:
+            json.dump({"watermark": self.watermark, "seen": sorted(self.seen)}, state_file, indent=1)
+        os.replace(tmp_path, self.path)
+
+
+def read_csv_records(csv_path):
+    with open(csv_path, newline="", encoding="utf-8") as csvfile:
+        return list(csv.DictReader(csvfile))
+
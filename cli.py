@@ -0,0 +1,207 @@
+"""
+One entry point for the scraping tools.
+
+    python cli.py --help
+    python cli.py companies search "Finance Scraping Wizard.py" --dry-run
+    python cli.py companies search companies.txt -o out.csv --concurrency 4
+    python cli.py companies owners "import requests3.py"
+    python cli.py companies replay out.csv.checkpoint.jsonl -o out.csv
+    python cli.py appeals --csv appeals_data.csv --incremental
+    python cli.py statutes --reparse kansas_statutes.warc.gz
+    python cli.py decisions search "temporary total disability"
+    python cli.py --profile --trace-memory companies search companies.txt
+
+Only this file and argparse are loaded to parse the command line; each
+subcommand imports its own module (and that module loads pandas, spaCy,
+openai, selenium or Chrome only when the work actually needs them). API keys
+are checked right before the first live request, so --help, --dry-run and
+checkpoint replays need neither keys nor network. --profile and
+--trace-memory (before the command) wrap any tool; see profiling.py.
+"""
+import argparse
+import importlib
+import importlib.util
+import logging
+import os
+import sys
+
+import profiling
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Subcommands handed straight to a module's main(argv): name -> (module, help)
+DELEGATED = {
+    "appeals": ("appeals_crawler", "Crawl the appeals decisions listing into CSV/Excel/JSONL/PDFs"),
+    "appeals-reparse": ("appeals_parser", "Rebuild the appeals table from archived listing pages"),
+    "pdf-store": ("pdf_store", "Maintain the content-addressed decision PDF store"),
+    "extract-text": ("pdf_extractor", "Extract text from downloaded decision PDFs"),
+    "decision-fields": ("decision_fields", "Structured decision fields into Parquet"),
+    "decisions": ("decision_search", "Build or query the BM25 decision index"),
+    "statutes": ("import requests.py", "Scrape (or --reparse) Kansas statutes chapter 44"),
+    "statute-index": ("statute_index", "Query the statute full-text index"),
+    "statute-versions": ("statute_versions", "Statute version history and change reports"),
+    "queue": ("work_queue", "Inspect a shared work queue"),
+    "doc-cache": ("doc_cache", "Re-run executive extraction over stored snippets with cached spaCy Docs"),
+    "llm-batch": ("llm_batch", "Prepare or ingest OpenAI Batch API runs of the company LLM extraction"),
+}
+
+COMPANY_JOBS = {"search": "CompanySearchJob", "owners": "SnippetOwnerJob"}
+
+
+def load_module(name):
+    """Imports a module by name, or a script file in this folder by file name."""
+    if not name.endswith(".py"):
+        return importlib.import_module(name)
+    path = name if os.path.isabs(name) else os.path.join(HERE, name)
+    if not os.path.exists(path):
+        path = os.path.abspath(name)
+    spec = importlib.util.spec_from_file_location(os.path.splitext(os.path.basename(path))[0].replace(" ", "_"), path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# --- companies ---
+def read_companies(source):
+    """
+    Company names and script settings from `source`: a company script (its
+    `companies` list plus csv_filename, CONCURRENCY, CHECKPOINT_PATH,
+    QUEUE_URL, EXTRA_OUTPUTS), or a text file with one name per line.
+    """
+    if source.endswith(".py"):
+        script = load_module(source)
+        names = ("csv_filename", "CONCURRENCY", "CHECKPOINT_PATH", "QUEUE_URL", "EXTRA_OUTPUTS")
+        settings = {name: getattr(script, name) for name in names if hasattr(script, name)}
+        return list(script.companies), settings
+    with open(source, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()], {}
+
+
+def run_companies(args):
+    import company_search
+    import scraper
+
+    if args.command == "replay":
+        checkpoint = scraper.Checkpoint(args.source)
+        checkpoint.close()
+        sink = None
+        rows = 0
+        for results in checkpoint.done.values():
+            for result in results:
+                if sink is None:
+                    sink = company_search.result_sink(args.output, result)
+                sink.write(result)
+                rows += 1
+        if sink is not None:
+            sink.close()
+        print(f"Replayed {len(checkpoint.done)} companies ({rows} rows) from {args.source} into {args.output}")
+        return
+
+    companies, settings = read_companies(args.source)
+    output = args.output or settings.get("csv_filename") or "companies.csv"
+    if args.no_checkpoint:
+        checkpoint = None
+    elif args.checkpoint or args.output:
+        checkpoint = args.checkpoint or output + ".checkpoint.jsonl"
+    else:
+        checkpoint = settings.get("CHECKPOINT_PATH", output + ".checkpoint.jsonl")
+    concurrency = args.concurrency or settings.get("CONCURRENCY") or 1
+    queue_url = args.queue or settings.get("QUEUE_URL")
+    also_write = args.also if args.also is not None else settings.get("EXTRA_OUTPUTS", [])
+    job_class = getattr(company_search, COMPANY_JOBS[args.command])
+    if args.command == "search":
+        job = job_class(companies, max_snippets=args.max_snippets, dedupe=not args.no_dedupe)
+    else:
+        job = job_class(companies)
+
+    if args.dry_run:
+        done = {}
+        if checkpoint and os.path.exists(checkpoint):
+            previous = scraper.Checkpoint(checkpoint)
+            previous.close()
+            done = previous.done
+        todo = [company for company in companies if job.key(company) not in done]
+        print(f"{job.name}: {len(companies)} companies, {len(companies) - len(todo)} already in "
+              f"{checkpoint}, {len(todo)} to query -> {output}")
+        for company in todo:
+            print(f"  {company_search.company_query(company)}")
+        missing = [name for name in job.required_keys if not os.getenv(name)]
+        if todo and missing:
+            print(f"Not set (needed for the live run): {', '.join(missing)}")
+        return
+
+    company_search.run_job(job, output, concurrency=concurrency, checkpoint=checkpoint, queue_url=queue_url,
+                           also_write=also_write)
+
+
+def add_company_parser(commands):
+    companies = commands.add_parser("companies", help="Company owner/executive lookups (Serper, spaCy, LLM)")
+    actions = companies.add_subparsers(dest="command", required=True)
+    for name, help_text in (("search", "Serper + spaCy + LLM executives and description"),
+                            ("owners", "Top Serper snippet and regex owner only")):
+        cmd = actions.add_parser(name, help=help_text)
+        cmd.add_argument("source", help="Company script (.py) or text file with one company per line")
+        cmd.add_argument("-o", "--output", help="CSV output (default: the script's csv_filename)")
+        cmd.add_argument("--also", action="append", metavar="PATH",
+                         help="Extra .xlsx/.jsonl output written in the same pass (repeatable)")
+        cmd.add_argument("--concurrency", type=int, help="Companies processed at once")
+        cmd.add_argument("--checkpoint", help="Checkpoint file (default: <output>.checkpoint.jsonl)")
+        cmd.add_argument("--no-checkpoint", action="store_true")
+        cmd.add_argument("--queue", help="Shared work queue URL (see work_queue.py)")
+        cmd.add_argument("--dry-run", action="store_true", help="List the queries without calling any API")
+        if name == "search":
+            cmd.add_argument("--max-snippets", type=int, default=3)
+            cmd.add_argument("--no-dedupe", action="store_true",
+                             help="Analyze every company's snippets even when another had the same text")
+    replay = actions.add_parser("replay", help="Write a checkpoint's results to a file without any API calls")
+    replay.add_argument("source", help="Checkpoint file (.checkpoint.jsonl)")
+    replay.add_argument("-o", "--output", required=True)
+    companies.set_defaults(handler=run_companies)
+
+
+def global_parser():
+    """Options that go before the command name and apply to every tool."""
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("-v", "--verbose", action="store_true", help="Debug logging")
+    profiling.add_arguments(parser)
+    return parser
+
+
+def split_global_args(argv):
+    """Splits argv into the global options before the command, and the rest."""
+    takes_value = {"--profile-dir", "--sample-interval", "--snapshot-interval"}
+    i = 0
+    while i < len(argv) and argv[i].startswith("-") and argv[i] not in ("-h", "--help"):
+        i += 2 if argv[i] in takes_value else 1
+    return argv[:i], argv[i:]
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Scraping tools: companies, appeals decisions, statutes.",
+                                     epilog="Run 'cli.py <command> --help' for a command's options.",
+                                     parents=[global_parser()])
+    commands = parser.add_subparsers(dest="tool", required=True, metavar="command")
+    add_company_parser(commands)
+    for name, (_, help_text) in DELEGATED.items():
+        commands.add_parser(name, help=help_text, add_help=False)
+    return parser
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    global_argv, argv = split_global_args(argv)
+    options = global_parser().parse_args(global_argv)
+    logging.basicConfig(level=logging.DEBUG if options.verbose else logging.INFO,
+                        format='%(asctime)s [%(levelname)s] %(message)s')
+    # Delegated tools parse their own options (including --help)
+    if argv and argv[0] in DELEGATED:
+        with profiling.profiled_from_args(argv[0], options):
+            return load_module(DELEGATED[argv[0]][0]).main(argv[1:])
+    args = build_parser().parse_args(global_argv + argv)
+    name = "-".join(filter(None, (args.tool, getattr(args, "command", None))))
+    with profiling.profiled_from_args(name, options):
+        return args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,628 @@
+import os
+import re
+import time
+import logging
+import json
+import hashlib
+import threading
+from concurrent.futures import Future
+from typing import List, Dict, Any
+
+import requests
+from requests.exceptions import RequestException
+
+import company_table
+import doc_cache
+import scraper
+import work_queue
+
+# ----------------------------
+# Company research: Serper search + executive extraction
+# ----------------------------
+# Shared by the company scripts ("Finance Scraping Wizard.py", "import os.py",
+# "import requests3.py"), which now only hold their company lists and output
+# settings and run one of the jobs below through scraper.Scheduler.
+#
+# API keys are read from the environment when a live call is first made, and
+# spaCy / openai are loaded on first use, so a script only needs what its job
+# actually calls.
+
+SERPER_URL = "https://google.serper.dev/search"
+
+# Rate limiting delay (in seconds).
+# Increase if you find you are hitting the API rate limit.
+API_DELAY_SECONDS = 1
+
+# Number of times to retry the API call on failure before giving up.
+MAX_RETRIES = 3
+
+# Exponential backoff factor. Wait time grows each retry attempt.
+BACKOFF_FACTOR = 2
+
+# Model used for the structured LLM extraction.
+LLM_MODEL = "gpt-4"
+
+# Circuit breakers for the two upstreams (see scraper.CircuitBreaker). After
+# BREAKER_FAILURES consecutive failures (an outage, an exhausted key) calls
+# fail at once and the affected companies are parked; a probe request every
+# BREAKER_RESET_SECONDS (doubling while it keeps failing) resumes the run
+# once the service is back.
+BREAKER_FAILURES = 5
+BREAKER_RESET_SECONDS = 30
+SERPER_BREAKER = scraper.CircuitBreaker("serper", BREAKER_FAILURES, BREAKER_RESET_SECONDS,
+                                        failure_exceptions=(RequestException,))
+OPENAI_BREAKER = scraper.CircuitBreaker("openai", BREAKER_FAILURES, BREAKER_RESET_SECONDS)
+
+# Define common executive titles to look for.
+# Add synonyms or new roles here as needed.
+titles_list = ["owner", "ceo", "cfo", "coo", "founder", "president"]
+
+# Folder of parsed snippets (see doc_cache.py). spaCy's NER runs once per
+# distinct snippet; after a change to titles_list or the Matcher patterns
+# only the matching is redone. None parses every snippet afresh.
+SPACY_DOC_CACHE = doc_cache.DEFAULT_CACHE_DIR
+
+
+def require_api_key(name: str) -> str:
+    """Returns the API key in environment variable `name`, or raises ValueError."""
+    key = os.getenv(name)
+    if not key:
+        logging.error(f"{name} is not set in the environment variables.")
+        raise ValueError(f"Must set {name} environment variable.")
+    return key
+
+
+# ----------------------------
+# SpaCy Initialization
+# ----------------------------
+# Ensure you have installed SpaCy and the model with:
+#   pip install spacy
+#   python -m spacy download en_core_web_sm
+_nlp = None
+_matcher = None
+_doc_cache = None
+_nlp_lock = threading.Lock()
+
+
+def get_nlp():
+    """Loads en_core_web_sm and the executive Matcher once, on first use."""
+    global _nlp, _matcher, _doc_cache
+    with _nlp_lock:
+        if _nlp is not None:
+            return _nlp, _matcher
+        import spacy
+        from spacy.matcher import Matcher
+        try:
+            nlp = spacy.load("en_core_web_sm")
+        except OSError:
+            logging.error(
+                "SpaCy model 'en_core_web_sm' not found. "
+                "Install it using: python -m spacy download en_core_web_sm"
+            )
+            raise
+
+        matcher = Matcher(nlp.vocab)
+        # Create patterns to match typical usage of Title + Name or Name + Title.
+        patterns = []
+        for title in titles_list:
+            # Pattern: <title> [optional punctuation] <PERSON>
+            patterns.append(
+                [{"LOWER": title}, {"IS_PUNCT": True, "OP": "?"}, {"ENT_TYPE": "PERSON"}]
+            )
+            # Pattern: <PERSON> [optional punctuation] <title>
+            patterns.append(
+                [{"ENT_TYPE": "PERSON"}, {"IS_PUNCT": True, "OP": "?"}, {"LOWER": title}]
+            )
+        matcher.add("EXECUTIVE", patterns)
+        if SPACY_DOC_CACHE:
+            _doc_cache = doc_cache.DocCache(SPACY_DOC_CACHE, nlp)
+        _nlp, _matcher = nlp, matcher
+        return _nlp, _matcher
+
+
+def parse_snippet(snippet: str):
+    """The spaCy Doc for `snippet`, from the Doc cache when there is one."""
+    nlp, _ = get_nlp()
+    return _doc_cache.get(snippet) if _doc_cache is not None else nlp(snippet)
+
+
+def save_doc_cache():
+    """Writes newly parsed snippets to SPACY_DOC_CACHE (a no-op if spaCy was never loaded)."""
+    if _doc_cache is not None:
+        _doc_cache.save()
+
+
+def extract_executives_spacy(snippet: str) -> str:
+    """
+    Uses SpaCy's matcher to extract executive names with associated titles
+    (over the cached Doc when the snippet was parsed before).
+    If no matches are found via the matcher, a fallback regex-based extraction is applied.
+
+    Returns a string with "Title: Name" pairs.
+    """
+    _, matcher = get_nlp()
+    doc = parse_snippet(snippet)
+    matches = matcher(doc)
+    extracted = set()
+    for match_id, start, end in matches:
+        span = doc[start:end]
+        tokens = span.text.split()
+        title_found = [token for token in tokens if token.lower() in titles_list]
+        if title_found:
+            title = title_found[0].capitalize()
+            # If a PERSON entity in the span is found, use that as the name.
+            found_person = False
+            for ent in doc.ents:
+                if ent.label_ == "PERSON" and ent.start >= start and ent.end <= end:
+                    extracted.add(f"{title}: {ent.text}")
+                    found_person = True
+            # If no PERSON entity was found in this span, try to extract a name pattern from the raw text.
+            if not found_person:
+                regex_pattern = rf"{title_found[0]}\s*(?:[:,-]\s*)?([A-Z][a-z]+(?:\s+[A-Z][a-z]+)+)"
+                regex_match = re.search(regex_pattern, span.text)
+                if regex_match:
+                    name = regex_match.group(1)
+                    extracted.add(f"{title}: {name}")
+    # Fallback regex over the whole snippet if no SpaCy matches were made.
+    if not extracted:
+        for title in titles_list:
+            fallback_pattern = rf"{title}\s*(?:[:,-]\s*)?([A-Z][a-z]+(?:\s+[A-Z][a-z]+)+)"
+            for regex_match in re.finditer(fallback_pattern, snippet, re.IGNORECASE):
+                extracted.add(f"{title.capitalize()}: {regex_match.group(1)}")
+    return "; ".join(sorted(extracted)) if extracted else "Not Found"
+
+
+# ----------------------------
+# LLM Extraction Function
+# ----------------------------
+def build_llm_prompt(snippet: str) -> str:
+    return f"""
+    You are an expert business analyst.
+    Given the following text harvested from online sources regarding a company,
+    extract the following fields in JSON format:
+
+      "owner": The name(s) of the owner(s) or the principal executive.
+      "company_description": A concise description of what the company does.
+      "other_executives": A list of any additional executive role and name pairs (e.g., "CEO: John Doe").
+
+    If a field cannot be determined, return null.
+
+    Text:
+    {snippet}
+
+    Provide only the JSON output.
+    """
+
+
+def llm_request(snippet: str) -> Dict[str, Any]:
+    """Chat completion parameters for `snippet` (shared with the batch mode in llm_batch.py)."""
+    return {
+        "model": LLM_MODEL,
+        "messages": [
+            {"role": "system", "content": "You extract structured business data from text."},
+            {"role": "user", "content": build_llm_prompt(snippet)}
+        ],
+        "temperature": 0.0,
+        "max_tokens": 250,
+    }
+
+
+def llm_completion(snippet: str):
+    """One chat completion request for `snippet`."""
+    import openai
+    openai.api_key = require_api_key("OPENAI_API_KEY")
+    return openai.ChatCompletion.create(**llm_request(snippet))
+
+
+def parse_llm_answer(answer_text: str) -> Dict[str, Any]:
+    """The JSON object in a model answer; raises ValueError if it isn't JSON."""
+    # Expect a JSON string in answer_text
+    return json.loads(answer_text.strip())
+
+
+def extract_info_with_llm(snippet: str) -> Dict[str, Any]:
+    """
+    Uses OpenAI's LLM to extract structured information.
+    Expects the snippet (combined text) and returns a dict with keys like:
+      - owner
+      - company_description
+      - other_executives (if any)
+
+    A failed request is retried MAX_RETRIES times with backoff, then
+    raises (scraper.CircuitOpenError at once while OPENAI_BREAKER is open),
+    so the scheduler parks the company during an outage or reports it as
+    failed, instead of saving it without LLM data. An answer that isn't
+    valid JSON gives {}.
+    """
+    for attempt in range(1, MAX_RETRIES + 1):
+        try:
+            response = OPENAI_BREAKER.call(llm_completion, snippet)
+            break
+        except scraper.CircuitOpenError:
+            raise
+        except Exception as e:
+            logging.warning(f"LLM request failed (attempt {attempt}/{MAX_RETRIES}): {e}")
+            if attempt == MAX_RETRIES:
+                raise
+            time.sleep(BACKOFF_FACTOR ** (attempt - 1))
+    try:
+        return parse_llm_answer(response.choices[0].message.content)
+    except (ValueError, AttributeError, IndexError, KeyError) as e:
+        logging.error(f"LLM extraction failed: {e}")
+        return {}
+
+
+# ----------------------------
+# Serper Helpers
+# ----------------------------
+def company_query(company: str) -> str:
+    # Use a query that might produce relevant ownership/executive info.
+    return f"{company} consulting owner description"
+
+
+def _serper_post(query: str, timeout: int) -> Dict[str, Any]:
+    headers = {"X-API-KEY": require_api_key("SERPER_API_KEY")}
+    resp = requests.post(SERPER_URL, json={"q": query}, headers=headers, timeout=timeout)
+    resp.raise_for_status()  # Raise an HTTPError for bad responses
+    return resp.json()
+
+
+def serper_search(query: str, timeout: int = 10) -> Dict[str, Any]:
+    """
+    One Serper API call; raises RequestException on failure, or
+    scraper.CircuitOpenError without calling while Serper is failing.
+    """
+    return SERPER_BREAKER.call(_serper_post, query, timeout)
+
+
+def extract_snippets(data: Dict[str, Any], max_snippets: int = 3) -> List[str]:
+    """
+    Extracts up to `max_snippets` snippet strings from the SERPer API response.
+
+    If the API response is not in the expected format or empty, returns ["Not Found"].
+    """
+    if "organic" not in data or not isinstance(data["organic"], list) or len(data["organic"]) == 0:
+        return ["Not Found"]
+
+    # Take the top N organic results. Adjust as needed.
+    results = data["organic"][:max_snippets]
+    snippets = []
+    for result in results:
+        snippet_text = result.get("snippet", "").strip()
+        if snippet_text:
+            snippets.append(snippet_text)
+        else:
+            snippets.append("Not Found")
+
+    return snippets
+
+
+def extract_snippet(data: dict) -> str:
+    """
+    Extracts the snippet from the API response.
+    """
+    if "organic" in data and isinstance(data["organic"], list) and len(data["organic"]) > 0:
+        return data["organic"][0].get("snippet", "Not Found")
+    return "Not Found"
+
+
+def extract_owner_from_snippet(snippet: str) -> str:
+    """
+    Extracts a potential owner name from the snippet using a regex.
+    The regex looks for patterns following the word 'owner' or 'owners'.
+    """
+    # This regex attempts to capture one or more capitalized words (as a potential name) that follow
+    # the word 'owner' or 'owners'. Adjust the pattern as needed.
+    pattern = r"(?:owner(?:s)?[:\-]?\s*)([A-Z][a-zA-Z]*(?:\s+[A-Z][a-zA-Z]*)+)"
+    match = re.search(pattern, snippet, re.IGNORECASE)
+    if match:
+        return match.group(1).strip()
+    return "Not Found"
+
+
+# ----------------------------
+# Per-company processing
+# ----------------------------
+def combine_snippets(snippet_list: List[str]) -> str:
+    # Combine all snippets into one large text for matching
+    return " | ".join(snippet_list)
+
+
+class LLMExtractionError(Exception):
+    """
+    The LLM request failed after its retries. `analysis` holds the rest of
+    the extraction (rule-based result, empty LLM_extraction); analyze_snippets()
+    adds the company's output row as `result`.
+    """
+
+    def __init__(self, analysis, error):
+        super().__init__(f"LLM request failed: {error}")
+        self.analysis = analysis
+        self.result = None
+
+
+def analyze_text(combined_snippets: str) -> Dict[str, Any]:
+    """
+    Rule-based and LLM extraction over combined snippet text, with the seconds
+    each took. Raises LLMExtractionError if only the LLM request failed.
+    """
+    # First, try rule-based extraction.
+    started = time.perf_counter()
+    executive_info = extract_executives_spacy(combined_snippets)
+    rule_based_seconds = time.perf_counter() - started
+    # Then, refine and enrich with LLM extraction.
+    started = time.perf_counter()
+    try:
+        llm_info = extract_info_with_llm(combined_snippets)
+    except scraper.CircuitOpenError:
+        raise
+    except Exception as e:
+        raise LLMExtractionError({
+            "Executive(s)_rule_based": executive_info,
+            "LLM_extraction": {},
+            "Timings": {"rule_based": round(rule_based_seconds, 3),
+                        "llm": round(time.perf_counter() - started, 3)}
+        }, e) from e
+    llm_seconds = time.perf_counter() - started
+    return {
+        "Executive(s)_rule_based": executive_info,
+        "LLM_extraction": llm_info,
+        "Timings": {"rule_based": round(rule_based_seconds, 3), "llm": round(llm_seconds, 3)}
+    }
+
+
+def snippet_key(combined_snippets: str) -> str:
+    """Hash of the combined snippets with case and whitespace normalized."""
+    normalized = " ".join(combined_snippets.split()).casefold()
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+
+class SnippetDeduper:
+    """
+    Runs analyze_text() once per distinct snippet text (see snippet_key) and
+    hands the result to every company whose search returned the same text:
+    directory boilerplate, one parent-firm page for several branches, or no
+    results at all. A company whose text is already being analyzed in another
+    worker waits for that result. Only complete analyses are shared: if the
+    analysis raises or the LLM returned nothing usable, nothing is kept and
+    each company with that text makes its own attempt.
+    """
+
+    def __init__(self):
+        self.analyzed = 0
+        self.shared = 0
+        self.seconds = 0.0
+        self._results = {}
+        self._lock = threading.Lock()
+
+    def analyze(self, combined_snippets: str):
+        """(analysis, shared): shared is True when the analysis was reused."""
+        key = snippet_key(combined_snippets)
+        while True:
+            with self._lock:
+                future = self._results.get(key)
+                if future is None:
+                    future = self._results[key] = Future()
+                    break
+            # Another worker is analyzing this text; None means it had nothing to share
+            analysis = future.result()
+            if analysis is not None:
+                with self._lock:
+                    self.shared += 1
+                return analysis, True
+        try:
+            analysis = analyze_text(combined_snippets)
+        except BaseException:
+            self._forget(key, future)
+            raise
+        if analysis["LLM_extraction"]:
+            future.set_result(analysis)
+        else:
+            self._forget(key, future)
+        with self._lock:
+            self.analyzed += 1
+            self.seconds += sum(analysis["Timings"].values())
+        return analysis, False
+
+    def _forget(self, key, future):
+        with self._lock:
+            del self._results[key]
+        future.set_result(None)
+
+    def summary(self):
+        companies = self.analyzed + self.shared
+        average = self.seconds / self.analyzed if self.analyzed else 0.0
+        return (f"{companies} companies, {self.analyzed} distinct snippet texts analyzed; "
+                f"{self.shared} reused results saved {self.shared} LLM calls (~{self.shared * average:.0f}s)")
+
+
+def analyze_snippets(company: str, snippet_list: List[str], deduper: SnippetDeduper = None) -> Dict[str, Any]:
+    """
+    Rule-based and LLM extraction over one company's snippets. With a
+    `deduper`, text seen before reuses the earlier extraction (its timings
+    are then 0 and "Deduplicated" is True). If only the LLM request failed,
+    the LLMExtractionError raised carries the row without LLM data, with
+    "LLM_error" set, as `result`.
+    """
+    combined_snippets = combine_snippets(snippet_list)
+    shared = False
+    llm_error = None
+    try:
+        if deduper is None:
+            analysis = analyze_text(combined_snippets)
+        else:
+            analysis, shared = deduper.analyze(combined_snippets)
+    except LLMExtractionError as e:
+        analysis, llm_error = e.analysis, e
+    result = {
+        "Company Name": company,
+        "Executive(s)_rule_based": analysis["Executive(s)_rule_based"],
+        "LLM_extraction": analysis["LLM_extraction"],
+        "LLM_error": str(llm_error.__cause__) if llm_error else None,
+        "Snippets": snippet_list,
+        "Timings": {"rule_based": 0.0, "llm": 0.0} if shared else dict(analysis["Timings"]),
+        "Deduplicated": shared
+    }
+    if llm_error:
+        llm_error.result = result
+        raise llm_error
+    return result
+
+
+def error_result(company: str) -> Dict[str, Any]:
+    return {
+        "Company Name": company,
+        "Executive(s)_rule_based": "Error",
+        "LLM_extraction": {},
+        "Snippets": ["Error fetching data"]
+    }
+
+
+# ----------------------------
+# Jobs for scraper.Scheduler
+# ----------------------------
+class CompanyJob(scraper.Job):
+    """Base for jobs over a list of company names."""
+
+    retry_exceptions = (RequestException,)
+    # Environment variables the live calls need
+    required_keys = ()
+
+    def __init__(self, companies: List[str]):
+        self.companies = companies
+
+    def items(self):
+        return self.companies
+
+    def start(self):
+        # Fail before the first request rather than once per company
+        for name in self.required_keys:
+            require_api_key(name)
+
+    def output_sink(self, path):
+        """Where results for `path` are written (any scraper.ExportSink format)."""
+        return scraper.ExportSink(path)
+
+    def close(self):
+        save_doc_cache()
+
+
+class CompanySearchJob(CompanyJob):
+    """Serper search, then spaCy + LLM extraction, for each company."""
+
+    name = "company-search"
+    required_keys = ("SERPER_API_KEY", "OPENAI_API_KEY")
+
+    def __init__(self, companies: List[str], max_snippets: int = 3, dedupe: bool = True):
+        super().__init__(companies)
+        self.max_snippets = max_snippets
+        # Companies with identical snippet text share one extraction
+        self.deduper = SnippetDeduper() if dedupe else None
+
+    def fetch(self, company):
+        started = time.perf_counter()
+        data = serper_search(company_query(company))
+        return data, time.perf_counter() - started
+
+    def extract(self, company, fetched):
+        data, search_seconds = fetched
+        try:
+            result = analyze_snippets(company, extract_snippets(data, max_snippets=self.max_snippets), self.deduper)
+        except LLMExtractionError as e:
+            e.result["Timings"]["search"] = round(search_seconds, 3)
+            raise
+        result["Timings"]["search"] = round(search_seconds, 3)
+        return result
+
+    def close(self):
+        super().close()
+        if self.deduper is not None and self.deduper.analyzed:
+            logging.info(f"{self.name} snippet dedup: {self.deduper.summary()}")
+
+    def breakers(self):
+        return (SERPER_BREAKER, OPENAI_BREAKER)
+
+    def output_sink(self, path):
+        # Flat typed columns instead of the nested result (see company_table.py)
+        return company_table.CompanyTableSink(path)
+
+    def on_error(self, company, error):
+        logging.error(f"Final failure processing {company}: {error}")
+        if isinstance(error, LLMExtractionError):
+            # The search worked; keep its snippets and rule-based result
+            return error.result
+        return error_result(company)
+
+
+class SnippetOwnerJob(CompanyJob):
+    """Top Serper snippet and a regex-extracted owner for each company (no NLP, no LLM)."""
+
+    name = "snippet-owner"
+    required_keys = ("SERPER_API_KEY",)
+
+    def fetch(self, company):
+        data = serper_search(company_query(company))
+        logging.info(f"Successfully retrieved data for {company}")
+        return data
+
+    def breakers(self):
+        return (SERPER_BREAKER,)
+
+    def extract(self, company, data):
+        snippet = extract_snippet(data)
+        return {
+            "Company Name": company,
+            "Owner(s)": extract_owner_from_snippet(snippet),
+            "Brief Description": snippet
+        }
+
+    def on_error(self, company, error):
+        logging.error(f"Error fetching data for {company}: {error}")
+        return self.extract(company, {})
+
+
+def result_sink(path: str, result: Dict[str, Any]) -> scraper.Sink:
+    """The sink for stored results shaped like `result` (checkpoints, batch rows)."""
+    return company_table.CompanyTableSink(path) if company_table.is_search_result(result) else scraper.ExportSink(path)
+
+
+def run_job(job: scraper.Job, csv_filename: str, concurrency: int = 1, checkpoint: str = None,
+            queue_url: str = None, also_write: List[str] = ()):
+    """
+    Runs a company job to CSV at the configured request rate.
+
+    With `queue_url` (see work_queue.py) the companies are drained from a
+    shared queue together with any other workers: this worker's rows go to
+    "<csv_filename>.<worker>.csv", and whichever worker sees the queue finish
+    writes everyone's results to `csv_filename`. The local checkpoint is not
+    used then; the queue keeps track of finished companies.
+
+    `also_write` lists extra outputs (.xlsx, .jsonl, .parquet) filled in the
+    same pass. Each output is written by job.output_sink(), so search results
+    come out as the flat company table (see company_table.py).
+    """
+    if queue_url is None:
+        sinks = [job.output_sink(path) for path in [csv_filename, *also_write]]
+        return scraper.Scheduler(job, sinks, concurrency=concurrency, rate_limit=1 / API_DELAY_SECONDS,
+                                 retries=MAX_RETRIES - 1, backoff=BACKOFF_FACTOR, checkpoint=checkpoint).run()
+
+    queue = work_queue.open_queue(queue_url, job.name)
+    try:
+        queued = work_queue.QueuedJob(job, queue)
+        queued.enqueue()
+        base, ext = os.path.splitext(csv_filename)
+        sinks = [job.output_sink(f"{base}.{queued.worker}{ext or '.csv'}")]
+        sinks += [job.output_sink(f"{root}.{queued.worker}{extension}")
+                  for root, extension in map(os.path.splitext, also_write)]
+        metrics = scraper.Scheduler(queued, sinks, concurrency=concurrency, rate_limit=1 / API_DELAY_SECONDS,
+                                    retries=MAX_RETRIES - 1, backoff=BACKOFF_FACTOR).run()
+        counts = queue.counts()
+        if not counts.get("pending") and not counts.get("leased"):
+            for path in [csv_filename, *also_write]:
+                rows = work_queue.export_results(queue, path, sink=job.output_sink(path))
+                logging.info(f"Queue {job.name} finished ({counts}); {rows} rows from all workers saved to {path}")
+        else:
+            logging.info(f"Queue {job.name} still has work in other workers: {counts}")
+        return metrics
+    finally:
+        queue.close()
@@ -0,0 +1,183 @@
+"""
+Flat, typed output for company search results.
+
+A search result as the job produces it (and the checkpoint stores it) nests
+the LLM answer in a dict and the snippets in a list. The table sink flattens
+each one into real columns:
+
+    company, status, extraction_tier, owner, description,
+    executives        [{"title", "name", "source"}, ...]
+    executive_count, snippets [...], snippet_count, deduplicated,
+    search_seconds, rule_based_seconds, llm_seconds
+
+and writes the executive pairs exploded, one row each, to a second file
+next to it ("<output>.executives<ext>": company, title, name, source).
+
+In Parquet the list columns are real lists and structs, and the small
+vocabularies (status and tier; title and source in the executives table)
+are dictionary-encoded, so the tables can be filtered with
+pandas/pyarrow/DuckDB without any parsing. In CSV the list columns are JSON.
+
+extraction_tier says where the data came from: "llm" when the model
+returned anything, "rule_based" when only the spaCy/regex pass found
+executives, "none" otherwise. status is "error" when the search itself
+failed and "llm_error" when only the LLM request did (the snippets and
+rule-based executives are still there). deduplicated marks rows whose
+extraction was reused from another company with the same snippet text.
+"""
+import logging
+import os
+import re
+
+import exporters
+import scraper
+
+COLUMNS = ["company", "status", "extraction_tier", "owner", "description", "executives", "executive_count",
+           "snippets", "snippet_count", "deduplicated", "search_seconds", "rule_based_seconds", "llm_seconds"]
+EXECUTIVE_COLUMNS = ["company", "title", "name", "source"]
+
+# "Title: Name" pairs, as the rule-based pass and the LLM prompt write them
+PAIR_RE = re.compile(r"^\s*([^:]{1,60}?)\s*:\s*(.+?)\s*$")
+
+
+def is_search_result(result):
+    """True for a CompanySearchJob result (as opposed to e.g. a snippet-owner row)."""
+    return "LLM_extraction" in result
+
+
+def _text(value):
+    """A plain string from an LLM field that may be null, a string or a list."""
+    if value is None:
+        return None
+    if isinstance(value, (list, tuple)):
+        return "; ".join(str(item) for item in value if item) or None
+    return str(value).strip() or None
+
+
+def _pairs(values, source):
+    """(title, name, source) for "Title: Name" strings or {"role"/"title", "name"} dicts."""
+    if values is None:
+        return []
+    if isinstance(values, (str, dict)):
+        values = values.split(";") if isinstance(values, str) else [values]
+    pairs = []
+    for value in values:
+        if isinstance(value, dict):
+            title = value.get("title") or value.get("role")
+            name = value.get("name")
+        else:
+            match = PAIR_RE.match(str(value))
+            title, name = match.groups() if match else (None, str(value).strip())
+        if name:
+            pairs.append({"title": title.strip() if title else None, "name": str(name).strip(), "source": source})
+    return pairs
+
+
+def flatten(result):
+    """One table row from a search result."""
+    llm = result.get("LLM_extraction") or {}
+    if not isinstance(llm, dict):
+        llm = {}
+    rule_based = result.get("Executive(s)_rule_based")
+    error = rule_based == "Error"
+    executives = []
+    if not error and rule_based and rule_based != "Not Found":
+        executives += _pairs(rule_based, "rule_based")
+    executives += _pairs(llm.get("other_executives"), "llm")
+    owner = _text(llm.get("owner"))
+    description = _text(llm.get("company_description"))
+    if owner or description or any(pair["source"] == "llm" for pair in executives):
+        tier = "llm"
+    elif executives:
+        tier = "rule_based"
+    else:
+        tier = "none"
+    snippets = [] if error else list(result.get("Snippets") or [])
+    timings = result.get("Timings") or {}
+    return {
+        "company": result.get("Company Name"),
+        "status": "error" if error else ("llm_error" if result.get("LLM_error") else "ok"),
+        "extraction_tier": tier,
+        "owner": owner,
+        "description": description,
+        "executives": executives,
+        "executive_count": len(executives),
+        "snippets": snippets,
+        "snippet_count": len(snippets),
+        "deduplicated": bool(result.get("Deduplicated")),
+        "search_seconds": timings.get("search"),
+        "rule_based_seconds": timings.get("rule_based"),
+        "llm_seconds": timings.get("llm"),
+    }
+
+
+# --- Parquet schemas ---
+def arrow_schema():
+    import pyarrow as pa
+    label = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema([
+        ("company", pa.string()),
+        ("status", label),
+        ("extraction_tier", label),
+        ("owner", pa.string()),
+        ("description", pa.string()),
+        ("executives", pa.list_(pa.struct([("title", pa.string()), ("name", pa.string()),
+                                           ("source", pa.string())]))),
+        ("executive_count", pa.int16()),
+        ("snippets", pa.list_(pa.string())),
+        ("snippet_count", pa.int16()),
+        ("deduplicated", pa.bool_()),
+        ("search_seconds", pa.float32()),
+        ("rule_based_seconds", pa.float32()),
+        ("llm_seconds", pa.float32()),
+    ])
+
+
+def executives_arrow_schema():
+    import pyarrow as pa
+    label = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema([("company", pa.string()), ("title", label), ("name", pa.string()), ("source", label)])
+
+
+def executives_path(path):
+    base, extension = os.path.splitext(path)
+    return f"{base}.executives{extension}"
+
+
+def _exporter(path, fieldnames, schema):
+    if path.lower().endswith(".parquet"):
+        return exporters.exporter_for(path, fieldnames, schema=schema())
+    return exporters.exporter_for(path, fieldnames)
+
+
+class CompanyTableSink(scraper.Sink):
+    """
+    Writes flattened search results to `path` and the exploded executive
+    pairs next to it. Any .csv/.xlsx/.jsonl/.parquet path; a .parquet or
+    .xlsx output is skipped with a warning if pyarrow / openpyxl is missing.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        try:
+            self._companies = _exporter(path, COLUMNS, arrow_schema)
+            self._executives = _exporter(executives_path(path), EXECUTIVE_COLUMNS, executives_arrow_schema)
+            self.enabled = True
+        except ImportError as e:
+            logging.warning(f"{path} not written: {e}")
+            self.enabled = False
+
+    def write(self, result):
+        if not self.enabled:
+            return
+        row = flatten(result)
+        self._companies.write(row)
+        for pair in row["executives"]:
+            self._executives.write({"company": row["company"], **pair})
+
+    def close(self):
+        if self.enabled:
+            self._companies.close()
+            self._executives.close()
+            logging.info(f"{self._companies.rows} companies saved to {self.path}, "
+                         f"{self._executives.rows} executives to {executives_path(self.path)}")
@@ -0,0 +1,227 @@
+"""
+Structured fields from the text of appeals decisions.
+
+Runs a small set of precompiled regex rules over each document extracted by
+pdf_extractor.py and pulls out what the listing table doesn't show: docket
+numbers, the hearing date, K.S.A. citations, the outcome and the judge. The
+rows are joined to appeals_data.csv through the PdfStore manifest (PDF
+SHA-256 -> URL) and written as a typed Parquet table in batches, so the whole
+corpus can be filtered with pandas/pyarrow/DuckDB without opening a PDF:
+
+    python decision_fields.py --text decision_text --store "G:/My Drive/LexiMentis scraped data" \\
+        --csv appeals_data.csv --out decision_fields.parquet --statute-db kansas_statutes.db
+
+Cited sections are normalized to the statute index's section numbers
+("44-508"), and with --statute-db each one is linked to its scraped URL.
+"""
+import argparse
+import csv
+import os
+import re
+import sqlite3
+from datetime import datetime
+
+import pdf_extractor
+from pdf_store import clean_file_name
+
+DEFAULT_OUTPUT = "decision_fields.parquet"
+BATCH_SIZE = 1000
+
+# --- Rules (compiled once, applied to every document) ---
+MONTHS = r"(?:January|February|March|April|May|June|July|August|September|October|November|December)"
+DATE = rf"({MONTHS}\s+\d{{1,2}},\s*\d{{4}}|\d{{1,2}}/\d{{1,2}}/\d{{4}})"
+
+DOCKET_RE = re.compile(
+    r"Docket\s+(?:Nos?\.?|Numbers?)\s*:?\s*"
+    r"((?:[A-Z]{2}-\d{2}-\d{4}-\d{3,4}|\d{1,3}(?:,\d{3})+)(?:\s*(?:,|&|and)\s*(?:[A-Z]{2}-\d{2}-\d{4}-\d{3,4}|\d{1,3}(?:,\d{3})+))*)",
+    re.IGNORECASE)
+DOCKET_NUMBER_RE = re.compile(r"[A-Z]{2}-\d{2}-\d{4}-\d{3,4}|\d{1,3}(?:,\d{3})+", re.IGNORECASE)
+HEARING_DATE_RE = re.compile(
+    rf"(?:oral argument|hearing|argued|heard)\b[^.]{{0,80}}?\b(?:on|held)\s+{DATE}", re.IGNORECASE)
+STATUTE_RE = re.compile(
+    r"K\.\s?S\.\s?A\.\s*(?:\d{4}\s+Supp\.\s*)?(44-\d+[a-z]?(?:,\d+[a-z]?)?)", re.IGNORECASE)
+JUDGE_RE = re.compile(
+    r"(?:Administrative Law Judge|\bALJ)\)?\s+(?:\(ALJ\)\s+)?"
+    r"((?:Hon\.\s+)?[A-Z][a-z]+(?:\s+[A-Z]\.)?(?:\s+[A-Z][A-Za-z'\-]+){1,2})")
+# Outcomes, checked in the closing order first (the last ORDER/WHEREFORE heading).
+ORDER_SECTION_RE = re.compile(r"\b(?:ORDER|WHEREFORE|DECISION)\b")
+OUTCOME_RULES = [
+    ("affirmed", re.compile(r"\baffirm(?:ed|s)\b", re.IGNORECASE)),
+    ("reversed", re.compile(r"\brevers(?:ed|es)\b", re.IGNORECASE)),
+    ("modified", re.compile(r"\bmodif(?:ied|ies)\b", re.IGNORECASE)),
+    ("remanded", re.compile(r"\bremand(?:ed|s)\b", re.IGNORECASE)),
+    ("dismissed", re.compile(r"\bdismiss(?:ed|es)\b", re.IGNORECASE)),
+    ("vacated", re.compile(r"\b(?:vacat(?:ed|es)|set aside)\b", re.IGNORECASE)),
+]
+# Only the end of the decision is searched when it has no order heading.
+OUTCOME_TAIL_CHARS = 4000
+
+
+def parse_date(value):
+    value = " ".join(value.replace(",", ", ").split())
+    for date_format in ("%B %d, %Y", "%m/%d/%Y"):
+        try:
+            return datetime.strptime(value, date_format).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _unique(values):
+    return list(dict.fromkeys(values))
+
+
+def extract_outcome(text):
+    sections = list(ORDER_SECTION_RE.finditer(text))
+    tail = text[sections[-1].start():] if sections else text[-OUTCOME_TAIL_CHARS:]
+    found = [label for label, pattern in OUTCOME_RULES if pattern.search(tail)]
+    return "; ".join(found) or None
+
+
+def extract_fields(text):
+    """Applies every rule to one decision's text."""
+    dockets = []
+    for match in DOCKET_RE.finditer(text):
+        dockets.extend(number.upper() for number in DOCKET_NUMBER_RE.findall(match.group(1)))
+    hearing = HEARING_DATE_RE.search(text)
+    judge = JUDGE_RE.search(text)
+    return {
+        "docket_numbers": _unique(dockets),
+        "hearing_date": parse_date(hearing.group(1)) if hearing else None,
+        "statutes": _unique(section.lower() for section in STATUTE_RE.findall(text)),
+        "outcome": extract_outcome(text),
+        "judge": judge.group(1).replace("Hon. ", "") if judge else None,
+    }
+
+
+# --- Joining to the appeals table ---
+def read_manifest(store_root):
+    """sha256 -> list of (url, appeals_number, file_name) from the PdfStore manifest."""
+    by_sha = {}
+    path = os.path.join(store_root or "", "manifest.sqlite")
+    if not store_root or not os.path.exists(path):
+        return by_sha
+    conn = sqlite3.connect(path)
+    for url, appeals_number, file_name, sha256 in conn.execute(
+            "SELECT url, appeals_number, file_name, sha256 FROM pdfs ORDER BY url"):
+        by_sha.setdefault(sha256, []).append((url, appeals_number, file_name))
+    conn.close()
+    return by_sha
+
+
+def read_appeals_table(csv_path):
+    """(rows by PDF URL, rows by cleaned file name) from appeals_data.csv."""
+    by_url, by_name = {}, {}
+    if csv_path and os.path.exists(csv_path):
+        with open(csv_path, newline="", encoding="utf-8") as csvfile:
+            for row in csv.DictReader(csvfile):
+                by_url[row["PDF URL"]] = row
+                by_name[clean_file_name(row["File Name"])] = row
+    return by_url, by_name
+
+
+def statute_urls(statute_db):
+    """section number -> URL from the statute index, if one is given."""
+    if not statute_db or not os.path.exists(statute_db):
+        return {}
+    conn = sqlite3.connect(statute_db)
+    urls = {number: url for number, url in conn.execute(
+        "SELECT section_number, url FROM sections WHERE section_number IS NOT NULL")}
+    conn.close()
+    return urls
+
+
+def iter_decision_rows(text_dir, store_root=None, csv_path=None, statute_db=None):
+    """
+    Yields one row per (document, PDF URL): the appeals table columns plus
+    the extracted fields. Documents not in the manifest are matched to the
+    table by file name.
+    """
+    manifest = read_manifest(store_root)
+    by_url, by_name = read_appeals_table(csv_path)
+    sections = statute_urls(statute_db)
+    for metadata, path in pdf_extractor.iter_documents(text_dir):
+        text = "\f".join(page_text for _, page_text in pdf_extractor.iter_pages(path))
+        fields = extract_fields(text)
+        fields["statute_urls"] = [sections[number] for number in fields["statutes"] if number in sections]
+        links = manifest.get(metadata["sha256"])
+        if not links:
+            row = by_name.get(metadata["source"], {})
+            links = [(row.get("PDF URL"), row.get("Appeals Number"), row.get("File Name"))]
+        for url, appeals_number, file_name in links:
+            row = by_url.get(url, {})
+            yield dict(fields, **{
+                "sha256": metadata["sha256"],
+                "appeals_number": row.get("Appeals Number") or appeals_number,
+                "pdf_url": url,
+                "file_name": row.get("File Name") or file_name,
+                "order_date": parse_date(row.get("Order Date", "")),
+                "issue": row.get("Issue"),
+                "holding": row.get("Holding"),
+                "pages": metadata["pages"],
+            })
+
+
+# --- Parquet output ---
+def arrow_schema():
+    import pyarrow as pa
+    return pa.schema([
+        ("appeals_number", pa.string()),
+        ("pdf_url", pa.string()),
+        ("file_name", pa.string()),
+        ("sha256", pa.string()),
+        ("order_date", pa.date32()),
+        ("hearing_date", pa.date32()),
+        ("docket_numbers", pa.list_(pa.string())),
+        ("statutes", pa.list_(pa.string())),
+        ("statute_urls", pa.list_(pa.string())),
+        ("outcome", pa.dictionary(pa.int32(), pa.string())),
+        ("judge", pa.dictionary(pa.int32(), pa.string())),
+        ("issue", pa.string()),
+        ("holding", pa.string()),
+        ("pages", pa.int32()),
+    ])
+
+
+def write_parquet(rows, path=DEFAULT_OUTPUT, batch_size=BATCH_SIZE):
+    """Writes `rows` to Parquet BATCH_SIZE rows at a time. Returns the row count."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = arrow_schema()
+    count = 0
+    batch = []
+    with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+        def flush():
+            columns = {field.name: [row[field.name] for row in batch] for field in schema}
+            writer.write_batch(pa.RecordBatch.from_pydict(columns, schema=schema))
+            batch.clear()
+
+        for row in rows:
+            batch.append(row)
+            count += 1
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+    return count
+
+
+# --- Command line interface ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract structured fields from decision text into Parquet.")
+    parser.add_argument("--text", default=pdf_extractor.DEFAULT_OUTPUT_DIR,
+                        help="Output folder of pdf_extractor.py (default: %(default)s)")
+    parser.add_argument("--store", help="PdfStore root, to map PDF hashes to URLs")
+    parser.add_argument("--csv", default="appeals_data.csv", help="Appeals table to join (default: %(default)s)")
+    parser.add_argument("--statute-db", help="Statute index (statute_index.py) to link cited sections")
+    parser.add_argument("--out", default=DEFAULT_OUTPUT, help="Parquet output (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    rows = iter_decision_rows(args.text, args.store, args.csv, args.statute_db)
+    count = write_parquet(rows, args.out)
+    print(f"Wrote {count} decision rows to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+"""
+BM25 search over the text of appeals decisions, from a compact on-disk index.
+
+`build` reads the documents written by pdf_extractor.py and writes an index
+folder:
+
+    meta.json      document count, average length, BM25 parameters
+    terms.bin      concatenated UTF-8 terms, sorted
+    lexicon.bin    one fixed-size entry per term: term offset/length, document
+                   frequency, postings offset/length (binary-searchable)
+    postings.bin   per term: (doc id delta, term frequency) pairs as varints
+    norms.bin      document lengths (uint32 per doc)
+    docs.jsonl     per document: appeals number, PDF URL, Issue, Holding, ...
+    docs.idx       byte offset of each docs.jsonl line (uint64 per doc)
+
+At query time every file is memory-mapped, so only the pages of the terms and
+documents a query touches are read; nothing is loaded up front.
+
+    python decision_search.py build --text decision_text --store "G:/My Drive/LexiMentis scraped data"
+    python decision_search.py search "temporary total disability" -n 10
+
+    with DecisionIndex("decision_index") as index:
+        for hit in index.search("going and coming rule"):
+            print(hit["score"], hit["Appeals Number"], hit["Holding"])
+"""
+import argparse
+import heapq
+import json
+import math
+import mmap
+import os
+import re
+import struct
+
+import pdf_extractor
+from decision_fields import read_appeals_table, read_manifest
+
+DEFAULT_INDEX_DIR = "decision_index"
+INDEX_VERSION = 1
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# term offset, term length, document frequency, postings offset, postings length
+LEXICON_ENTRY = struct.Struct("<QIIQI")
+
+# Words and statute numbers such as "44-508" or "44-510e"
+TOKEN_RE = re.compile(r"\d+-\d+[a-z]?|[a-z0-9]+(?:'[a-z]+)?")
+STOPWORDS = frozenset("""
+a an and are as at be been but by for from had has have he her his in is it its of on or that the
+their there these they this to was were which will with
+""".split())
+
+
+def tokenize(text):
+    return [token for token in TOKEN_RE.findall(text.lower()) if token not in STOPWORDS]
+
+
+# --- Varints ---
+def encode_varint(value, out):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def decode_postings(data):
+    """Yields (doc_id, term_frequency) from a delta/varint-encoded postings list."""
+    doc_id = 0
+    value = shift = 0
+    numbers = []
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        numbers.append(value)
+        value = shift = 0
+        if len(numbers) == 2:
+            doc_id += numbers[0]
+            yield doc_id, numbers[1]
+            numbers.clear()
+
+
+# --- Building ---
+def build_index(text_dir, index_dir=DEFAULT_INDEX_DIR, store_root=None, csv_path=None):
+    """
+    Indexes every extracted document under `text_dir`. Postings are kept
+    varint-encoded while building, so memory stays close to the final index size.
+    Returns the number of documents indexed.
+    """
+    manifest = read_manifest(store_root)
+    by_url, by_name = read_appeals_table(csv_path)
+    os.makedirs(index_dir, exist_ok=True)
+
+    postings = {}   # term -> bytearray of (delta, tf) varints
+    last_doc = {}   # term -> last doc id added, for delta encoding
+    doc_freq = {}
+    lengths = []
+    with open(os.path.join(index_dir, "docs.jsonl"), "wb") as docs_file, \
+            open(os.path.join(index_dir, "docs.idx"), "wb") as docs_idx:
+        for metadata, path in pdf_extractor.iter_documents(text_dir):
+            doc_id = len(lengths)
+            counts = {}
+            length = 0
+            for _, page_text in pdf_extractor.iter_pages(path):
+                for token in tokenize(page_text):
+                    counts[token] = counts.get(token, 0) + 1
+                    length += 1
+            for term, tf in counts.items():
+                encoded = postings.setdefault(term, bytearray())
+                encode_varint(doc_id - last_doc.get(term, 0), encoded)
+                encode_varint(tf, encoded)
+                last_doc[term] = doc_id
+                doc_freq[term] = doc_freq.get(term, 0) + 1
+            lengths.append(length)
+
+            links = manifest.get(metadata["sha256"])
+            url, appeals_number, file_name = links[0] if links else (None, None, None)
+            row = by_url.get(url) or by_name.get(metadata["source"], {})
+            doc = {
+                "sha256": metadata["sha256"],
+                "Appeals Number": row.get("Appeals Number") or appeals_number,
+                "File Name": row.get("File Name") or file_name,
+                "Order Date": row.get("Order Date"),
+                "Issue": row.get("Issue"),
+                "Holding": row.get("Holding"),
+                "PDF URL": row.get("PDF URL") or url,
+            }
+            docs_idx.write(struct.pack("<Q", docs_file.tell()))
+            docs_file.write(json.dumps(doc, ensure_ascii=False).encode("utf-8") + b"\n")
+
+    with open(os.path.join(index_dir, "terms.bin"), "wb") as terms_file, \
+            open(os.path.join(index_dir, "lexicon.bin"), "wb") as lexicon_file, \
+            open(os.path.join(index_dir, "postings.bin"), "wb") as postings_file:
+        for term in sorted(postings):
+            term_bytes = term.encode("utf-8")
+            data = postings[term]
+            lexicon_file.write(LEXICON_ENTRY.pack(terms_file.tell(), len(term_bytes), doc_freq[term],
+                                                  postings_file.tell(), len(data)))
+            terms_file.write(term_bytes)
+            postings_file.write(data)
+    with open(os.path.join(index_dir, "norms.bin"), "wb") as norms_file:
+        norms_file.write(struct.pack(f"<{len(lengths)}I", *lengths))
+
+    meta = {"version": INDEX_VERSION, "documents": len(lengths), "terms": len(postings),
+            "average_length": sum(lengths) / len(lengths) if lengths else 0.0, "k1": K1, "b": B}
+    with open(os.path.join(index_dir, "meta.json"), "w", encoding="utf-8") as meta_file:
+        json.dump(meta, meta_file, indent=1)
+    return len(lengths)
+
+
+# --- Searching ---
+def _map(path):
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class DecisionIndex:
+    """A built index, memory-mapped for querying."""
+
+    def __init__(self, index_dir=DEFAULT_INDEX_DIR):
+        with open(os.path.join(index_dir, "meta.json"), "r", encoding="utf-8") as meta_file:
+            self.meta = json.load(meta_file)
+        if self.meta.get("version") != INDEX_VERSION:
+            raise ValueError(f"{index_dir} was built by a different index version; rebuild it.")
+        self._maps = {name: _map(os.path.join(index_dir, name)) for name in
+                      ("terms.bin", "lexicon.bin", "postings.bin", "norms.bin", "docs.jsonl", "docs.idx")}
+        self.documents = self.meta["documents"]
+        self.term_count = self.meta["terms"]
+
+    def _term_at(self, n):
+        term_offset, term_length = LEXICON_ENTRY.unpack_from(self._maps["lexicon.bin"], n * LEXICON_ENTRY.size)[:2]
+        return self._maps["terms.bin"][term_offset:term_offset + term_length].decode("utf-8")
+
+    def lookup(self, term):
+        """(document frequency, postings bytes) for `term`, or None. Binary search over the lexicon."""
+        low, high = 0, self.term_count - 1
+        while low <= high:
+            middle = (low + high) // 2
+            found = self._term_at(middle)
+            if found == term:
+                _, _, df, offset, length = LEXICON_ENTRY.unpack_from(self._maps["lexicon.bin"],
+                                                                     middle * LEXICON_ENTRY.size)
+                return df, self._maps["postings.bin"][offset:offset + length]
+            if found < term:
+                low = middle + 1
+            else:
+                high = middle - 1
+        return None
+
+    def document(self, doc_id):
+        offset = struct.unpack_from("<Q", self._maps["docs.idx"], doc_id * 8)[0]
+        docs = self._maps["docs.jsonl"]
+        return json.loads(docs[offset:docs.find(b"\n", offset)])
+
+    def search(self, query, limit=10):
+        """Top `limit` decisions for `query` by BM25, best first, with their table fields."""
+        k1, b = self.meta["k1"], self.meta["b"]
+        average_length = self.meta["average_length"] or 1.0
+        norms = self._maps["norms.bin"]
+        scores = {}
+        for term in set(tokenize(query)):
+            entry = self.lookup(term)
+            if entry is None:
+                continue
+            df, data = entry
+            idf = math.log(1 + (self.documents - df + 0.5) / (df + 0.5))
+            for doc_id, tf in decode_postings(data):
+                length = struct.unpack_from("<I", norms, doc_id * 4)[0]
+                weight = tf * (k1 + 1) / (tf + k1 * (1 - b + b * length / average_length))
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * weight
+        hits = []
+        for doc_id, score in heapq.nlargest(limit, scores.items(), key=lambda item: item[1]):
+            hit = self.document(doc_id)
+            hit["score"] = round(score, 4)
+            hits.append(hit)
+        return hits
+
+    def close(self):
+        for mapped in self._maps.values():
+            if isinstance(mapped, mmap.mmap):
+                mapped.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# --- Command line interface ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="BM25 search over appeals decision text.")
+    parser.add_argument("--index", default=DEFAULT_INDEX_DIR, help="Index folder (default: %(default)s)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build_cmd = commands.add_parser("build", help="Build the index from pdf_extractor.py output")
+    build_cmd.add_argument("--text", default=pdf_extractor.DEFAULT_OUTPUT_DIR,
+                           help="Output folder of pdf_extractor.py (default: %(default)s)")
+    build_cmd.add_argument("--store", help="PdfStore root, to map PDF hashes to URLs")
+    build_cmd.add_argument("--csv", default="appeals_data.csv",
+                           help="Appeals table for Issue/Holding (default: %(default)s)")
+
+    search_cmd = commands.add_parser("search", help="Ranked decisions for a query")
+    search_cmd.add_argument("query", nargs="+")
+    search_cmd.add_argument("-n", "--limit", type=int, default=10)
+    search_cmd.add_argument("--json", action="store_true", help="Print hits as JSON")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        count = build_index(args.text, args.index, args.store, args.csv)
+        print(f"Indexed {count} decisions into {args.index}")
+        return
+
+    with DecisionIndex(args.index) as index:
+        hits = index.search(" ".join(args.query), args.limit)
+    if args.json:
+        print(json.dumps(hits, indent=1, ensure_ascii=False))
+        return
+    if not hits:
+        print("No matching decisions.")
+    for rank, hit in enumerate(hits, 1):
+        print(f"{rank}. [{hit['score']}] {hit['Appeals Number'] or hit['sha256']}  {hit['Order Date'] or ''}  "
+              f"{hit['File Name'] or ''}")
+        if hit["Issue"]:
+            print(f"   Issue: {hit['Issue']}")
+        if hit["Holding"]:
+            print(f"   Holding: {hit['Holding']}")
+        if hit["PDF URL"]:
+            print(f"   {hit['PDF URL']}")
+
+
+if __name__ == "__main__":
+    main()
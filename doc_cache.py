@@ -0,0 +1,246 @@
+"""
+Persistent cache of spaCy-parsed snippets, so the named-entity pass runs
+once per distinct snippet text.
+
+company_search.extract_executives_spacy() takes its Docs from here: adding a
+title to titles_list or changing the Matcher patterns only re-runs the
+matching and the regex fallback, not the model. Docs are stored with spaCy's
+DocBin, keyed by the SHA-1 of the snippet text, under a folder per model
+(name and version), so upgrading en_core_web_sm starts a fresh cache:
+
+    spacy_doc_cache/en_core_web_sm-3.7.1/00.spacy ... ff.spacy
+                                         00.delta ... ff.delta
+
+New Docs are appended to the shard's .delta file (length-prefixed DocBins),
+so a save writes only what is new; save() at the end of a run folds the
+deltas into the .spacy files.
+
+Re-run the rule-based extraction over stored results (checkpoint files,
+llm_batch rows.jsonl, JSONL exports) after editing the rules:
+
+    python doc_cache.py rerun companies.csv.checkpoint.jsonl -o companies_rerun.csv
+    python doc_cache.py stats
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import struct
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger("doc_cache")
+
+DEFAULT_CACHE_DIR = "spacy_doc_cache"
+# New Docs held in memory before they are appended to the shard deltas.
+SAVE_EVERY = 500
+# Shards whose Docs are kept in memory at once (least recently used go first).
+MAX_LOADED_SHARDS = 16
+# Length prefix of each DocBin appended to a .delta file
+FRAME = struct.Struct(">I")
+# doc.user_data key holding the snippet hash
+KEY = "snippet_sha1"
+
+
+def text_key(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def model_tag(nlp):
+    """Folder name for a pipeline's Docs: its package name and version."""
+    return f"{nlp.meta['lang']}_{nlp.meta['name']}-{nlp.meta['version']}"
+
+
+class DocCache:
+    """
+    Snippet text -> parsed Doc, backed by 256 DocBin shards (by the first byte
+    of the hash). A shard is read on first use and its keys remembered, so a
+    text that isn't cached is known to be new without reading the shard
+    again; at most MAX_LOADED_SHARDS shards keep their Docs in memory. New
+    Docs are appended to the shard deltas every `save_every` parses and on
+    save(). Safe to share between threads.
+    """
+
+    def __init__(self, folder, nlp, save_every=SAVE_EVERY, max_loaded=MAX_LOADED_SHARDS):
+        self.folder = os.path.join(folder, model_tag(nlp))
+        self.nlp = nlp
+        self.save_every = save_every
+        self.max_loaded = max_loaded
+        self.hits = 0
+        self.parsed = 0
+        self._keys = {}  # shard -> keys on disk, for shards read once
+        self._loaded = OrderedDict()  # shard -> {key: Doc}, least recently used first
+        self._pending = {}  # shard -> {key: Doc} not written yet
+        self._unsaved = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.folder, exist_ok=True)
+
+    def _path(self, shard):
+        return os.path.join(self.folder, f"{shard}.spacy")
+
+    def _delta_path(self, shard):
+        return os.path.join(self.folder, f"{shard}.delta")
+
+    def _read_docs(self, shard):
+        """{key: Doc} stored for `shard`: the .spacy file, then each DocBin in its delta."""
+        from spacy.tokens import DocBin
+
+        blobs = []
+        if os.path.exists(self._path(shard)):
+            with open(self._path(shard), "rb") as f:
+                blobs.append(f.read())
+        if os.path.exists(self._delta_path(shard)):
+            with open(self._delta_path(shard), "rb") as f:
+                while True:
+                    prefix = f.read(FRAME.size)
+                    if len(prefix) < FRAME.size:
+                        break
+                    blob = f.read(FRAME.unpack(prefix)[0])
+                    if len(blob) < FRAME.unpack(prefix)[0]:
+                        break  # cut short by an interrupted save
+                    blobs.append(blob)
+        docs = {}
+        for blob in blobs:
+            for doc in DocBin(store_user_data=True).from_bytes(blob).get_docs(self.nlp.vocab):
+                docs[doc.user_data[KEY]] = doc
+        return docs
+
+    def _lookup(self, key):
+        # Called with the lock held
+        shard = key[:2]
+        doc = self._pending.get(shard, {}).get(key)
+        if doc is not None or (shard in self._keys and key not in self._keys[shard]):
+            return doc
+        docs = self._loaded.get(shard)
+        if docs is None:
+            docs = self._loaded[shard] = self._read_docs(shard)
+            self._keys[shard] = set(docs)
+            while len(self._loaded) > self.max_loaded:
+                self._loaded.popitem(last=False)
+        else:
+            self._loaded.move_to_end(shard)
+        return docs.get(key)
+
+    def get(self, text):
+        """The parsed Doc for `text`, running the pipeline only if it isn't cached."""
+        key = text_key(text)
+        with self._lock:
+            doc = self._lookup(key)
+            if doc is not None:
+                self.hits += 1
+                return doc
+        doc = self.nlp(text)
+        doc.user_data[KEY] = key
+        with self._lock:
+            self._pending.setdefault(key[:2], {})[key] = doc
+            self.parsed += 1
+            self._unsaved += 1
+            if self._unsaved >= self.save_every:
+                self._flush()
+        return doc
+
+    def _flush(self):
+        """Appends the pending Docs to their shard deltas."""
+        from spacy.tokens import DocBin
+
+        for shard, docs in sorted(self._pending.items()):
+            data = DocBin(store_user_data=True, docs=docs.values()).to_bytes()
+            with open(self._delta_path(shard), "ab") as f:
+                f.write(FRAME.pack(len(data)) + data)
+            if shard in self._keys:
+                self._keys[shard].update(docs)
+            if shard in self._loaded:
+                self._loaded[shard].update(docs)
+        self._pending.clear()
+        self._unsaved = 0
+
+    def _compact(self, shard):
+        """Rewrites `shard` as one .spacy file and drops its delta."""
+        from spacy.tokens import DocBin
+
+        docs = self._read_docs(shard)
+        part = self._path(shard) + ".part"
+        with open(part, "wb") as f:
+            f.write(DocBin(store_user_data=True, docs=docs.values()).to_bytes())
+        os.replace(part, self._path(shard))
+        os.remove(self._delta_path(shard))
+
+    def save(self):
+        with self._lock:
+            self._flush()
+            for name in sorted(os.listdir(self.folder)):
+                if name.endswith(".delta"):
+                    self._compact(name[:-len(".delta")])
+        logger.info(f"spaCy Doc cache {self.folder}: {self.hits} cached, {self.parsed} parsed")
+
+
+# --- Command line interface ---
+def read_results(path):
+    """Result rows from a JSONL file of rows or of checkpoint entries ({"key", "results"})."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # a line cut short by an interrupted run
+            yield from entry["results"] if "results" in entry else [entry]
+
+
+def rerun(paths, output):
+    """Recomputes Executive(s)_rule_based for stored rows with the current rules."""
+    import company_search
+
+    out = None
+    rows = changed = 0
+    try:
+        for path in paths:
+            for row in read_results(path):
+                if "Snippets" in row and row.get("Executive(s)_rule_based") != "Error":
+                    before = row.get("Executive(s)_rule_based")
+                    row["Executive(s)_rule_based"] = company_search.extract_executives_spacy(
+                        company_search.combine_snippets(row["Snippets"]))
+                    changed += row["Executive(s)_rule_based"] != before
+                if out is None:
+                    out = company_search.result_sink(output, row)
+                out.write(row)
+                rows += 1
+    finally:
+        if out is not None:
+            out.close()
+        company_search.save_doc_cache()
+    print(f"{rows} rows written to {output}, {changed} with different executives")
+
+
+def stats(folder):
+    if not os.path.isdir(folder):
+        print(f"No cache at {folder}")
+        return
+    for tag in sorted(os.listdir(folder)):
+        shards = [os.path.join(folder, tag, name) for name in os.listdir(os.path.join(folder, tag))
+                  if name.endswith((".spacy", ".delta"))]
+        size = sum(os.path.getsize(path) for path in shards)
+        print(f"{tag}: {len(shards)} files, {size / 1e6:.1f} MB")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cached spaCy Docs for the company executive extraction.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    rerun_cmd = commands.add_parser("rerun", help="Re-run the rule-based extraction over stored results")
+    rerun_cmd.add_argument("inputs", nargs="+", help="Checkpoint or rows JSONL files")
+    rerun_cmd.add_argument("-o", "--output", required=True, help="Output .csv/.xlsx/.jsonl/.parquet")
+    stats_cmd = commands.add_parser("stats", help="Cache size per model")
+    stats_cmd.add_argument("--cache", default=DEFAULT_CACHE_DIR)
+    args = parser.parse_args(argv)
+
+    if args.command == "rerun":
+        rerun(args.inputs, args.output)
+    else:
+        stats(args.cache)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
+    main()
@@ -0,0 +1,204 @@
+"""
+Streaming table exporters: rows go to disk as they arrive, so memory stays
+flat however many records a run produces.
+
+    with exporters.open_exporters(["out.csv", "out.xlsx", "out.jsonl"], FIELDNAMES) as out:
+        for record in records:
+            out.write(record)        # every format, same pass
+
+CSV and JSONL rows are flushed as they are written. XLSX uses openpyxl's
+write-only workbook, which streams rows to a temporary file instead of
+building cell objects; the .xlsx itself is assembled when the exporter is
+closed (that is how the format works). Parquet (pyarrow) is written in row
+groups of BATCH_SIZE rows, typed by a given schema or inferred from the
+first batch.
+
+Lists and dicts go into CSV and XLSX cells as JSON, so they can be read back.
+"""
+import csv
+import json
+import os
+
+# Longest text an Excel cell can hold.
+XLSX_CELL_LIMIT = 32767
+# Rows per Parquet row group.
+BATCH_SIZE = 1000
+
+
+def _text(value):
+    if value is None:
+        return ""
+    if isinstance(value, (list, tuple, dict)):
+        return json.dumps(value, ensure_ascii=False, default=str)
+    # Matches what csv.writer does with other non-string values
+    return value if isinstance(value, (str, int, float)) else str(value)
+
+
+class CsvExporter:
+    def __init__(self, path, fieldnames, flush_every=100):
+        self.path = path
+        self.fieldnames = list(fieldnames)
+        self.flush_every = flush_every
+        self.rows = 0
+        self._file = open(path, "w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(self.fieldnames)
+
+    def write(self, row):
+        self._writer.writerow([_text(row.get(name)) for name in self.fieldnames])
+        self.rows += 1
+        if self.rows % self.flush_every == 0:
+            self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class JsonlExporter:
+    def __init__(self, path, fieldnames=None, mode="w"):
+        self.path = path
+        self.fieldnames = list(fieldnames) if fieldnames else None
+        self.rows = 0
+        self._file = open(path, mode, encoding="utf-8")
+
+    def write(self, row):
+        if self.fieldnames:
+            row = {name: row.get(name) for name in self.fieldnames}
+        self._file.write(json.dumps(row, ensure_ascii=False, default=str) + "\n")
+        self.rows += 1
+
+    def close(self):
+        self._file.close()
+
+
+class XlsxExporter:
+    """Write-only (constant memory) .xlsx with one header row. Needs openpyxl."""
+
+    def __init__(self, path, fieldnames, sheet_name="Sheet1"):
+        from openpyxl import Workbook
+        from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+
+        self.path = path
+        self.fieldnames = list(fieldnames)
+        self.rows = 0
+        self._illegal = ILLEGAL_CHARACTERS_RE
+        self._workbook = Workbook(write_only=True)
+        self._sheet = self._workbook.create_sheet(sheet_name)
+        self._sheet.append(self.fieldnames)
+
+    def _cell(self, value):
+        value = _text(value)
+        if isinstance(value, str):
+            # Control characters make openpyxl refuse the row; long text is cut to the cell limit.
+            value = self._illegal.sub("", value)[:XLSX_CELL_LIMIT]
+        return value
+
+    def write(self, row):
+        self._sheet.append([self._cell(row.get(name)) for name in self.fieldnames])
+        self.rows += 1
+
+    def close(self):
+        self._workbook.save(self.path)
+
+
+class ParquetExporter:
+    """
+    Parquet in zstd-compressed row groups of `batch_size` rows. Needs pyarrow.
+    `schema` (a pyarrow.Schema) fixes the column types; without one they are
+    inferred from the first batch.
+    """
+
+    def __init__(self, path, fieldnames, schema=None, batch_size=BATCH_SIZE):
+        import pyarrow  # noqa: F401  (fail here, not at the first flush)
+
+        self.path = path
+        self.fieldnames = list(fieldnames)
+        self.schema = schema
+        self.batch_size = batch_size
+        self.rows = 0
+        self._batch = []
+        self._writer = None
+
+    def _flush(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        columns = {name: [row.get(name) for row in self._batch] for name in self.fieldnames}
+        batch = pa.RecordBatch.from_pydict(columns, schema=self.schema)
+        if self._writer is None:
+            self.schema = batch.schema
+            self._writer = pq.ParquetWriter(self.path, self.schema, compression="zstd")
+        self._writer.write_batch(batch)
+        self._batch.clear()
+
+    def write(self, row):
+        self._batch.append(row)
+        self.rows += 1
+        if len(self._batch) >= self.batch_size:
+            self._flush()
+
+    def close(self):
+        if self._batch or self._writer is None:
+            self._flush()
+        self._writer.close()
+
+
+EXPORTERS = {".csv": CsvExporter, ".xlsx": XlsxExporter, ".jsonl": JsonlExporter, ".parquet": ParquetExporter}
+
+
+def exporter_for(path, fieldnames, schema=None):
+    """
+    The exporter for `path`'s extension (.csv, .xlsx, .jsonl or .parquet).
+    `schema` types a Parquet file (see ParquetExporter); other formats ignore it.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in EXPORTERS:
+        raise ValueError(f"Don't know how to export {path}; use one of {', '.join(EXPORTERS)}")
+    if extension == ".parquet":
+        return ParquetExporter(path, fieldnames, schema)
+    return EXPORTERS[extension](path, fieldnames)
+
+
+class MultiExporter:
+    """Writes each row to several exporters in one pass."""
+
+    def __init__(self, exporters):
+        self.exporters = list(exporters)
+        self.rows = 0
+
+    def write(self, row):
+        for exporter in self.exporters:
+            exporter.write(row)
+        self.rows += 1
+
+    def close(self):
+        for exporter in self.exporters:
+            exporter.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_exporters(paths, fieldnames):
+    return MultiExporter(exporter_for(path, fieldnames) for path in paths)
+
+
+def read_rows(path):
+    """Streams the rows of a CSV or XLSX file written by these exporters (or pandas) as dicts of strings."""
+    if path.lower().endswith(".xlsx"):
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(path, read_only=True)
+        try:
+            rows = workbook.worksheets[0].iter_rows(values_only=True)
+            header = [str(name) for name in next(rows, ())]
+            for values in rows:
+                yield {name: "" if value is None else str(value) for name, value in zip(header, values)}
+        finally:
+            workbook.close()
+        return
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        yield from csv.DictReader(f)
@@ -1,7 +1,13 @@
+import argparse
 import requests
 from bs4 import BeautifulSoup
 import json
 import csv
+import statute_index
+import response_archive
+import statute_versions
+import scraper
+import work_queue
 
 # Base URL for Kansas Legislature Statutes
 BASE_URL = "https://www.ksrevisor.org"
@@ -9,16 +15,46 @@ BASE_URL = "https://www.ksrevisor.org"
 # URL for Chapter 44 (Workers' Compensation)
 CHAPTER_44_URL = f"{BASE_URL}/statutes/chapters/ch44/"
 
+# Full-text index updated as sections are scraped (see statute_index.py).
+# Set to None to skip indexing.
+INDEX_DB = statute_index.DEFAULT_DB
+
+# Append-only archive of raw responses (see response_archive.py), used by
+# --reparse to rebuild outputs without refetching. Set to None to disable.
+ARCHIVE_PATH = "kansas_statutes.warc.gz"
+
+# Version store recording each scrape as a run (see statute_versions.py), so
+# changed sections can be listed with: python statute_versions.py report
+# Set to None to disable.
+VERSIONS_DB = statute_versions.DEFAULT_DB
+
+# Section pages fetched at once, and the overall cap on requests per second
+# (see scraper.py).
+SCRAPE_WORKERS = 4
+REQUESTS_PER_SECOND = 4
+
+# Shared work queue (see work_queue.py) so several machines can split the
+# section pages, e.g. "sqlite:///Z:/scraping/statutes.db" or
+# "redis://localhost:6379/0". The worker that sees the queue finish writes the
+# outputs for every section. None scrapes everything on this machine.
+QUEUE_URL = None
+
 # Headers to mimic a real browser request
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
 }
 
-# Function to get all section links from Chapter 44 page
-def get_section_links():
-    response = requests.get(CHAPTER_44_URL, headers=HEADERS)
-    soup = BeautifulSoup(response.text, "html.parser")
-    
+# Function to fetch a page, archiving the raw response when an archive is open
+def fetch_page(url, archive=None):
+    response = requests.get(url, headers=HEADERS)
+    if archive is not None:
+        archive.write_response(response, url=url)
+    return response.text
+
+# Function to parse section links out of the chapter page HTML
+def parse_section_links(html):
+    soup = BeautifulSoup(html, "html.parser")
+
     section_links = []
     for link in soup.select("a[href^='/statutes/chapters/view/']"):  # Find section links
         section_url = BASE_URL + link['href']
@@ -27,32 +63,25 @@ def get_section_links():
 
     return section_links
 
-# Function to extract statute text from each section
-def extract_statute_text(section_url):
-    response = requests.get(section_url, headers=HEADERS)
-    soup = BeautifulSoup(response.text, "html.parser")
+# Function to parse the statute text out of a section page's HTML
+def parse_statute_text(html):
+    soup = BeautifulSoup(html, "html.parser")
 
     # Extract the statute text
     statute_text = " ".join([p.text.strip() for p in soup.select("p")])
 
     return statute_text
 
-# Scrape all sections and save in JSON, CSV, and TXT
-def scrape_chapter_44():
-    sections = get_section_links()
-    data = []
-
-    for section_title, section_url in sections:
-        print(f"Scraping: {section_title} -> {section_url}")
-        statute_text = extract_statute_text(section_url)
+# Function to get all section links from Chapter 44 page
+def get_section_links(archive=None):
+    return parse_section_links(fetch_page(CHAPTER_44_URL, archive))
 
-        # Store data
-        data.append({
-            "Section": section_title,
-            "URL": section_url,
-            "Text": statute_text
-        })
+# Function to extract statute text from each section
+def extract_statute_text(section_url, archive=None):
+    return parse_statute_text(fetch_page(section_url, archive))
 
+# Save scraped sections as JSON, CSV, and TXT
+def save_outputs(data):
     # Save as JSON
     with open("kansas_ch44.json", "w", encoding="utf-8") as json_file:
         json.dump(data, json_file, indent=4)
@@ -72,7 +101,141 @@ def scrape_chapter_44():
             txt_file.write(f"Text:\n{entry['Text']}\n")
             txt_file.write("="*80 + "\n\n")
 
+# Chapter 44 as a scraper.py job: one work item per section link
+class Chapter44Job(scraper.Job):
+    name = "chapter-44"
+
+    def __init__(self, archive=None):
+        self.archive = archive
+
+    def items(self):
+        return get_section_links(self.archive)
+
+    def key(self, item):
+        return item[1]
+
+    def fetch(self, item):
+        section_title, section_url = item
+        print(f"Scraping: {section_title} -> {section_url}")
+        response = requests.get(section_url, headers=HEADERS, timeout=30)
+        response.raise_for_status()
+        if self.archive is not None:
+            self.archive.write_response(response, url=section_url)
+        return response.text
+
+    def extract(self, item, html):
+        section_title, section_url = item
+        return {
+            "Section": section_title,
+            "URL": section_url,
+            "Text": parse_statute_text(html)
+        }
+
+# Scrape all sections and save in JSON, CSV, and TXT
+def scrape_chapter_44():
+    archive = response_archive.ResponseArchive(ARCHIVE_PATH) if ARCHIVE_PATH else None
+    index_conn = statute_index.open_index(INDEX_DB) if INDEX_DB else None
+
+    collected = scraper.ListSink()
+    sinks = [collected]
+    if index_conn is not None:
+        # Keep the search index current one section at a time
+        sinks.append(scraper.CallbackSink(lambda entry: statute_index.index_section(
+            index_conn, entry["Section"], entry["URL"], entry["Text"])))
+    job = Chapter44Job(archive)
+    queue = work_queue.open_queue(QUEUE_URL, job.name) if QUEUE_URL else None
+    if queue is not None:
+        job = work_queue.QueuedJob(job, queue)
+        job.enqueue()
+    metrics = scraper.Scheduler(job, sinks, concurrency=SCRAPE_WORKERS, rate_limit=REQUESTS_PER_SECOND).run()
+    data = collected.results
+    # Sections that still failed after their retries are missing from `data`
+    failed = metrics.counts["failed"]
+
+    if queue is not None:
+        counts = queue.counts()
+        if counts.get("pending") or counts.get("leased"):
+            print(f"Other workers are still scraping ({counts}); they will write the outputs.")
+            data = None
+        else:
+            # Every worker's sections, in chapter order
+            data = [entry for _, results in queue.results() for entry in results]
+            failed = counts.get("failed", 0)
+            if index_conn is not None:
+                for entry in data:
+                    statute_index.index_section(index_conn, entry["Section"], entry["URL"], entry["Text"],
+                                                commit=False)
+                index_conn.commit()
+        queue.close()
+    if data is None:
+        if archive is not None:
+            archive.close()
+        if index_conn is not None:
+            index_conn.close()
+        return
+
+    save_outputs(data)
+
+    if VERSIONS_DB and failed:
+        # A section that couldn't be fetched would be recorded as removed
+        print(f"{failed} sections failed to download; not recording this run in {VERSIONS_DB}. "
+              f"Re-run the scrape to update the version history.")
+    elif VERSIONS_DB:
+        versions_conn = statute_versions.open_store(VERSIONS_DB)
+        run_id, changes = statute_versions.record_scrape(versions_conn, data)
+        versions_conn.close()
+        counts = {kind: sum(1 for c in changes if c["kind"] == kind) for kind in ("added", "removed", "modified")}
+        print(f"Run {run_id}: {counts['added']} added, {counts['removed']} removed, "
+              f"{counts['modified']} modified sections (see statute_versions.py report)")
+
+    if archive is not None:
+        archive.close()
+        print(f"Raw responses archived to: {ARCHIVE_PATH}")
+
+    if index_conn is not None:
+        index_conn.close()
+        print(f"Search index updated: {INDEX_DB}")
+
     print("Scraping complete! Data saved as JSON, CSV, and TXT.")
 
-# Run the scraper
-scrape_chapter_44()
+# Re-run the extractors over a previous run's archive instead of the live site
+def reparse_archive(archive_path):
+    pages = response_archive.latest_by_url(archive_path)
+    if CHAPTER_44_URL not in pages:
+        raise ValueError(f"Chapter page {CHAPTER_44_URL} is not in archive {archive_path}")
+
+    data = []
+    index_conn = statute_index.open_index(INDEX_DB) if INDEX_DB else None
+    for section_title, section_url in parse_section_links(pages[CHAPTER_44_URL].text):
+        record = pages.get(section_url)
+        if record is None:
+            print(f"Not in archive, skipping: {section_title} -> {section_url}")
+            continue
+        statute_text = parse_statute_text(record.text)
+        if index_conn is not None:
+            statute_index.index_section(index_conn, section_title, section_url, statute_text, commit=False)
+        data.append({
+            "Section": section_title,
+            "URL": section_url,
+            "Text": statute_text
+        })
+
+    save_outputs(data)
+    if index_conn is not None:
+        index_conn.commit()
+        index_conn.close()
+    print(f"Re-parse complete! {len(data)} sections rebuilt from {archive_path}.")
+
+# Run the scraper (or re-parse an archive: python "import requests.py" --reparse kansas_statutes.warc.gz)
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scrape Kansas statutes, Chapter 44.")
+    parser.add_argument("--reparse", metavar="ARCHIVE",
+                        help="Rebuild outputs from an archive of raw responses without fetching")
+    args = parser.parse_args(argv)
+    if args.reparse:
+        reparse_archive(args.reparse)
+    else:
+        scrape_chapter_44()
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,18 @@
-import os
-import re
-import time
 import logging
-import requests
-import pandas as pd
+
+import company_search
 
 # ----------------------------
 # Configuration & Setup
 # ----------------------------
+# Serper lookup of each company's top snippet and owner, run through the job
+# framework in scraper.py (helpers in company_search.py).
 
 # Set up logging for better monitoring
 logging.basicConfig(level=logging.INFO,
                     format='%(asctime)s [%(levelname)s] %(message)s')
 
-# Get the Serper API key from an environment variable for security
-SERPER_API_KEY = os.getenv("SERPER_API_KEY")
-if not SERPER_API_KEY:
-    logging.error("SERPER_API_KEY is not set in the environment variables.")
-    exit(1)
+csv_filename = "consulting_companies.csv"
 
 # List of companies
 companies = [
@@ -154,79 +149,12 @@ companies = [
     "WHATSAMATHER CONSULTING INC"
 ]
 
-# ----------------------------
-# Helper Functions
-# ----------------------------
-
-def fetch_company_data(company: str) -> dict:
-    """
-    Query the Serper API for a given company and return the JSON response.
-    Returns an empty dictionary on error.
-    """
-    query = f"{company} consulting owner description"
-    payload = {"q": query}
-    headers = {"X-API-KEY": SERPER_API_KEY}
-
-    try:
-        response = requests.post("https://google.serper.dev/search", json=payload, headers=headers)
-        response.raise_for_status()  # Raise error for bad responses (e.g., 4xx or 5xx)
-        data = response.json()
-        logging.info(f"Successfully retrieved data for {company}")
-        return data
-    except requests.RequestException as e:
-        logging.error(f"Error fetching data for {company}: {e}")
-        return {}
-
-def extract_snippet(data: dict) -> str:
-    """
-    Extracts the snippet from the API response.
-    """
-    if "organic" in data and isinstance(data["organic"], list) and len(data["organic"]) > 0:
-        return data["organic"][0].get("snippet", "Not Found")
-    return "Not Found"
-
-def extract_owner_from_snippet(snippet: str) -> str:
-    """
-    Extracts a potential owner name from the snippet using a regex.
-    The regex looks for patterns following the word 'owner' or 'owners'.
-    """
-    # This regex attempts to capture one or more capitalized words (as a potential name) that follow
-    # the word 'owner' or 'owners'. Adjust the pattern as needed.
-    pattern = r"(?:owner(?:s)?[:\-]?\s*)([A-Z][a-zA-Z]*(?:\s+[A-Z][a-zA-Z]*)+)"
-    match = re.search(pattern, snippet, re.IGNORECASE)
-    if match:
-        return match.group(1).strip()
-    return "Not Found"
-
 # ----------------------------
 # Main Processing Loop
 # ----------------------------
 
-results = []
+def main():
+    company_search.run_job(company_search.SnippetOwnerJob(companies), csv_filename)
 
-for company in companies:
-    # Fetch data from the API
-    data = fetch_company_data(company)
-    
-    # Extract snippet and owner information
-    snippet = extract_snippet(data)
-    owner = extract_owner_from_snippet(snippet)
-    
-    # Append result to the list
-    results.append({
-        "Company Name": company,
-        "Owner(s)": owner,
-        "Brief Description": snippet
-    })
-    
-    # Respect the API rate limits
-    time.sleep(1)
-
-# ----------------------------
-# Save Results to CSV
-# ----------------------------
-
-df = pd.DataFrame(results)
-csv_filename = "consulting_companies.csv"
-df.to_csv(csv_filename, index=False)
-logging.info(f"CSV file saved as {csv_filename}")
+if __name__ == "__main__":
+    main()
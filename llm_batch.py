@@ -0,0 +1,254 @@
+"""
+Two-phase OpenAI Batch API mode for the company LLM extraction.
+
+Phase one ("prepare") gets each company's snippets (live from Serper through
+the job framework, or from a local JSONL file) and writes:
+
+    <out>/rows.jsonl               the output rows so far: company, rule-based
+                                   executives, snippets and the request's custom_id
+    <out>/requests-001.jsonl ...   Batch API input, one chat completion request
+                                   per distinct snippet text (at most 50,000 per file)
+
+Upload the request files as Batch API jobs (endpoint /v1/chat/completions).
+When they finish, phase two ("ingest") merges the downloaded output and error
+files into the rows by custom_id and writes the same company table as a
+live run (see company_table.py):
+
+    python llm_batch.py prepare "Finance Scraping Wizard.py" --out batch/
+    python llm_batch.py prepare --snippets snippets.jsonl --out batch/     # no Serper calls
+    python llm_batch.py ingest batch/ batch_output.jsonl batch_errors.jsonl -o companies.csv
+
+custom_ids are hashes of the normalized snippet text (as in the live run's
+snippet dedup), so companies with identical snippets share one request, and
+re-preparing gives the same ids: results from an earlier batch still match
+wherever the text hasn't changed.
+"""
+import argparse
+import glob
+import hashlib
+import json
+import logging
+import os
+
+import company_search
+import company_table
+import scraper
+
+# Batch API limit on requests per input file.
+MAX_REQUESTS_PER_FILE = 50000
+BATCH_ENDPOINT = "/v1/chat/completions"
+ROWS_FILE = "rows.jsonl"
+
+
+def custom_id(company):
+    """Stable id for a company's error row, which gets no request."""
+    normalized = " ".join(company.split()).upper()
+    return "company-" + hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:16]
+
+
+def request_id(combined_snippets):
+    """Stable request id for a snippet text (the Batch API needs ids unique within a file)."""
+    return "snippets-" + company_search.snippet_key(combined_snippets)[:16]
+
+
+def batch_request(row):
+    return {"custom_id": row["custom_id"], "method": "POST", "url": BATCH_ENDPOINT,
+            "body": company_search.llm_request(company_search.combine_snippets(row["Snippets"]))}
+
+
+def prepared_row(company, snippets):
+    """Output row with everything but the LLM fields, which the batch fills in."""
+    combined = company_search.combine_snippets(snippets)
+    return {
+        "custom_id": request_id(combined),
+        "Company Name": company,
+        "Executive(s)_rule_based": company_search.extract_executives_spacy(combined),
+        "Snippets": snippets,
+    }
+
+
+# --- Phase one ---
+class BatchRequestSink(scraper.Sink):
+    """Writes one Batch API request per new custom_id, starting a new file every `per_file` requests."""
+
+    def __init__(self, out_dir, per_file=MAX_REQUESTS_PER_FILE):
+        self.out_dir = out_dir
+        self.per_file = per_file
+        self.paths = []
+        self.requests = 0
+        self.rows = 0
+        self._seen = set()
+        self._file = None
+
+    def write(self, row):
+        self.rows += 1
+        if row["custom_id"] in self._seen or row["Executive(s)_rule_based"] == "Error":
+            return  # text already requested (every row with it gets the one result), or no snippets to send
+        self._seen.add(row["custom_id"])
+        if self.requests % self.per_file == 0:
+            if self._file is not None:
+                self._file.close()
+            self.paths.append(os.path.join(self.out_dir, f"requests-{len(self.paths) + 1:03d}.jsonl"))
+            self._file = open(self.paths[-1], "w", encoding="utf-8")
+        self._file.write(json.dumps(batch_request(row), ensure_ascii=False) + "\n")
+        self.requests += 1
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+
+class BatchPrepareJob(company_search.CompanyJob):
+    """Serper snippets and rule-based extraction per company; the LLM step is left to the batch."""
+
+    name = "llm-batch-prepare"
+    required_keys = ("SERPER_API_KEY",)
+
+    def __init__(self, companies, max_snippets=3):
+        super().__init__(companies)
+        self.max_snippets = max_snippets
+
+    def fetch(self, company):
+        return company_search.serper_search(company_search.company_query(company))
+
+    def extract(self, company, data):
+        return prepared_row(company, company_search.extract_snippets(data, max_snippets=self.max_snippets))
+
+    def breakers(self):
+        return (company_search.SERPER_BREAKER,)
+
+    def on_error(self, company, error):
+        logging.error(f"Final failure fetching data for {company}: {error}")
+        row = company_search.error_result(company)
+        row["custom_id"] = custom_id(company)
+        return row
+
+
+def read_snippets(path):
+    """(company, snippets) from a JSONL file of {"Company Name", "Snippets"} objects (e.g. an earlier rows.jsonl)."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                yield entry["Company Name"], entry["Snippets"]
+
+
+def prepare(out_dir, companies=None, snippets_path=None, concurrency=1, checkpoint=None,
+            per_file=MAX_REQUESTS_PER_FILE):
+    """Phase one. Returns the request file paths."""
+    os.makedirs(out_dir, exist_ok=True)
+    for old in glob.glob(os.path.join(out_dir, "requests-*.jsonl")):
+        os.remove(old)
+    requests_sink = BatchRequestSink(out_dir, per_file)
+    sinks = [scraper.JsonlSink(os.path.join(out_dir, ROWS_FILE)), requests_sink]
+    if snippets_path:
+        for company, snippets in read_snippets(snippets_path):
+            row = prepared_row(company, snippets)
+            for sink in sinks:
+                sink.write(row)
+        for sink in sinks:
+            sink.close()
+        company_search.save_doc_cache()
+    else:
+        job = BatchPrepareJob(companies)
+        scraper.Scheduler(job, sinks, concurrency=concurrency, rate_limit=1 / company_search.API_DELAY_SECONDS,
+                          retries=company_search.MAX_RETRIES - 1, backoff=company_search.BACKOFF_FACTOR,
+                          checkpoint=checkpoint).run()
+    logging.info(f"{requests_sink.requests} batch requests for {requests_sink.rows} companies written to "
+                 f"{', '.join(requests_sink.paths) or '(none)'}")
+    return requests_sink.paths
+
+
+# --- Phase two ---
+def read_batch_results(paths):
+    """
+    custom_id -> LLM_extraction dict from Batch API output/error files, and
+    the set of custom_ids whose request failed or returned unusable JSON.
+    """
+    extractions = {}
+    failed = set()
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                response = entry.get("response") or {}
+                try:
+                    if entry.get("error") or response.get("status_code") != 200:
+                        raise ValueError(entry.get("error") or f"status {response.get('status_code')}")
+                    answer = response["body"]["choices"][0]["message"]["content"]
+                    extractions[entry["custom_id"]] = company_search.parse_llm_answer(answer)
+                except (KeyError, IndexError, TypeError, ValueError) as e:
+                    failed.add(entry.get("custom_id"))
+                    logging.error(f"Batch result {entry.get('custom_id')} unusable: {e}")
+    return extractions, failed - set(extractions)
+
+
+def ingest(out_dir, result_paths, output_paths):
+    """
+    Phase two: merges batch results into the prepared rows (failed or missing
+    requests get an empty LLM_extraction, as a failed live call does).
+    Returns the row counts {"rows", "merged", "failed", "missing"}.
+    """
+    extractions, failed = read_batch_results(result_paths)
+    counts = {"rows": 0, "merged": 0, "failed": 0, "missing": 0}
+    seen = set()
+    sinks = [company_table.CompanyTableSink(path) for path in output_paths]
+    with open(os.path.join(out_dir, ROWS_FILE), "r", encoding="utf-8") as rows_file:
+        for line in rows_file:
+            row = json.loads(line)
+            if row["custom_id"] in extractions:
+                counts["merged"] += 1
+            elif row["custom_id"] in failed:
+                counts["failed"] += 1
+            elif row["Executive(s)_rule_based"] != "Error":
+                counts["missing"] += 1
+                logging.warning(f"No batch result for {row['Company Name']} ({row['custom_id']})")
+            row["LLM_extraction"] = extractions.get(row["custom_id"], {})
+            row["Deduplicated"] = row["custom_id"] in seen
+            seen.add(row["custom_id"])
+            for sink in sinks:
+                sink.write(row)
+            counts["rows"] += 1
+    for sink in sinks:
+        sink.close()
+    logging.info(f"{counts['rows']} rows written to {', '.join(output_paths)}: {counts['merged']} merged, "
+                 f"{counts['failed']} failed requests, {counts['missing']} without a result")
+    return counts
+
+
+# --- Command line interface ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="OpenAI Batch API mode for the company LLM extraction.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    prepare_cmd = commands.add_parser("prepare", help="Phase one: rows + Batch API request files")
+    prepare_cmd.add_argument("source", nargs="?", help="Company script (.py) or text file, searched live on Serper")
+    prepare_cmd.add_argument("--snippets", help="JSONL of {\"Company Name\", \"Snippets\"} to use instead of Serper")
+    prepare_cmd.add_argument("--out", default="llm_batch", help="Batch folder (default: %(default)s)")
+    prepare_cmd.add_argument("--concurrency", type=int, default=1)
+    prepare_cmd.add_argument("--checkpoint", help="Checkpoint for the Serper phase")
+
+    ingest_cmd = commands.add_parser("ingest", help="Phase two: merge batch results into the output rows")
+    ingest_cmd.add_argument("out", help="Batch folder written by prepare")
+    ingest_cmd.add_argument("results", nargs="+", help="Batch API output (and error) files")
+    ingest_cmd.add_argument("-o", "--output", action="append", required=True,
+                            help="Output .csv/.xlsx/.jsonl/.parquet (repeatable, written in one pass)")
+    args = parser.parse_args(argv)
+
+    if args.command == "prepare":
+        if bool(args.source) == bool(args.snippets):
+            parser.error("give either a company source or --snippets")
+        companies = None
+        if args.source:
+            import cli
+            companies, _ = cli.read_companies(args.source)
+        prepare(args.out, companies, args.snippets, args.concurrency, args.checkpoint)
+    else:
+        ingest(args.out, args.results, args.output)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
+    main()
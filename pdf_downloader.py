@@ -0,0 +1,189 @@
+"""
+Bounded pool of background workers that download decision PDFs to disk.
+
+The crawler submits (url, file name) pairs and keeps paging while the
+workers download, so page crawling and downloading overlap instead of adding
+up. Each file is streamed in chunks to "<name>.part" and renamed into place
+only when complete. A file already on disk with the server's size (or the
+expected SHA-256) is skipped, and an interrupted ".part" file is resumed
+with an HTTP Range request.
+
+With a PdfStore (see pdf_store.py) files are kept content-addressed instead:
+URLs the store's manifest already knows are skipped without any request, and
+finished downloads are filed under their SHA-256.
+
+    with DownloadPool(session, DOWNLOAD_FOLDER, workers=4) as downloads:
+        downloads.submit(pdf_url, "decision.pdf")
+"""
+import hashlib
+import os
+import queue
+import threading
+import time
+
+import requests
+
+CHUNK_SIZE = 64 * 1024
+
+# Attempts per file before giving up; later attempts resume the .part file.
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 2
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _remote_size(response):
+    """Total size of the resource, from Content-Range (206) or Content-Length (200)."""
+    content_range = response.headers.get("Content-Range", "")
+    if "/" in content_range and not content_range.endswith("/*"):
+        return int(content_range.rsplit("/", 1)[1])
+    if response.status_code == 200 and response.headers.get("Content-Length"):
+        return int(response.headers["Content-Length"])
+    return None
+
+
+def download_file(session, url, path, expected_sha256=None, verify=True, timeout=60):
+    """
+    Streams `url` to `path` via a temp file and atomic rename.
+
+    Returns "skipped" if an identical file is already there, else "downloaded".
+    Raises requests.RequestException / IOError on failure, leaving any partial
+    data in "<path>.part" for the next attempt to resume.
+    """
+    if os.path.exists(path):
+        if expected_sha256:
+            if file_sha256(path) == expected_sha256:
+                return "skipped"
+        else:
+            head = session.head(url, allow_redirects=True, verify=verify, timeout=timeout)
+            if head.ok and head.headers.get("Content-Length") \
+                    and int(head.headers["Content-Length"]) == os.path.getsize(path):
+                return "skipped"
+
+    part_path = path + ".part"
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    headers = {"Range": f"bytes={offset}-"} if offset else {}
+
+    with session.get(url, headers=headers, stream=True, verify=verify, timeout=timeout) as response:
+        if response.status_code == 416:
+            # Range not satisfiable: the .part file is stale, start again.
+            os.remove(part_path)
+            return download_file(session, url, path, expected_sha256, verify, timeout)
+        response.raise_for_status()
+        resumed = response.status_code == 206
+        total_size = _remote_size(response)
+        with open(part_path, "ab" if resumed else "wb") as f:
+            for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                f.write(chunk)
+
+    if total_size is not None and os.path.getsize(part_path) != total_size:
+        raise IOError(f"Incomplete download of {url}: {os.path.getsize(part_path)} of {total_size} bytes")
+    if expected_sha256 and file_sha256(part_path) != expected_sha256:
+        os.remove(part_path)
+        raise IOError(f"SHA-256 mismatch for {url}")
+    os.replace(part_path, path)
+    return "downloaded"
+
+
+class DownloadPool:
+    """
+    Worker threads draining a bounded queue of downloads. submit() blocks when
+    `queue_size` downloads are already waiting, which keeps the crawler from
+    running arbitrarily far ahead of the downloads.
+    """
+
+    def __init__(self, session, folder, workers=4, queue_size=200, verify=True, timeout=60, store=None):
+        self.session = session
+        self.folder = folder
+        self.store = store
+        self.verify = verify
+        self.timeout = timeout
+        self.stats = {"downloaded": 0, "skipped": 0, "failed": 0}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._queue = queue.Queue(maxsize=queue_size)
+        os.makedirs(folder, exist_ok=True)
+        self._threads = [threading.Thread(target=self._worker, name=f"pdf-download-{n}", daemon=True)
+                         for n in range(workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, url, file_name, expected_sha256=None, appeals_number=None):
+        """
+        Queues `url` to be saved as `file_name` inside the pool's folder, or
+        recorded under that name in the store.
+        """
+        self._queue.put((url, file_name, expected_sha256, appeals_number))
+
+    def _thread_session(self):
+        # requests.Session isn't guaranteed thread-safe; give each worker its
+        # own, carrying over the cookies and headers of the crawl session.
+        if not hasattr(self._local, "session"):
+            session = requests.Session()
+            session.headers.update(self.session.headers)
+            session.cookies.update(self.session.cookies)
+            self._local.session = session
+        return self._local.session
+
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+            url, file_name, expected_sha256, appeals_number = item
+            try:
+                if self.store is not None:
+                    outcome = self._download_to_store(url, file_name, expected_sha256, appeals_number)
+                else:
+                    outcome = self._download(os.path.join(self.folder, file_name), url, file_name, expected_sha256)
+            except Exception as e:
+                outcome = "failed"
+                print("Exception downloading PDF:", url, "Error:", e)
+            with self._lock:
+                self.stats[outcome] += 1
+            self._queue.task_done()
+
+    def _download(self, path, url, file_name, expected_sha256):
+        for attempt in range(1, MAX_RETRIES + 1):
+            try:
+                outcome = download_file(self._thread_session(), url, path, expected_sha256,
+                                        verify=self.verify, timeout=self.timeout)
+                if outcome == "downloaded":
+                    print("Downloaded PDF:", file_name)
+                return outcome
+            except (requests.RequestException, IOError) as e:
+                if attempt == MAX_RETRIES:
+                    raise
+                print(f"Download failed (attempt {attempt}/{MAX_RETRIES}), resuming:", url, e)
+                time.sleep(BACKOFF_FACTOR ** (attempt - 1))
+
+    def _download_to_store(self, url, file_name, expected_sha256, appeals_number):
+        if self.store.has_url(url):
+            return "skipped"
+        path = self.store.temp_path(url)
+        self._download(path, url, file_name, expected_sha256)
+        self.store.add_file(path, url, appeals_number, file_name)
+        return "downloaded"
+
+    def close(self):
+        """Waits for every queued download to finish, then stops the workers."""
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        print(f"PDF downloads: {self.stats['downloaded']} downloaded, "
+              f"{self.stats['skipped']} already present, {self.stats['failed']} failed")
+        return self.stats
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,270 @@
+"""
+Parallel text extraction for the downloaded decision PDFs.
+
+Walks a download folder (a PdfStore root, or a plain folder of PDFs) and
+extracts each PDF page by page in a process pool sized to the machine. Each
+document becomes one JSONL file named by the PDF's SHA-256:
+
+    {"sha256": ..., "source": ..., "backend": "pypdfium2", "pages": 12, ...}   <- metadata
+    {"page": 1, "text": "..."}
+    {"page": 2, "text": "..."}
+
+Pages are streamed to "<sha>.jsonl.part" and the finished file is moved into
+place when the document is done. A PDF whose hash already has a finished
+file is skipped, so re-runs only touch new downloads. Store objects are
+already named by their hash, and loose PDFs are hashed once with the result
+cached by (path, size, mtime).
+
+    python pdf_extractor.py "G:/My Drive/LexiMentis scraped data" --out decision_text
+
+Backends are tried in order of speed: pypdfium2, pypdf, pdfminer.six. Any
+one of them is enough; a document one backend can't read is retried with
+the next.
+"""
+import argparse
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+
+from pdf_downloader import file_sha256
+
+DEFAULT_OUTPUT_DIR = "decision_text"
+BACKENDS = ["pypdfium2", "pypdf", "pdfminer"]
+
+# Bump when extraction output changes, so cached documents are redone.
+EXTRACTOR_VERSION = 1
+
+HASH_CACHE_NAME = "hashes.json"
+# Folders inside a PdfStore root that hold links or partial downloads, not objects.
+SKIP_DIRS = {"by-name", "tmp"}
+
+
+# --- Backends: each yields the text of every page in order ---
+def _pages_pypdfium2(path):
+    import pypdfium2 as pdfium
+    pdf = pdfium.PdfDocument(path)
+    try:
+        for index in range(len(pdf)):
+            page = pdf[index]
+            text_page = page.get_textpage()
+            yield text_page.get_text_range()
+            text_page.close()
+            page.close()
+    finally:
+        pdf.close()
+
+
+def _pages_pypdf(path):
+    from pypdf import PdfReader
+    for page in PdfReader(path).pages:
+        yield page.extract_text() or ""
+
+
+def _pages_pdfminer(path):
+    from pdfminer.high_level import extract_pages
+    from pdfminer.layout import LTTextContainer
+    for layout in extract_pages(path):
+        yield "".join(element.get_text() for element in layout if isinstance(element, LTTextContainer))
+
+
+PAGE_READERS = {"pypdfium2": _pages_pypdfium2, "pypdf": _pages_pypdf, "pdfminer": _pages_pdfminer}
+BACKEND_MODULES = {"pypdfium2": "pypdfium2", "pypdf": "pypdf", "pdfminer": "pdfminer"}
+
+
+def available_backends(preferred=None):
+    """Installed backends, fastest first (or just `preferred`)."""
+    import importlib.util
+    names = [preferred] if preferred else BACKENDS
+    return [name for name in names if importlib.util.find_spec(BACKEND_MODULES[name]) is not None]
+
+
+# --- Output files ---
+def output_path(out_dir, sha256):
+    return os.path.join(out_dir, sha256[:2], f"{sha256}.jsonl")
+
+
+def read_metadata(path):
+    """The metadata line of an extracted document, or None if it can't be read."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.loads(f.readline())
+    except (OSError, ValueError):
+        return None
+
+
+def is_extracted(out_dir, sha256):
+    metadata = read_metadata(output_path(out_dir, sha256))
+    return metadata is not None and metadata.get("version") == EXTRACTOR_VERSION
+
+
+def iter_pages(path):
+    """Yields (page_number, text) from an extracted document file."""
+    with open(path, "r", encoding="utf-8") as f:
+        f.readline()  # metadata
+        for line in f:
+            page = json.loads(line)
+            yield page["page"], page["text"]
+
+
+def document_text(out_dir, sha256):
+    """Full text of an extracted document, pages separated by form feeds."""
+    return "\f".join(text for _, text in iter_pages(output_path(out_dir, sha256)))
+
+
+def iter_documents(out_dir):
+    """Yields (metadata, path) for every finished document under `out_dir`."""
+    for folder, _, files in os.walk(out_dir):
+        for name in sorted(files):
+            if name.endswith(".jsonl"):
+                path = os.path.join(folder, name)
+                metadata = read_metadata(path)
+                if metadata is not None:
+                    yield metadata, path
+
+
+# --- One document (runs in a worker process) ---
+def extract_document(pdf_path, sha256, out_dir, backends):
+    """
+    Extracts `pdf_path` into its JSONL file, trying `backends` in turn.
+    Returns (sha256, backend, pages, seconds, error).
+    """
+    path = output_path(out_dir, sha256)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    part_path = path + ".part"
+    started = time.perf_counter()
+    error = None
+    for backend in backends:
+        try:
+            pages = 0
+            with open(part_path, "w", encoding="utf-8") as out:
+                for text in PAGE_READERS[backend](pdf_path):
+                    pages += 1
+                    out.write(json.dumps({"page": pages, "text": text}, ensure_ascii=False) + "\n")
+            metadata = {
+                "sha256": sha256,
+                "source": os.path.basename(pdf_path),
+                "backend": backend,
+                "pages": pages,
+                "version": EXTRACTOR_VERSION,
+                "extracted_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            }
+            # The page count is only known at the end; put the metadata line in front
+            with open(path + ".tmp", "w", encoding="utf-8") as out, open(part_path, "r", encoding="utf-8") as body:
+                out.write(json.dumps(metadata, ensure_ascii=False) + "\n")
+                shutil.copyfileobj(body, out)
+            os.replace(path + ".tmp", path)
+            os.remove(part_path)
+            return sha256, backend, pages, time.perf_counter() - started, None
+        except Exception as e:
+            error = f"{backend}: {e}"
+    for leftover in (part_path, path + ".tmp"):
+        if os.path.exists(leftover):
+            os.remove(leftover)
+    return sha256, None, 0, time.perf_counter() - started, error
+
+
+# --- Finding the PDFs ---
+class HashCache:
+    """SHA-256 of loose PDFs, keyed by path and reused while size and mtime match."""
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    def sha256(self, pdf_path):
+        stat = os.stat(pdf_path)
+        entry = self.entries.get(pdf_path)
+        if entry and entry[0] == stat.st_size and entry[1] == stat.st_mtime:
+            return entry[2]
+        digest = file_sha256(pdf_path)
+        self.entries[pdf_path] = [stat.st_size, stat.st_mtime, digest]
+        return digest
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f)
+        os.replace(tmp_path, self.path)
+
+
+def find_pdfs(folder, hash_cache):
+    """
+    Yields (pdf_path, sha256) for every distinct PDF under `folder`. In a
+    PdfStore only objects/ is read; its file names are the hashes.
+    """
+    seen = set()
+    objects_dir = os.path.join(folder, "objects")
+    store_layout = os.path.isdir(objects_dir)
+    for root, dirs, files in os.walk(objects_dir if store_layout else folder):
+        dirs[:] = sorted(d for d in dirs if d not in SKIP_DIRS)
+        for name in sorted(files):
+            if not name.lower().endswith(".pdf"):
+                continue
+            pdf_path = os.path.join(root, name)
+            sha256 = name[:-4] if store_layout else hash_cache.sha256(pdf_path)
+            if sha256 not in seen:
+                seen.add(sha256)
+                yield pdf_path, sha256
+
+
+def extract_folder(folder, out_dir=DEFAULT_OUTPUT_DIR, workers=None, backend=None):
+    """
+    Extracts every PDF under `folder` that isn't in `out_dir` yet, in a pool
+    of `workers` processes (default: one per core). Returns a stats dict.
+    """
+    backends = available_backends(backend)
+    if not backends:
+        raise RuntimeError("No PDF backend installed; pip install pypdfium2 (or pypdf / pdfminer.six).")
+    os.makedirs(out_dir, exist_ok=True)
+    hash_cache = HashCache(os.path.join(out_dir, HASH_CACHE_NAME))
+    todo = []
+    stats = {"extracted": 0, "cached": 0, "failed": 0, "pages": 0}
+    for pdf_path, sha256 in find_pdfs(folder, hash_cache):
+        if is_extracted(out_dir, sha256):
+            stats["cached"] += 1
+        else:
+            todo.append((pdf_path, sha256))
+    hash_cache.save()
+    print(f"{len(todo)} PDFs to extract ({stats['cached']} already done), backends: {', '.join(backends)}")
+
+    started = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(extract_document, pdf_path, sha256, out_dir, backends): pdf_path
+                   for pdf_path, sha256 in todo}
+        for done, future in enumerate(as_completed(futures), 1):
+            sha256, used_backend, pages, seconds, error = future.result()
+            if error:
+                stats["failed"] += 1
+                print("Failed to extract", futures[future], ":", error)
+                continue
+            stats["extracted"] += 1
+            stats["pages"] += pages
+            if done % 100 == 0:
+                print(f"  {done}/{len(todo)} documents...")
+    elapsed = time.perf_counter() - started
+    print(f"Extracted {stats['extracted']} documents ({stats['pages']} pages) in {elapsed:.1f}s "
+          f"with {workers} processes; {stats['cached']} cached, {stats['failed']} failed")
+    return stats
+
+
+# --- Command line interface ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract text from downloaded decision PDFs.")
+    parser.add_argument("folder", help="Download folder (PdfStore root or plain folder of PDFs)")
+    parser.add_argument("--out", default=DEFAULT_OUTPUT_DIR, help="Output folder (default: %(default)s)")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: one per core)")
+    parser.add_argument("--backend", choices=BACKENDS, help="Use only this backend")
+    args = parser.parse_args(argv)
+    extract_folder(args.folder, args.out, args.workers, args.backend)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""
+Content-addressed store for downloaded decision PDFs.
+
+Each PDF is stored once, named by its SHA-256 (objects/ab/abcd....pdf), and a
+SQLite manifest maps every PDF URL to its hash together with the appeals
+number and original file name. Identical decisions share one file, decisions
+with the same file name no longer overwrite each other, and a URL already in
+the manifest is never downloaded again.
+
+Human-readable names are exposed as hard links under by-name/ (where the file
+system supports them) and always in a generated index.csv.
+
+    python pdf_store.py index                      # regenerate by-name/ and index.csv
+    python pdf_store.py ingest OLD_FOLDER --csv appeals_data.csv
+"""
+import argparse
+import csv
+import hashlib
+import os
+import re
+import shutil
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+from pdf_downloader import file_sha256
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pdfs (
+    url            TEXT PRIMARY KEY,
+    appeals_number TEXT,
+    file_name      TEXT,
+    sha256         TEXT NOT NULL,
+    size           INTEGER NOT NULL,
+    fetched_at     TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pdfs_sha256 ON pdfs(sha256);
+"""
+
+
+def clean_file_name(file_name):
+    # Same rule the appeals scrapers use for Windows-safe names: < > : " / \ | ? *
+    return re.sub(r'[<>:"/\\|?*]', '_', file_name)
+
+
+class PdfStore:
+    """A content-addressed PDF folder plus its manifest. Safe to share between threads."""
+
+    def __init__(self, root, link_names=True):
+        self.root = root
+        self.link_names = link_names
+        self.objects_dir = os.path.join(root, "objects")
+        self.tmp_dir = os.path.join(root, "tmp")
+        self.names_dir = os.path.join(root, "by-name")
+        for folder in (self.objects_dir, self.tmp_dir, self.names_dir):
+            os.makedirs(folder, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(root, "manifest.sqlite"), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript(SCHEMA)
+
+    # --- Paths ---
+    def object_path(self, sha256):
+        return os.path.join(self.objects_dir, sha256[:2], sha256 + ".pdf")
+
+    def temp_path(self, url):
+        """Stable per-URL download location, so an interrupted download can resume."""
+        return os.path.join(self.tmp_dir, hashlib.sha1(url.encode("utf-8")).hexdigest() + ".pdf")
+
+    # --- Manifest ---
+    def lookup(self, url):
+        """Returns the manifest row for `url`, or None if it was never stored."""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM pdfs WHERE url = ?", (url,)).fetchone()
+        return dict(row) if row else None
+
+    def has_url(self, url):
+        row = self.lookup(url)
+        return row is not None and os.path.exists(self.object_path(row["sha256"]))
+
+    def add_file(self, path, url, appeals_number=None, file_name=None, move=True):
+        """
+        Adds the file at `path` to the store under its SHA-256 and records `url`
+        in the manifest. With move=True the file is moved (or deleted if the
+        content is already stored). Returns the SHA-256.
+        """
+        sha256 = file_sha256(path)
+        size = os.path.getsize(path)
+        target = self.object_path(sha256)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        if os.path.exists(target):
+            if move:
+                os.remove(path)
+        elif move:
+            os.replace(path, target)
+        else:
+            shutil.copyfile(path, target)
+
+        now = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO pdfs (url, appeals_number, file_name, sha256, size, fetched_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET
+                    appeals_number = COALESCE(excluded.appeals_number, appeals_number),
+                    file_name      = COALESCE(excluded.file_name, file_name),
+                    sha256         = excluded.sha256,
+                    size           = excluded.size,
+                    fetched_at     = excluded.fetched_at
+                """,
+                (url, appeals_number, file_name, sha256, size, now),
+            )
+            self._conn.commit()
+        return sha256
+
+    # --- Human-readable names ---
+    def write_index(self):
+        """
+        Regenerates index.csv and, if enabled, the by-name/ hard links. When two
+        different PDFs share a file name, the appeals number is added to tell
+        them apart.
+        """
+        with self._lock:
+            rows = [dict(row) for row in self._conn.execute(
+                "SELECT url, appeals_number, file_name, sha256, size FROM pdfs ORDER BY file_name, appeals_number")]
+
+        hashes_by_name = {}
+        for row in rows:
+            hashes_by_name.setdefault(row["file_name"] or row["sha256"] + ".pdf", set()).add(row["sha256"])
+
+        index_path = os.path.join(self.root, "index.csv")
+        with open(index_path, "w", newline="", encoding="utf-8") as index_file:
+            writer = csv.writer(index_file)
+            writer.writerow(["Name", "Appeals Number", "File Name", "PDF URL", "SHA-256", "Size", "Object"])
+            for row in rows:
+                name = row["file_name"] or row["sha256"] + ".pdf"
+                if len(hashes_by_name[name]) > 1:
+                    stem, ext = os.path.splitext(name)
+                    name = f"{stem} ({row['appeals_number'] or row['sha256'][:12]}){ext}"
+                object_path = self.object_path(row["sha256"])
+                writer.writerow([name, row["appeals_number"], row["file_name"], row["url"],
+                                 row["sha256"], row["size"], os.path.relpath(object_path, self.root)])
+                if self.link_names:
+                    self._link(object_path, os.path.join(self.names_dir, clean_file_name(name)))
+        return index_path
+
+    def _link(self, object_path, name_path):
+        if os.path.exists(name_path):
+            if os.path.samefile(object_path, name_path):
+                return
+            os.remove(name_path)
+        try:
+            os.link(object_path, name_path)
+        except OSError:
+            # No hard links on this file system (e.g. a synced cloud drive);
+            # index.csv still maps every name to its object.
+            self.link_names = False
+
+    def close(self):
+        self.write_index()
+        with self._lock:
+            self._conn.close()
+
+
+# --- Command line interface ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Maintain the content-addressed decision PDF store.")
+    parser.add_argument("--root", default=".", help="Store folder (default: current directory)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("index", help="Regenerate index.csv and the by-name/ links")
+    ingest_cmd = commands.add_parser("ingest", help="Move loose PDFs from an old download folder into the store")
+    ingest_cmd.add_argument("folder")
+    ingest_cmd.add_argument("--csv", default="appeals_data.csv",
+                            help="Scraper CSV used to map file names to URLs (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    store = PdfStore(args.root)
+    if args.command == "ingest":
+        rows_by_name = {}
+        with open(args.csv, newline="", encoding="utf-8") as csvfile:
+            for row in csv.DictReader(csvfile):
+                rows_by_name[clean_file_name(row["File Name"])] = row
+        moved = 0
+        for entry in sorted(os.listdir(args.folder)):
+            row = rows_by_name.get(entry)
+            if row is None or not entry.lower().endswith(".pdf"):
+                continue
+            store.add_file(os.path.join(args.folder, entry), row["PDF URL"],
+                           row["Appeals Number"], row["File Name"])
+            moved += 1
+        print(f"Ingested {moved} PDFs into {args.root}")
+    store.close()
+    print(f"Index written to {os.path.join(args.root, 'index.csv')}")
+
+
+if __name__ == "__main__":
+    main()
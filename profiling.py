@@ -0,0 +1,300 @@
+"""
+CPU and memory profiling for any scraper run.
+
+    with profiling.profiled("company-search", cpu=True, memory=True):
+        company_search.run_job(...)
+
+    python cli.py --profile companies search companies.txt -o out.csv
+    python cli.py --profile --trace-memory appeals --csv appeals_data.csv
+
+Everything goes into one run directory (profiles/<name>-<timestamp>/):
+
+    profile.prof     cProfile dump of every thread (open with pstats or snakeviz)
+    profile.txt      top functions by cumulative and by own time
+    stacks.folded    sampled stacks, one "thread;outer;...;inner count" line per
+                     stack, for flamegraph.pl or speedscope
+    memory/NNN.txt   tracemalloc top allocation sites, taken periodically
+    summary.txt      the top functions, sampled hot spots and allocation sites
+
+The sampler and the memory snapshots run in background threads, so they also
+see work done in the scheduler's worker threads.
+"""
+import cProfile
+import collections
+import contextlib
+import io
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+logger = logging.getLogger("profiling")
+
+DEFAULT_PROFILE_DIR = "profiles"
+# Seconds between stack samples and between tracemalloc snapshots.
+SAMPLE_INTERVAL = 0.01
+SNAPSHOT_INTERVAL = 30
+# Lines per ranking in the reports.
+TOP_N = 25
+# Frames kept per allocation. The reports group by allocating line, which
+# needs only one; more make tracing and every snapshot slower.
+TRACE_FRAMES = 1
+
+
+def make_run_dir(name, base_dir=DEFAULT_PROFILE_DIR):
+    run_dir = os.path.join(base_dir, f"{name}-{datetime.now().strftime('%Y%m%d-%H%M%S')}")
+    os.makedirs(run_dir, exist_ok=True)
+    return run_dir
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+# --- CPU: deterministic profile ---
+class ThreadProfiler:
+    """
+    cProfile over every thread. From Python 3.12 one profiler sees all threads;
+    before that each thread started during the run gets its own profiler, and
+    the stats are merged at the end.
+    """
+
+    def __init__(self):
+        self.profiles = []
+        self._lock = threading.Lock()
+
+    def _start_thread(self, frame, event, arg):
+        # Runs as the new thread's first profile event; enable() replaces this hook.
+        profile = cProfile.Profile()
+        with self._lock:
+            self.profiles.append(profile)
+        profile.enable()
+
+    def start(self):
+        profile = cProfile.Profile()
+        self.profiles.append(profile)
+        profile.enable()
+        if sys.version_info < (3, 12):
+            threading.setprofile(self._start_thread)
+
+    def stop(self):
+        if sys.version_info < (3, 12):
+            threading.setprofile(None)
+        self.profiles[0].disable()
+
+    def stats(self):
+        """The merged pstats.Stats of every thread (call after stop())."""
+        with self._lock:
+            profiles = list(self.profiles)
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        return stats
+
+
+def stats_report(stats, top=TOP_N):
+    out = io.StringIO()
+    stats.stream = out
+    out.write(f"Top {top} functions by cumulative time\n")
+    stats.sort_stats("cumulative").print_stats(top)
+    out.write(f"\nTop {top} functions by own time\n")
+    stats.sort_stats("tottime").print_stats(top)
+    return out.getvalue()
+
+
+def top_functions(stats, top=10):
+    """(label, own seconds, cumulative seconds, calls) for the heaviest functions by own time."""
+    rows = []
+    for (filename, line, name), (_, calls, tottime, cumtime, _) in stats.stats.items():
+        rows.append((f"{os.path.basename(filename)}:{line}:{name}", tottime, cumtime, calls))
+    rows.sort(key=lambda row: row[1], reverse=True)
+    return rows[:top]
+
+
+# --- CPU: sampled stacks ---
+class StackSampler(threading.Thread):
+    """Samples every thread's stack at a fixed interval into folded-stack counts."""
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        super().__init__(name="profiling-sampler", daemon=True)
+        self.interval = interval
+        self.stacks = collections.Counter()
+        self.leaves = collections.Counter()
+        self.samples = 0
+        self._done = threading.Event()
+
+    def run(self):
+        own = threading.get_ident()
+        while not self._done.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                name = names.get(ident, str(ident))
+                if ident == own or name.startswith("profiling-"):
+                    continue
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                if not labels:
+                    continue
+                labels.append(name.replace(";", ":"))
+                labels.reverse()
+                self.stacks[";".join(labels)] += 1
+                self.leaves[labels[-1]] += 1
+            self.samples += 1
+
+    def stop(self):
+        self._done.set()
+        self.join()
+
+    def write_folded(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+# --- Memory ---
+# Allocations made by the profiler itself, left out of the reports.
+_OWN_FILES = {tracemalloc.__file__, __file__}
+
+
+def allocation_sites(snapshot, previous=None):
+    """Per-line allocation stats, largest first (or largest changes since `previous`)."""
+    # Filtering the stats is much cheaper than Snapshot.filter_traces() on a big heap.
+    stats = snapshot.compare_to(previous, "lineno") if previous is not None else snapshot.statistics("lineno")
+    return [stat for stat in stats if stat.traceback[0].filename not in _OWN_FILES]
+
+
+class MemorySnapshots(threading.Thread):
+    """Writes tracemalloc's top allocation sites to memory/NNN.txt every `interval` seconds."""
+
+    def __init__(self, run_dir, interval=SNAPSHOT_INTERVAL, top=TOP_N):
+        super().__init__(name="profiling-memory", daemon=True)
+        self.folder = os.path.join(run_dir, "memory")
+        self.interval = interval
+        self.top = top
+        self.first = None
+        self.last = None
+        self.count = 0
+        self._done = threading.Event()
+        os.makedirs(self.folder, exist_ok=True)
+
+    def take(self):
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        self.count += 1
+        with open(os.path.join(self.folder, f"{self.count:03d}.txt"), "w", encoding="utf-8") as f:
+            f.write(f"{datetime.now().isoformat(timespec='seconds')}  traced {current / 1e6:.1f} MB, "
+                    f"peak {peak / 1e6:.1f} MB\n\n")
+            for stat in allocation_sites(snapshot)[:self.top]:
+                f.write(f"{stat}\n")
+            if self.last is not None:
+                f.write(f"\nLargest changes since snapshot {self.count - 1:03d}\n")
+                for stat in allocation_sites(snapshot, self.last)[:self.top]:
+                    f.write(f"{stat}\n")
+        if self.first is None:
+            self.first = snapshot
+        self.last = snapshot
+        return snapshot
+
+    def run(self):
+        while not self._done.wait(self.interval):
+            self.take()
+
+    def stop(self):
+        self._done.set()
+        self.join()
+        return self.take()
+
+
+# --- Run wrapper ---
+@contextlib.contextmanager
+def profiled(name="run", cpu=True, memory=False, base_dir=DEFAULT_PROFILE_DIR, sample_interval=SAMPLE_INTERVAL,
+             snapshot_interval=SNAPSHOT_INTERVAL, top=TOP_N):
+    """
+    Profiles the enclosed block. Yields the run directory (None when both
+    `cpu` and `memory` are off, in which case nothing is measured).
+    """
+    if not cpu and not memory:
+        yield None
+        return
+    run_dir = make_run_dir(name, base_dir)
+    logger.info(f"Profiling into {run_dir}")
+    profiler = sampler = snapshots = None
+    if memory:
+        tracemalloc.start(TRACE_FRAMES)
+        snapshots = MemorySnapshots(run_dir, snapshot_interval, top)
+        snapshots.take()
+        snapshots.start()
+    if cpu:
+        sampler = StackSampler(sample_interval)
+        sampler.start()
+        profiler = ThreadProfiler()
+        profiler.start()
+    started = time.perf_counter()
+    try:
+        yield run_dir
+    finally:
+        elapsed = time.perf_counter() - started
+        # Stop the measurements before building any report, so the reports
+        # don't show up in them.
+        if profiler is not None:
+            profiler.stop()
+            sampler.stop()
+        if snapshots is not None:
+            final = snapshots.stop()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        if profiler is not None:
+            stats = profiler.stats()
+
+        summary = [f"{name}: {elapsed:.1f}s wall"]
+        if profiler is not None:
+            stats.dump_stats(os.path.join(run_dir, "profile.prof"))
+            with open(os.path.join(run_dir, "profile.txt"), "w", encoding="utf-8") as f:
+                f.write(stats_report(stats, top))
+            sampler.write_folded(os.path.join(run_dir, "stacks.folded"))
+            summary.append("\nTop functions by own time (own s, cumulative s, calls):")
+            summary += [f"  {own:8.2f} {cumulative:8.2f} {calls:>9}  {label}"
+                        for label, own, cumulative, calls in top_functions(stats)]
+            total = sum(sampler.leaves.values()) or 1
+            summary.append(f"\nHottest sampled frames, share of all thread stacks "
+                           f"({sampler.samples} samples, {sample_interval * 1000:g} ms apart):")
+            summary += [f"  {count / total:7.1%}  {label}" for label, count in sampler.leaves.most_common(10)]
+        if snapshots is not None:
+            summary.append(f"\nMemory: traced {current / 1e6:.1f} MB at exit, peak {peak / 1e6:.1f} MB "
+                           f"({snapshots.count} snapshots)")
+            summary.append("Largest allocation sites at exit:")
+            summary += [f"  {stat}" for stat in allocation_sites(final)[:10]]
+            summary.append("Largest growth over the run:")
+            summary += [f"  {stat}" for stat in allocation_sites(final, snapshots.first)[:10]]
+        text = "\n".join(summary) + "\n"
+        with open(os.path.join(run_dir, "summary.txt"), "w", encoding="utf-8") as f:
+            f.write(text)
+        logger.info(f"Profile summary ({run_dir}/summary.txt):\n{text}")
+
+
+def add_arguments(parser):
+    """Adds --profile, --trace-memory and their settings to an argparse parser."""
+    group = parser.add_argument_group("profiling")
+    group.add_argument("--profile", action="store_true",
+                       help="cProfile + sampled flame-graph stacks for the run")
+    group.add_argument("--trace-memory", action="store_true",
+                       help="Periodic tracemalloc snapshots of the top allocation sites")
+    group.add_argument("--profile-dir", default=DEFAULT_PROFILE_DIR,
+                       help="Where run directories are created (default: %(default)s)")
+    group.add_argument("--sample-interval", type=float, default=SAMPLE_INTERVAL,
+                       help="Seconds between stack samples (default: %(default)s)")
+    group.add_argument("--snapshot-interval", type=float, default=SNAPSHOT_INTERVAL,
+                       help="Seconds between memory snapshots (default: %(default)s)")
+    return group
+
+
+def profiled_from_args(name, args):
+    return profiled(name, cpu=args.profile, memory=args.trace_memory, base_dir=args.profile_dir,
+                    sample_interval=args.sample_interval, snapshot_interval=args.snapshot_interval)
@@ -0,0 +1,226 @@
+"""
+Append-only archive of raw HTTP responses in WARC/1.0 format (gzip per record).
+
+Scrapers write every fetched page here so the extractors can later be re-run
+over the stored bodies at disk speed instead of hitting the sites again.
+Each record is its own gzip member, so a crash can at most lose the record
+being written: iter_records() stops at the last complete record (logging the
+cut-off tail), and the complete records stay readable by standard WARC tools.
+"""
+import gzip
+import json
+import logging
+import threading
+import uuid
+from datetime import datetime, timezone
+
+from requests.structures import CaseInsensitiveDict
+
+logger = logging.getLogger("response_archive")
+
+# HTTP reason phrases for the status codes we expect to archive.
+REASONS = {200: "OK", 301: "Moved Permanently", 302: "Found", 304: "Not Modified",
+           403: "Forbidden", 404: "Not Found", 500: "Internal Server Error"}
+
+
+def header_encoding(headers):
+    """
+    The body encoding `requests` would use for these headers: the
+    Content-Type charset, else ISO-8859-1 for text/* (as requests falls back
+    to), else UTF-8.
+    """
+    content_type = headers.get("Content-Type", "")
+    for param in content_type.split(";")[1:]:
+        name, _, value = param.partition("=")
+        if name.strip().lower() == "charset":
+            return value.strip().strip("'\"")
+    if "text" in content_type.lower():
+        return "ISO-8859-1"
+    return "utf-8"
+
+
+class ArchiveRecord:
+    """
+    One archived response: target URL, capture time, HTTP status/headers
+    (case-insensitive) and raw body. `encoding` is the encoding the scraper
+    decoded the body with, when the archive recorded it.
+    """
+
+    def __init__(self, url, date, status, headers, body, meta=None, encoding=None):
+        self.url = url
+        self.date = date
+        self.status = status
+        self.headers = CaseInsensitiveDict(headers)
+        self.body = body
+        self.meta = meta or {}
+        self.encoding = encoding
+
+    @property
+    def text(self):
+        """Decodes the body as the scraper did: the recorded encoding, else as requests would from the headers."""
+        encoding = self.encoding or header_encoding(self.headers)
+        try:
+            return self.body.decode(encoding, errors="replace")
+        except LookupError:  # unknown charset name
+            return self.body.decode("utf-8", errors="replace")
+
+    def __repr__(self):
+        return f"ArchiveRecord({self.url!r}, {self.date!r}, status={self.status})"
+
+
+class ResponseArchive:
+    """
+    Writer for a .warc.gz archive. Opens the file in append mode, so several
+    runs can accumulate in one archive. Safe to share between threads.
+
+        with ResponseArchive("statutes.warc.gz") as archive:
+            archive.write_response(resp)
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "ab")
+        self._lock = threading.Lock()
+
+    def write_record(self, url, body, status=200, headers=None, meta=None, encoding=None):
+        """
+        Appends a response record for `url`. `body` may be str (stored as
+        UTF-8) or bytes; `encoding` is the encoding the scraper decoded it with.
+        """
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+            encoding = "utf-8"
+        # One entry per header name, whatever its case
+        headers = CaseInsensitiveDict(headers or {})
+        headers.setdefault("Content-Type", "text/html; charset=utf-8")
+
+        http_block = f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+        for name, value in headers.items():
+            # Bodies are stored decoded; drop headers that describe the wire encoding.
+            if name.lower() in ("content-encoding", "transfer-encoding", "content-length"):
+                continue
+            http_block += f"{name}: {value}\r\n"
+        http_block += f"Content-Length: {len(body)}\r\n\r\n"
+        payload = http_block.encode("utf-8") + body
+
+        warc_headers = [
+            "WARC/1.0",
+            "WARC-Type: response",
+            f"WARC-Record-ID: <urn:uuid:{uuid.uuid4()}>",
+            f"WARC-Date: {datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')}",
+            f"WARC-Target-URI: {url}",
+            "Content-Type: application/http; msgtype=response",
+        ]
+        if meta:
+            warc_headers.append(f"X-Scraper-Meta: {json.dumps(meta, sort_keys=True)}")
+        if encoding:
+            warc_headers.append(f"X-Scraper-Encoding: {encoding}")
+        warc_headers.append(f"Content-Length: {len(payload)}")
+        record = ("\r\n".join(warc_headers) + "\r\n\r\n").encode("utf-8") + payload + b"\r\n\r\n"
+
+        compressed = gzip.compress(record)
+        with self._lock:
+            self._file.write(compressed)
+            self._file.flush()
+
+    def write_response(self, response, url=None, meta=None):
+        """
+        Appends a `requests.Response`. Pass `url` to file it under the URL that
+        was requested rather than the final URL after redirects. The
+        response's encoding is recorded, so ArchiveRecord.text decodes the
+        body as response.text did (unless requests had to guess it).
+        """
+        self.write_record(url or response.url, response.content, status=response.status_code,
+                          headers=response.headers, meta=meta, encoding=response.encoding)
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _read_headers(stream):
+    """Reads `Name: value` lines up to the blank separator line."""
+    headers = CaseInsensitiveDict()
+    while True:
+        line = stream.readline()
+        if not line or line in (b"\r\n", b"\n"):
+            return headers
+        name, _, value = line.decode("utf-8", errors="replace").partition(":")
+        headers[name.strip()] = value.strip()
+
+
+class _Truncated(Exception):
+    pass
+
+
+def _read_record(stream):
+    """(WARC headers, block) of the next record, or None at the end of the file."""
+    while True:
+        version = stream.readline()
+        if not version:
+            return None
+        if version.strip():
+            break
+    warc_headers = _read_headers(stream)
+    length = int(warc_headers.get("Content-Length", 0))
+    block = stream.read(length)
+    if len(block) < length:
+        raise _Truncated(f"record block cut short ({len(block)} of {length} bytes)")
+    stream.readline()
+    stream.readline()
+    return warc_headers, block
+
+
+def iter_records(path):
+    """
+    Yields ArchiveRecord objects from a .warc.gz file, in the order they were
+    written. A record cut off by an interrupted run ends the iteration with a
+    warning instead of an error, so everything before it can still be re-parsed.
+    """
+    count = 0
+    with gzip.open(path, "rb") as stream:
+        while True:
+            try:
+                record = _read_record(stream)
+            except (EOFError, gzip.BadGzipFile, _Truncated) as e:
+                logger.warning(f"{path}: truncated after {count} complete records ({e}); ignoring the rest")
+                return
+            if record is None:
+                return
+            count += 1
+            warc_headers, block = record
+            if warc_headers.get("WARC-Type") != "response":
+                continue
+
+            head, _, body = block.partition(b"\r\n\r\n")
+            status_line, _, header_lines = head.partition(b"\r\n")
+            status = int(status_line.split()[1])
+            headers = CaseInsensitiveDict()
+            for line in header_lines.split(b"\r\n"):
+                name, _, value = line.decode("utf-8", errors="replace").partition(":")
+                if name:
+                    headers[name.strip()] = value.strip()
+
+            meta = warc_headers.get("X-Scraper-Meta")
+            yield ArchiveRecord(
+                url=warc_headers.get("WARC-Target-URI"),
+                date=warc_headers.get("WARC-Date"),
+                status=status,
+                headers=headers,
+                body=body,
+                meta=json.loads(meta) if meta else None,
+                encoding=warc_headers.get("X-Scraper-Encoding"),
+            )
+
+
+def latest_by_url(path):
+    """Returns {url: ArchiveRecord} keeping the most recent capture of each URL."""
+    latest = {}
+    for record in iter_records(path):
+        latest[record.url] = record
+    return latest
@@ -0,0 +1,479 @@
+"""
+Small job framework shared by the scrapers.
+
+A scraper is a Job: a source of work items plus two stages, fetch (network
+I/O, retried) and extract (parsing / NLP on what was fetched). A Scheduler
+runs the stages for many items at once and hands each result to the sinks:
+
+    class MyJob(scraper.Job):
+        name = "my-job"
+        def items(self):
+            return ["a", "b", "c"]
+        def fetch(self, item):
+            return requests.get(f"https://example.org/{item}", timeout=10).text
+        def extract(self, item, page):
+            return {"Item": item, "Length": len(page)}
+
+    scraper.Scheduler(MyJob(), [scraper.CsvSink("out.csv")], concurrency=4,
+                      rate_limit=2, checkpoint="out.checkpoint.jsonl").run()
+
+The Scheduler takes care of concurrency (a thread pool), a shared rate limit
+across threads, retries with exponential backoff, checkpointing (finished
+items are replayed from the checkpoint file instead of being fetched again)
+and per-stage timings. Results reach the sinks in source order.
+
+Calls to an upstream API can go through a CircuitBreaker: after repeated
+failures it fails calls at once, the Scheduler parks the affected items, and
+runs them again when a probe call shows the upstream is back.
+"""
+import collections
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import exporters
+
+logger = logging.getLogger("scraper")
+
+# Marks an item whose fetch stage hasn't run yet
+_NOT_FETCHED = object()
+
+
+# --- Jobs ---
+class Job:
+    """Base class for scrapers. Override items(), fetch() and extract()."""
+
+    name = "job"
+    # Exceptions from fetch() that are worth another attempt.
+    retry_exceptions = (Exception,)
+
+    def items(self):
+        """The work items, in output order (any iterable)."""
+        raise NotImplementedError
+
+    def key(self, item):
+        """A stable string identifying `item` in the checkpoint."""
+        return str(item)
+
+    def fetch(self, item):
+        """Network stage: returns whatever extract() needs. Retried on failure."""
+        return item
+
+    def extract(self, item, fetched):
+        """Parsing stage: returns a result dict, a list of them, or None."""
+        raise NotImplementedError
+
+    def start(self):
+        """
+        Called once, just before the first item that needs fetching (never for
+        a run served entirely from the checkpoint). Check credentials and open
+        connections here; an exception aborts the run.
+        """
+
+    def breakers(self):
+        """CircuitBreakers guarding this job's upstreams, reported in the run summary."""
+        return ()
+
+    def on_error(self, item, error):
+        """Result recorded for an item that failed after its retries (None to drop it)."""
+        logger.error(f"Final failure for {self.key(item)}: {error}")
+        return None
+
+    def close(self):
+        """Called once the run is over, after the sinks are closed."""
+
+
+# --- Sinks ---
+class Sink:
+    """Receives results in source order, always from the scheduler's thread."""
+
+    def write(self, result):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class ExportSink(Sink):
+    """
+    Streams results to a .csv, .xlsx or .jsonl file (see exporters.py), row by
+    row. Columns come from `fieldnames` or the first result.
+    """
+
+    def __init__(self, path, fieldnames=None):
+        self.path = path
+        self.fieldnames = fieldnames
+        self._exporter = None
+
+    def write(self, result):
+        if self._exporter is None:
+            self._exporter = exporters.exporter_for(self.path, self.fieldnames or list(result))
+        self._exporter.write(result)
+
+    def close(self):
+        if self._exporter is not None:
+            self._exporter.close()
+            logger.info(f"{self._exporter.rows} rows saved to {self.path}")
+
+
+class CsvSink(ExportSink):
+    """Streams results to CSV; dicts and lists are written as JSON."""
+
+
+class JsonlSink(Sink):
+    def __init__(self, path, mode="w"):
+        self.path = path
+        self._file = open(path, mode, encoding="utf-8")
+
+    def write(self, result):
+        self._file.write(json.dumps(result, ensure_ascii=False, default=str) + "\n")
+
+    def close(self):
+        self._file.close()
+        logger.info(f"JSONL file saved as {self.path}")
+
+
+class ListSink(Sink):
+    """Keeps every result in memory (for outputs that need the whole run, e.g. a JSON dump)."""
+
+    def __init__(self):
+        self.results = []
+
+    def write(self, result):
+        self.results.append(result)
+
+
+class CallbackSink(Sink):
+    def __init__(self, write, close=None):
+        self._write = write
+        self._close = close
+
+    def write(self, result):
+        self._write(result)
+
+    def close(self):
+        if self._close is not None:
+            self._close()
+
+
+# --- Scheduling helpers ---
+class RateLimiter:
+    """Spaces calls at least 1/per_second apart, across all threads."""
+
+    def __init__(self, per_second):
+        self.interval = 1.0 / per_second if per_second else 0.0
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+class Checkpoint:
+    """Append-only JSONL of finished items: {"key": ..., "results": [...]}."""
+
+    def __init__(self, path):
+        self.path = path
+        self.done = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # a line cut short by an interrupted run
+                    self.done[entry["key"]] = entry["results"]
+        self._file = open(path, "a", encoding="utf-8")
+
+    def record(self, key, results):
+        self._file.write(json.dumps({"key": key, "results": results}, ensure_ascii=False, default=str) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose circuit breaker is open."""
+
+    def __init__(self, breaker):
+        wait = max(0.0, breaker.retry_at() - time.monotonic())
+        super().__init__(f"{breaker.name} circuit is open; retry after {wait:.1f}s")
+        self.breaker = breaker
+
+
+class CircuitBreaker:
+    """
+    Fails calls to one upstream fast while it is down.
+
+    closed: calls go through; `failure_threshold` consecutive failures open it.
+    open: calls raise CircuitOpenError at once, until `reset_timeout` passes.
+    half-open: one probe call goes through; success closes the circuit, failure
+        reopens it for twice as long (up to `max_reset_timeout`).
+
+    Only `failure_exceptions` count as failures; anything else passes through.
+    """
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30, max_reset_timeout=600,
+                 failure_exceptions=(Exception,)):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.failure_exceptions = failure_exceptions
+        self.state = "closed"
+        self.failures = 0
+        self.times_opened = 0
+        self.rejected = 0
+        self._timeout = reset_timeout
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def retry_at(self):
+        """time.monotonic() at which a call may go through again."""
+        with self._lock:
+            return self._opened_at + self._timeout if self.state == "open" else time.monotonic()
+
+    def _before_call(self):
+        with self._lock:
+            if self.state == "open" and time.monotonic() >= self._opened_at + self._timeout:
+                self.state = "half-open"
+                logger.info(f"{self.name} circuit half-open: sending a probe request")
+            if self.state == "closed" or (self.state == "half-open" and not self._probing):
+                self._probing = self.state == "half-open"
+                return
+            self.rejected += 1
+        raise CircuitOpenError(self)
+
+    def _record(self, ok):
+        with self._lock:
+            probe = self._probing
+            self._probing = False
+            if ok:
+                if self.state != "closed":
+                    logger.info(f"{self.name} circuit closed: upstream recovered")
+                self.state = "closed"
+                self.failures = 0
+                self._timeout = self.reset_timeout
+                return
+            self.failures += 1
+            if probe or (self.state == "closed" and self.failures >= self.failure_threshold):
+                if probe:
+                    self._timeout = min(self._timeout * 2, self.max_reset_timeout)
+                self.state = "open"
+                self._opened_at = time.monotonic()
+                self.times_opened += 1
+                logger.warning(f"{self.name} circuit open after {self.failures} consecutive failures; "
+                               f"failing fast for {self._timeout:g}s")
+
+    def call(self, fn, *args, **kwargs):
+        self._before_call()
+        try:
+            value = fn(*args, **kwargs)
+        except self.failure_exceptions:
+            self._record(False)
+            raise
+        except BaseException:
+            # Not an upstream failure; release a probe slot without judging the upstream
+            with self._lock:
+                self._probing = False
+            raise
+        self._record(True)
+        return value
+
+    def summary(self):
+        return f"{self.name} breaker {self.state} (opened {self.times_opened}x, {self.rejected} calls failed fast)"
+
+
+class Metrics:
+    """Counts and cumulative stage timings for a run."""
+
+    def __init__(self):
+        self.counts = collections.Counter()
+        self.seconds = collections.Counter()
+        self._lock = threading.Lock()
+        self.started = time.perf_counter()
+
+    def add(self, name, count=1, seconds=None):
+        with self._lock:
+            self.counts[name] += count
+            if seconds is not None:
+                self.seconds[name] += seconds
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.started
+        parts = [f"{name}={count}" for name, count in sorted(self.counts.items())]
+        timings = [f"{name} {seconds:.1f}s" for name, seconds in sorted(self.seconds.items())]
+        return f"{elapsed:.1f}s wall; " + ", ".join(parts) + ("; stage time: " + ", ".join(timings) if timings else "")
+
+
+# --- Scheduler ---
+class Scheduler:
+    """
+    Runs `job` over its items with `concurrency` worker threads.
+
+    rate_limit: maximum fetches per second across all workers (None = no limit).
+    retries / backoff: fetch attempts after the first, sleeping backoff**n seconds.
+    checkpoint: JSONL path; items already recorded there are not fetched again
+        (their results are replayed into the sinks).
+    park_timeout: items that hit an open circuit breaker are parked and run
+        again once it lets calls through (keeping what was already fetched);
+        after this many seconds of waiting the rest go to on_error. Parked
+        items' results come out after the others.
+    """
+
+    def __init__(self, job, sinks, concurrency=1, rate_limit=None, retries=2, backoff=2, checkpoint=None,
+                 park_timeout=3600):
+        self.job = job
+        self.sinks = list(sinks)
+        self.concurrency = max(1, concurrency)
+        self.rate_limiter = RateLimiter(rate_limit)
+        self.retries = retries
+        self.backoff = backoff
+        self.checkpoint_path = checkpoint
+        self.park_timeout = park_timeout
+        self.metrics = Metrics()
+        self.parked = []  # (key, item, fetched, CircuitOpenError)
+
+    def _fetch(self, item):
+        for attempt in range(self.retries + 1):
+            self.rate_limiter.wait()
+            started = time.perf_counter()
+            try:
+                fetched = self.job.fetch(item)
+                self.metrics.add("fetched", seconds=time.perf_counter() - started)
+                return fetched
+            except CircuitOpenError:
+                raise
+            except self.job.retry_exceptions as e:
+                self.metrics.add("fetch errors", seconds=time.perf_counter() - started)
+                if attempt == self.retries:
+                    raise
+                sleep_time = self.backoff ** attempt
+                logger.warning(f"{self.job.name}: {self.job.key(item)} failed "
+                               f"(attempt {attempt + 1}/{self.retries + 1}): {e}; retrying in {sleep_time}s")
+                time.sleep(sleep_time)
+
+    def _process(self, item, fetched=_NOT_FETCHED):
+        """
+        Fetch (unless already done) + extract for one item, in a worker thread.
+        Returns (status, results-or-park): status "ok", "failed" (not
+        checkpointed, so a re-run retries it) or "parked" with
+        (fetched, CircuitOpenError).
+        """
+        status = "ok"
+        try:
+            if fetched is _NOT_FETCHED:
+                fetched = self._fetch(item)
+            started = time.perf_counter()
+            result = self.job.extract(item, fetched)
+            self.metrics.add("extracted", seconds=time.perf_counter() - started)
+        except CircuitOpenError as e:
+            self.metrics.add("parked")
+            return "parked", (fetched, e)
+        except Exception as e:
+            # The failure that tripped a breaker is part of the same outage
+            tripped = [breaker for breaker in self.job.breakers() if breaker.state != "closed"]
+            if tripped:
+                self.metrics.add("parked")
+                return "parked", (fetched, CircuitOpenError(tripped[0]))
+            self.metrics.add("failed")
+            result = self.job.on_error(item, e)
+            status = "failed"
+        if result is None:
+            return status, []
+        return status, (result if isinstance(result, list) else [result])
+
+    def _emit(self, results):
+        for result in results:
+            for sink in self.sinks:
+                sink.write(result)
+        self.metrics.add("results", len(results))
+
+    def run(self):
+        """Processes every item and closes the sinks. Returns the Metrics."""
+        checkpoint = Checkpoint(self.checkpoint_path) if self.checkpoint_path else None
+        pending = collections.deque()
+        started = False
+        # Keep a few items per worker in flight; results are emitted in source order.
+        window = self.concurrency * 4
+        try:
+            with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix=self.job.name) as pool:
+                for item in self.job.items():
+                    key = self.job.key(item)
+                    if checkpoint is not None and key in checkpoint.done:
+                        pending.append((key, None, checkpoint.done[key]))
+                        self.metrics.add("from checkpoint")
+                    else:
+                        if not started:
+                            self.job.start()
+                            started = True
+                        logger.info(f"{self.job.name}: processing {key}")
+                        pending.append((key, pool.submit(self._process, item), item))
+                    while pending and (len(pending) > window or pending[0][1] is None or pending[0][1].done()):
+                        self._drain_one(pending, checkpoint)
+                while pending:
+                    self._drain_one(pending, checkpoint)
+                if self.parked:
+                    self._run_parked(pool, checkpoint)
+        finally:
+            for sink in self.sinks:
+                sink.close()
+            if checkpoint is not None:
+                checkpoint.close()
+            self.job.close()
+        summary = self.metrics.summary()
+        breakers = "; ".join(breaker.summary() for breaker in self.job.breakers())
+        logger.info(f"{self.job.name} finished: {summary}" + (f"; {breakers}" if breakers else ""))
+        return self.metrics
+
+    def _drain_one(self, pending, checkpoint):
+        # Checkpointed entries carry their results; submitted ones carry the item
+        key, future, value = pending.popleft()
+        if future is None:
+            self._emit(value)
+            return
+        status, results = future.result()
+        if status == "parked":
+            fetched, error = results
+            self.parked.append((key, value, fetched, error))
+            return
+        if checkpoint is not None and status == "ok":
+            checkpoint.record(key, results)
+        self._emit(results)
+
+    def _run_parked(self, pool, checkpoint):
+        """Re-runs parked items whenever their breakers let calls through, until park_timeout."""
+        deadline = time.monotonic() + self.park_timeout
+        while self.parked:
+            wake = min(error.breaker.retry_at() for _, _, _, error in self.parked)
+            if wake > deadline:
+                break
+            logger.info(f"{self.job.name}: {len(self.parked)} items parked on open circuits; "
+                        f"retrying in {max(0.0, wake - time.monotonic()):.1f}s")
+            time.sleep(max(0.0, wake - time.monotonic()))
+            batch, self.parked = self.parked, []
+            pending = collections.deque((key, pool.submit(self._process, item, fetched), item)
+                                        for key, item, fetched, _ in batch)
+            while pending:
+                self._drain_one(pending, checkpoint)
+        if self.parked:
+            logger.error(f"{self.job.name}: giving up on {len(self.parked)} items still parked "
+                         f"after {self.park_timeout}s")
+        for key, item, _, error in self.parked:
+            self.metrics.add("failed")
+            results = self.job.on_error(item, error)
+            if results is not None:
+                self._emit(results if isinstance(results, list) else [results])
+        self.parked = []
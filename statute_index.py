@@ -0,0 +1,207 @@
+"""
+Full-text index over scraped statute sections, backed by SQLite FTS5.
+
+The statute scraper calls index_section() as each section is scraped, so the
+index stays current without a separate build step. Analysts query it with:
+
+    python statute_index.py search compensable injury
+    python statute_index.py search --phrase "arising out of and in the course of"
+    python statute_index.py section 44-501
+    python statute_index.py rebuild kansas_ch44.json
+"""
+import argparse
+import json
+import re
+import sqlite3
+from datetime import datetime, timezone
+
+# Default location of the index database.
+DEFAULT_DB = "kansas_statutes.db"
+
+# Matches Kansas section numbers such as "44-501", "44-501a" or "44-5,101".
+SECTION_NUMBER_RE = re.compile(r"\b(\d+[a-z]?-\d+[a-z]?(?:,\d+[a-z]?)?)\b")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sections (
+    url            TEXT PRIMARY KEY,
+    section_number TEXT,
+    chapter        TEXT,
+    title          TEXT,
+    text           TEXT,
+    updated_at     TEXT
+);
+CREATE INDEX IF NOT EXISTS sections_number ON sections(section_number);
+
+-- External-content FTS table: the text lives once, in `sections`.
+CREATE VIRTUAL TABLE IF NOT EXISTS sections_fts USING fts5(
+    title, text,
+    content='sections', content_rowid='rowid',
+    tokenize='porter unicode61'
+);
+
+CREATE TRIGGER IF NOT EXISTS sections_ai AFTER INSERT ON sections BEGIN
+    INSERT INTO sections_fts(rowid, title, text) VALUES (new.rowid, new.title, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS sections_ad AFTER DELETE ON sections BEGIN
+    INSERT INTO sections_fts(sections_fts, rowid, title, text)
+    VALUES ('delete', old.rowid, old.title, old.text);
+END;
+CREATE TRIGGER IF NOT EXISTS sections_au AFTER UPDATE ON sections BEGIN
+    INSERT INTO sections_fts(sections_fts, rowid, title, text)
+    VALUES ('delete', old.rowid, old.title, old.text);
+    INSERT INTO sections_fts(rowid, title, text) VALUES (new.rowid, new.title, new.text);
+END;
+"""
+
+
+def open_index(path=DEFAULT_DB):
+    """Opens (and creates if needed) the index database at `path`."""
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def parse_section_number(title, url=""):
+    """Pulls the section number (e.g. "44-501") out of a section title or URL."""
+    for source in (title, url):
+        match = SECTION_NUMBER_RE.search(source or "")
+        if match:
+            return match.group(1)
+    return None
+
+
+def index_section(conn, title, url, text, commit=True):
+    """
+    Adds or updates a single section in the index.
+
+    Sections are keyed by URL; re-indexing an unchanged section is a no-op so
+    repeated scrapes only touch the rows whose text actually changed.
+    """
+    row = conn.execute("SELECT title, text FROM sections WHERE url = ?", (url,)).fetchone()
+    if row is not None and row["title"] == title and row["text"] == text:
+        return False
+
+    number = parse_section_number(title, url)
+    chapter = number.split("-")[0] if number else None
+    now = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    conn.execute(
+        """
+        INSERT INTO sections (url, section_number, chapter, title, text, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT(url) DO UPDATE SET
+            section_number = excluded.section_number,
+            chapter        = excluded.chapter,
+            title          = excluded.title,
+            text           = excluded.text,
+            updated_at     = excluded.updated_at
+        """,
+        (url, number, chapter, title, text, now),
+    )
+    if commit:
+        conn.commit()
+    return True
+
+
+def build_match_query(query, phrase=False):
+    """
+    Turns user input into an FTS5 MATCH expression.
+
+    Every term is quoted so punctuation in statute text ("44-501", "K.S.A.")
+    can't be mistaken for FTS5 query syntax. With phrase=True the whole input
+    must appear as a contiguous phrase; otherwise all terms must appear.
+    """
+    terms = re.findall(r"\w+", query)
+    if not terms:
+        raise ValueError("Search query contains no searchable terms.")
+    if phrase:
+        return '"' + " ".join(terms) + '"'
+    return " AND ".join(f'"{term}"' for term in terms)
+
+
+def search(conn, query, phrase=False, limit=20):
+    """Ranked full-text search. Returns a list of dicts, best match first."""
+    rows = conn.execute(
+        """
+        SELECT s.section_number, s.title, s.url,
+               snippet(sections_fts, 1, '[', ']', ' ... ', 16) AS snippet
+        FROM sections_fts
+        JOIN sections s ON s.rowid = sections_fts.rowid
+        WHERE sections_fts MATCH ?
+        ORDER BY bm25(sections_fts, 5.0, 1.0)
+        LIMIT ?
+        """,
+        (build_match_query(query, phrase), limit),
+    ).fetchall()
+    return [dict(row) for row in rows]
+
+
+def find_section(conn, number):
+    """
+    Looks up sections by number. A trailing prefix such as "44-5" lists every
+    section whose number starts with it.
+    """
+    rows = conn.execute(
+        """
+        SELECT section_number, title, url, text FROM sections
+        WHERE section_number = ? OR section_number LIKE ? || '%'
+        ORDER BY section_number = ? DESC, section_number
+        """,
+        (number, number, number),
+    ).fetchall()
+    return [dict(row) for row in rows]
+
+
+def rebuild_from_json(conn, json_paths):
+    """Indexes the Section/URL/Text records from one or more scraper JSON outputs."""
+    count = 0
+    for path in json_paths:
+        with open(path, "r", encoding="utf-8") as json_file:
+            for entry in json.load(json_file):
+                if index_section(conn, entry["Section"], entry["URL"], entry["Text"], commit=False):
+                    count += 1
+    conn.commit()
+    return count
+
+
+# --- Command line interface ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query the statute full-text index.")
+    parser.add_argument("--db", default=DEFAULT_DB, help="Index database (default: %(default)s)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    search_cmd = commands.add_parser("search", help="Full-text search over section text")
+    search_cmd.add_argument("query", nargs="+")
+    search_cmd.add_argument("--phrase", action="store_true", help="Match the words as an exact phrase")
+    search_cmd.add_argument("--limit", type=int, default=20)
+
+    section_cmd = commands.add_parser("section", help="Look up a section by number, e.g. 44-501")
+    section_cmd.add_argument("number")
+    section_cmd.add_argument("--full", action="store_true", help="Print the full section text")
+
+    rebuild_cmd = commands.add_parser("rebuild", help="Index existing scraper JSON output")
+    rebuild_cmd.add_argument("json_files", nargs="+")
+
+    args = parser.parse_args(argv)
+    conn = open_index(args.db)
+
+    if args.command == "search":
+        for hit in search(conn, " ".join(args.query), phrase=args.phrase, limit=args.limit):
+            print(f"{hit['section_number'] or '?'}  {hit['title']}")
+            print(f"    {hit['url']}")
+            print(f"    {hit['snippet']}\n")
+    elif args.command == "section":
+        for hit in find_section(conn, args.number):
+            print(f"{hit['section_number']}  {hit['title']}")
+            print(f"    {hit['url']}")
+            if args.full:
+                print(f"\n{hit['text']}\n")
+    elif args.command == "rebuild":
+        count = rebuild_from_json(conn, args.json_files)
+        print(f"Indexed {count} new or changed sections into {args.db}")
+
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
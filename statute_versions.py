@@ -0,0 +1,297 @@
+"""
+Version history and change detection for scraped statute sections.
+
+Every scrape is recorded as a run. Sections are keyed by URL and stored with
+a SHA-256 content hash and their latest text; older versions are kept as
+compressed reverse deltas against the next newer version, so an unchanged
+section costs nothing and a small amendment costs a few hundred bytes.
+
+    python statute_versions.py report              # changes in the latest run
+    python statute_versions.py report --run 3 --json
+    python statute_versions.py history 44-501
+    python statute_versions.py record kansas_ch44.json
+"""
+import argparse
+import difflib
+import hashlib
+import json
+import re
+import sqlite3
+import zlib
+from datetime import datetime, timezone
+
+# Default location of the version store.
+DEFAULT_DB = "kansas_statute_versions.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    scraped_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sections (
+    url          TEXT PRIMARY KEY,
+    section      TEXT,
+    hash         TEXT NOT NULL,
+    text         BLOB NOT NULL,      -- zlib-compressed latest text
+    first_run    INTEGER NOT NULL,
+    last_run     INTEGER NOT NULL,   -- last run the section was seen in
+    removed_run  INTEGER             -- set while the section is missing
+);
+CREATE TABLE IF NOT EXISTS versions (
+    url      TEXT NOT NULL,
+    run_id   INTEGER NOT NULL,       -- run that first saw this version
+    hash     TEXT NOT NULL,
+    delta    BLOB NOT NULL,          -- turns the next newer text into this one
+    PRIMARY KEY (url, run_id)
+);
+CREATE TABLE IF NOT EXISTS changes (
+    run_id   INTEGER NOT NULL,
+    url      TEXT NOT NULL,
+    section  TEXT,
+    kind     TEXT NOT NULL,          -- added | removed | modified
+    old_hash TEXT,
+    new_hash TEXT,
+    PRIMARY KEY (run_id, url)
+);
+"""
+
+# Words plus their trailing whitespace, so joining tokens restores the text exactly.
+TOKEN_RE = re.compile(r"\S+\s*|\s+")
+
+
+def open_store(path=DEFAULT_DB):
+    """Opens (and creates if needed) the version store at `path`."""
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def content_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _pack(text):
+    return zlib.compress(text.encode("utf-8"), 9)
+
+
+def _unpack(blob):
+    return zlib.decompress(blob).decode("utf-8")
+
+
+# --- Word-level deltas ---
+def make_delta(base, target):
+    """
+    Encodes `target` as edits against `base`: ["=", n] copies the next n
+    words of base, ["-", n] skips n words of base, and ["+", text] inserts text.
+    """
+    base_tokens = TOKEN_RE.findall(base)
+    target_tokens = TOKEN_RE.findall(target)
+    matcher = difflib.SequenceMatcher(None, base_tokens, target_tokens, autojunk=False)
+    ops = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append(["=", i2 - i1])
+            continue
+        if i2 > i1:
+            ops.append(["-", i2 - i1])
+        if j2 > j1:
+            ops.append(["+", "".join(target_tokens[j1:j2])])
+    return zlib.compress(json.dumps(ops, separators=(",", ":")).encode("utf-8"), 9)
+
+
+def apply_delta(base, delta):
+    """Rebuilds the text encoded by make_delta() from `base`."""
+    base_tokens = TOKEN_RE.findall(base)
+    position = 0
+    parts = []
+    for op, value in json.loads(zlib.decompress(delta)):
+        if op == "=":
+            parts.extend(base_tokens[position:position + value])
+            position += value
+        elif op == "-":
+            position += value
+        else:
+            parts.append(value)
+    return "".join(parts)
+
+
+# --- Recording scrapes ---
+def record_scrape(conn, data):
+    """
+    Records one scrape of Section/URL/Text entries as a new run.
+
+    Returns (run_id, changes) where changes is a list of dicts with url,
+    section and kind ("added", "removed" or "modified").
+    """
+    now = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    run_id = conn.execute("INSERT INTO runs (scraped_at) VALUES (?)", (now,)).lastrowid
+    changes = []
+
+    def note(url, section, kind, old_hash, new_hash):
+        conn.execute(
+            "INSERT INTO changes (run_id, url, section, kind, old_hash, new_hash) VALUES (?, ?, ?, ?, ?, ?)",
+            (run_id, url, section, kind, old_hash, new_hash),
+        )
+        changes.append({"url": url, "section": section, "kind": kind})
+
+    seen = set()
+    for entry in data:
+        url, section, text = entry["URL"], entry["Section"], entry["Text"]
+        if url in seen:
+            continue
+        seen.add(url)
+        new_hash = content_hash(text)
+        row = conn.execute("SELECT * FROM sections WHERE url = ?", (url,)).fetchone()
+
+        if row is None:
+            conn.execute(
+                "INSERT INTO sections (url, section, hash, text, first_run, last_run) VALUES (?, ?, ?, ?, ?, ?)",
+                (url, section, new_hash, _pack(text), run_id, run_id),
+            )
+            note(url, section, "added", None, new_hash)
+            continue
+
+        if row["hash"] == new_hash:
+            conn.execute("UPDATE sections SET section = ?, last_run = ?, removed_run = NULL WHERE url = ?",
+                         (section, run_id, url))
+            if row["removed_run"] is not None:
+                note(url, section, "added", None, new_hash)
+            continue
+
+        # Keep the outgoing text as a reverse delta against the new text.
+        old_text = _unpack(row["text"])
+        old_version_run = conn.execute(
+            "SELECT COALESCE(MAX(run_id), ?) FROM changes WHERE url = ? AND kind != 'removed'",
+            (row["first_run"], url),
+        ).fetchone()[0]
+        conn.execute(
+            "INSERT OR REPLACE INTO versions (url, run_id, hash, delta) VALUES (?, ?, ?, ?)",
+            (url, old_version_run, row["hash"], make_delta(text, old_text)),
+        )
+        conn.execute(
+            "UPDATE sections SET section = ?, hash = ?, text = ?, last_run = ?, removed_run = NULL WHERE url = ?",
+            (section, new_hash, _pack(text), run_id, url),
+        )
+        note(url, section, "modified", row["hash"], new_hash)
+
+    for row in conn.execute("SELECT url, section, hash FROM sections WHERE removed_run IS NULL").fetchall():
+        if row["url"] not in seen:
+            conn.execute("UPDATE sections SET removed_run = ? WHERE url = ?", (run_id, row["url"]))
+            note(row["url"], row["section"], "removed", row["hash"], None)
+
+    conn.commit()
+    return run_id, changes
+
+
+# --- Reading history ---
+def latest_run(conn):
+    return conn.execute("SELECT MAX(id) FROM runs").fetchone()[0]
+
+
+def section_history(conn, url):
+    """Returns [(run_id, hash, text), ...] for a section, newest first."""
+    row = conn.execute("SELECT hash, text, last_run FROM sections WHERE url = ?", (url,)).fetchone()
+    if row is None:
+        return []
+    current_run = conn.execute(
+        "SELECT COALESCE(MAX(run_id), (SELECT first_run FROM sections WHERE url = ?)) "
+        "FROM changes WHERE url = ? AND kind != 'removed'",
+        (url, url),
+    ).fetchone()[0]
+    text = _unpack(row["text"])
+    history = [(current_run, row["hash"], text)]
+    for version in conn.execute(
+            "SELECT run_id, hash, delta FROM versions WHERE url = ? ORDER BY run_id DESC", (url,)):
+        text = apply_delta(text, version["delta"])
+        history.append((version["run_id"], version["hash"], text))
+    return history
+
+
+def text_at_hash(conn, url, wanted_hash):
+    for _, version_hash, text in section_history(conn, url):
+        if version_hash == wanted_hash:
+            return text
+    return None
+
+
+def _sentences(text):
+    # Statute text is one long paragraph; diff it a sentence per line.
+    return [sentence + "\n" for sentence in re.split(r"(?<=[.;:])\s+", text) if sentence]
+
+
+def section_diff(conn, url, old_hash, new_hash):
+    """Unified diff between two stored versions of a section."""
+    old_text = text_at_hash(conn, url, old_hash) or ""
+    new_text = text_at_hash(conn, url, new_hash) or ""
+    return "".join(difflib.unified_diff(
+        _sentences(old_text), _sentences(new_text),
+        fromfile=f"{url} ({old_hash[:10]})", tofile=f"{url} ({new_hash[:10]})",
+    ))
+
+
+def change_report(conn, run_id=None):
+    """Returns the changes recorded for `run_id` (default: the latest run)."""
+    run_id = run_id or latest_run(conn)
+    rows = conn.execute(
+        "SELECT url, section, kind, old_hash, new_hash FROM changes WHERE run_id = ? ORDER BY kind, section",
+        (run_id,),
+    ).fetchall()
+    return run_id, [dict(row) for row in rows]
+
+
+def find_urls(conn, section_or_url):
+    """Resolves a section number/title prefix or URL to section URLs."""
+    rows = conn.execute(
+        "SELECT url FROM sections WHERE url = ? OR section LIKE ? || '%' ORDER BY section",
+        (section_or_url, section_or_url),
+    ).fetchall()
+    return [row["url"] for row in rows]
+
+
+# --- Command line interface ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Statute section version history and change reports.")
+    parser.add_argument("--db", default=DEFAULT_DB, help="Version store (default: %(default)s)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    report_cmd = commands.add_parser("report", help="List added, removed and modified sections")
+    report_cmd.add_argument("--run", type=int, help="Run id (default: latest)")
+    report_cmd.add_argument("--no-diff", action="store_true", help="Omit diffs of modified sections")
+    report_cmd.add_argument("--json", action="store_true", help="Machine-readable list of changed sections")
+
+    history_cmd = commands.add_parser("history", help="Show every stored version of a section")
+    history_cmd.add_argument("section", help="Section number/title prefix or URL")
+
+    record_cmd = commands.add_parser("record", help="Record a scraper JSON output as a new run")
+    record_cmd.add_argument("json_file")
+
+    args = parser.parse_args(argv)
+    conn = open_store(args.db)
+
+    if args.command == "report":
+        run_id, changes = change_report(conn, args.run)
+        if args.json:
+            print(json.dumps({"run": run_id, "changes": changes}, indent=2))
+            return
+        counts = {kind: sum(1 for c in changes if c["kind"] == kind) for kind in ("added", "removed", "modified")}
+        print(f"Run {run_id}: {counts['added']} added, {counts['removed']} removed, {counts['modified']} modified")
+        for change in changes:
+            print(f"  {change['kind'].upper():9} {change['section']}  {change['url']}")
+            if change["kind"] == "modified" and not args.no_diff:
+                print(section_diff(conn, change["url"], change["old_hash"], change["new_hash"]))
+    elif args.command == "history":
+        for url in find_urls(conn, args.section):
+            print(url)
+            for run_id, version_hash, text in section_history(conn, url):
+                print(f"  run {run_id}  {version_hash[:12]}  {len(text)} chars")
+    elif args.command == "record":
+        with open(args.json_file, "r", encoding="utf-8") as json_file:
+            run_id, changes = record_scrape(conn, json.load(json_file))
+        print(f"Recorded run {run_id} with {len(changes)} changes")
+
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
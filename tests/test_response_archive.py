@@ -0,0 +1,37 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+import response_archive  # noqa: E402
+
+
+def write_archive(path, count):
+    with response_archive.ResponseArchive(str(path)) as archive:
+        for n in range(count):
+            archive.write_record(f"https://example.com/{n}", f"<html>page {n}</html>", meta={"page": n})
+
+
+def test_reads_every_record(tmp_path):
+    path = tmp_path / "pages.warc.gz"
+    write_archive(path, 2)
+    records = list(response_archive.iter_records(str(path)))
+    assert [record.url for record in records] == ["https://example.com/0", "https://example.com/1"]
+    assert records[1].text == "<html>page 1</html>"
+    assert records[1].meta == {"page": 1}
+
+
+@pytest.mark.parametrize("cut", [40, 120])
+def test_truncated_tail_stops_at_last_complete_record(tmp_path, caplog, cut):
+    path = tmp_path / "pages.warc.gz"
+    write_archive(path, 2)
+    data = path.read_bytes()
+    path.write_bytes(data[:-cut])
+
+    records = list(response_archive.iter_records(str(path)))
+
+    assert [record.url for record in records] == ["https://example.com/0"]
+    assert "truncated" in caplog.text
+    assert list(response_archive.latest_by_url(str(path))) == ["https://example.com/0"]
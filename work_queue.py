@@ -0,0 +1,534 @@
+"""
+Durable work queue shared by scraper workers on several machines.
+
+A queue holds the work items of one job (company names, statute URLs, ...)
+keyed by the job's item key. Workers claim items under a time-limited lease
+and renew it with heartbeats while they work; an item whose worker dies is
+claimed again once its lease runs out. Results land in the queue's common
+result store, so every worker's output can be exported as one table.
+
+Two backends share the same interface:
+
+    sqlite:///Z:/scraping/companies.db     a SQLite file on a shared network drive
+    redis://localhost:6379/0               a Redis-compatible server
+
+SQLite is used with its default rollback journal (WAL needs shared memory,
+which network drives don't provide). Leases use wall-clock time, so the
+workers' clocks should roughly agree.
+
+Any scraper.Job can drain a queue by wrapping it in QueuedJob:
+
+    queue = work_queue.open_queue("sqlite:///shared/queue.db", job.name)
+    queued = work_queue.QueuedJob(job, queue)
+    queued.enqueue()                       # idempotent; every worker may call it
+    scraper.Scheduler(queued, sinks, concurrency=4).run()
+
+    python work_queue.py status --queue sqlite:///shared/queue.db company-search
+    python work_queue.py export --queue sqlite:///shared/queue.db company-search -o all.csv
+    python work_queue.py requeue --queue sqlite:///shared/queue.db company-search
+"""
+import argparse
+import collections
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+import scraper
+
+logger = logging.getLogger("work_queue")
+
+# Seconds a claimed item stays reserved without a heartbeat.
+DEFAULT_LEASE_SECONDS = 300
+# Claims of one item (failures and expired leases) before it is marked failed.
+DEFAULT_MAX_ATTEMPTS = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    queue         TEXT NOT NULL,
+    key           TEXT NOT NULL,
+    seq           INTEGER NOT NULL,   -- enqueue order
+    payload       TEXT NOT NULL,      -- JSON work item
+    state         TEXT NOT NULL,      -- pending | leased | done | failed
+    worker        TEXT,
+    lease_expires REAL,
+    attempts      INTEGER NOT NULL DEFAULT 0,
+    error         TEXT,
+    PRIMARY KEY (queue, key)
+);
+CREATE INDEX IF NOT EXISTS items_by_state ON items (queue, state, seq);
+CREATE TABLE IF NOT EXISTS results (
+    queue       TEXT NOT NULL,
+    key         TEXT NOT NULL,
+    worker      TEXT NOT NULL,
+    finished_at REAL NOT NULL,
+    results     TEXT NOT NULL,        -- JSON list of result dicts
+    PRIMARY KEY (queue, key)
+);
+"""
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+# --- SQLite backend ---
+class SqliteQueue:
+    def __init__(self, path, name, max_attempts=DEFAULT_MAX_ATTEMPTS):
+        self.name = name
+        self.max_attempts = max_attempts
+        # One connection shared by the worker threads; claims take the write
+        # lock up front (BEGIN IMMEDIATE) so two nodes can't claim the same item.
+        self.conn = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        self.conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def _write(self, fn):
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                value = fn(self.conn)
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+            return value
+
+    def put(self, entries):
+        """Adds (key, payload) pairs not already in the queue. Returns how many were new."""
+        entries = list(entries)  # built outside the write lock
+
+        def add(conn):
+            seq = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM items WHERE queue = ?", (self.name,)).fetchone()[0]
+            added = 0
+            for key, payload in entries:
+                seq += 1
+                added += conn.execute(
+                    "INSERT OR IGNORE INTO items (queue, key, seq, payload, state) VALUES (?, ?, ?, ?, 'pending')",
+                    (self.name, key, seq, json.dumps(payload, ensure_ascii=False))).rowcount
+            return added
+        return self._write(add)
+
+    def claim(self, worker, lease_seconds=DEFAULT_LEASE_SECONDS):
+        """Leases the next pending (or abandoned) item: (key, payload), or None."""
+        def take(conn):
+            now = time.time()
+            conn.execute("UPDATE items SET state = 'failed', error = 'lease expired' "
+                         "WHERE queue = ? AND state = 'leased' AND lease_expires < ? AND attempts >= ?",
+                         (self.name, now, self.max_attempts))
+            row = conn.execute("SELECT key, payload FROM items WHERE queue = ? AND "
+                               "(state = 'pending' OR (state = 'leased' AND lease_expires < ?)) "
+                               "ORDER BY seq LIMIT 1", (self.name, now)).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE items SET state = 'leased', worker = ?, lease_expires = ?, "
+                         "attempts = attempts + 1 WHERE queue = ? AND key = ?",
+                         (worker, now + lease_seconds, self.name, row[0]))
+            return row[0], json.loads(row[1])
+        return self._write(take)
+
+    def heartbeat(self, keys, worker, lease_seconds=DEFAULT_LEASE_SECONDS):
+        """Extends the leases `worker` still holds on `keys`. Returns how many were extended."""
+        def renew(conn):
+            expires = time.time() + lease_seconds
+            return sum(conn.execute("UPDATE items SET lease_expires = ? WHERE queue = ? AND key = ? "
+                                    "AND worker = ? AND state = 'leased'",
+                                    (expires, self.name, key, worker)).rowcount for key in keys)
+        return self._write(renew) if keys else 0
+
+    def complete(self, key, worker, results):
+        """Stores the results of a leased item. False if the lease was lost to another worker."""
+        def finish(conn):
+            if not conn.execute("UPDATE items SET state = 'done', error = NULL WHERE queue = ? AND key = ? "
+                                "AND worker = ? AND state = 'leased'", (self.name, key, worker)).rowcount:
+                return False
+            conn.execute("INSERT OR REPLACE INTO results (queue, key, worker, finished_at, results) "
+                         "VALUES (?, ?, ?, ?, ?)",
+                         (self.name, key, worker, time.time(), json.dumps(results, ensure_ascii=False, default=str)))
+            return True
+        return self._write(finish)
+
+    def fail(self, key, worker, error):
+        """Releases a leased item after an error. Returns its new state: 'pending' or 'failed'."""
+        def release(conn):
+            row = conn.execute("SELECT attempts FROM items WHERE queue = ? AND key = ? AND worker = ? "
+                               "AND state = 'leased'", (self.name, key, worker)).fetchone()
+            if row is None:
+                return None
+            state = "failed" if row[0] >= self.max_attempts else "pending"
+            conn.execute("UPDATE items SET state = ?, error = ? WHERE queue = ? AND key = ?",
+                         (state, str(error), self.name, key))
+            return state
+        return self._write(release)
+
+    def requeue_failed(self):
+        return self._write(lambda conn: conn.execute(
+            "UPDATE items SET state = 'pending', attempts = 0 WHERE queue = ? AND state = 'failed'",
+            (self.name,)).rowcount)
+
+    def counts(self):
+        with self._lock:
+            rows = self.conn.execute("SELECT state, COUNT(*) FROM items WHERE queue = ? GROUP BY state",
+                                     (self.name,)).fetchall()
+        return dict(rows)
+
+    def failures(self):
+        with self._lock:
+            return self.conn.execute("SELECT key, attempts, error FROM items WHERE queue = ? AND state = 'failed' "
+                                     "ORDER BY seq", (self.name,)).fetchall()
+
+    def results(self):
+        """(key, results) for every finished item, in enqueue order."""
+        with self._lock:
+            rows = self.conn.execute("SELECT r.key, r.results FROM results r JOIN items i "
+                                     "ON i.queue = r.queue AND i.key = r.key WHERE r.queue = ? ORDER BY i.seq",
+                                     (self.name,)).fetchall()
+        return [(key, json.loads(results)) for key, results in rows]
+
+    def close(self):
+        self.conn.close()
+
+
+# --- Redis backend ---
+# Each operation is a Lua script so it runs atomically on the server.
+# KEYS: pending list, leases zset, owner hash, attempts hash, state hash,
+# error hash, payload hash, results hash, order list
+_REDIS_KEYS = ("pending", "leases", "owner", "attempts", "state", "error", "payload", "results", "order")
+
+_REDIS_PUT = """
+local added = 0
+for i = 1, #ARGV, 2 do
+    if redis.call('HSETNX', KEYS[5], ARGV[i], 'pending') == 1 then
+        redis.call('HSET', KEYS[7], ARGV[i], ARGV[i + 1])
+        redis.call('RPUSH', KEYS[1], ARGV[i])
+        redis.call('RPUSH', KEYS[9], ARGV[i])
+        added = added + 1
+    end
+end
+return added
+"""
+
+_REDIS_CLAIM = """
+local now, expires, worker, max_attempts = tonumber(ARGV[1]), tonumber(ARGV[2]), ARGV[3], tonumber(ARGV[4])
+for _, key in ipairs(redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', now)) do
+    redis.call('ZREM', KEYS[2], key)
+    if tonumber(redis.call('HGET', KEYS[4], key) or '0') >= max_attempts then
+        redis.call('HSET', KEYS[5], key, 'failed')
+        redis.call('HSET', KEYS[6], key, 'lease expired')
+    else
+        redis.call('HSET', KEYS[5], key, 'pending')
+        redis.call('LPUSH', KEYS[1], key)
+    end
+end
+local key = redis.call('LPOP', KEYS[1])
+if not key then
+    return nil
+end
+redis.call('ZADD', KEYS[2], expires, key)
+redis.call('HSET', KEYS[3], key, worker)
+redis.call('HINCRBY', KEYS[4], key, 1)
+redis.call('HSET', KEYS[5], key, 'leased')
+return {key, redis.call('HGET', KEYS[7], key)}
+"""
+
+_REDIS_HEARTBEAT = """
+local extended = 0
+for i = 3, #ARGV do
+    local key = ARGV[i]
+    if redis.call('HGET', KEYS[3], key) == ARGV[2] and redis.call('HGET', KEYS[5], key) == 'leased' then
+        redis.call('ZADD', KEYS[2], 'XX', ARGV[1], key)
+        extended = extended + 1
+    end
+end
+return extended
+"""
+
+_REDIS_COMPLETE = """
+local key = ARGV[1]
+if redis.call('HGET', KEYS[3], key) ~= ARGV[2] or redis.call('HGET', KEYS[5], key) ~= 'leased' then
+    return 0
+end
+redis.call('ZREM', KEYS[2], key)
+redis.call('HSET', KEYS[5], key, 'done')
+redis.call('HDEL', KEYS[6], key)
+redis.call('HSET', KEYS[8], key, ARGV[3])
+return 1
+"""
+
+_REDIS_FAIL = """
+local key = ARGV[1]
+if redis.call('HGET', KEYS[3], key) ~= ARGV[2] or redis.call('HGET', KEYS[5], key) ~= 'leased' then
+    return nil
+end
+redis.call('ZREM', KEYS[2], key)
+redis.call('HSET', KEYS[6], key, ARGV[3])
+if tonumber(redis.call('HGET', KEYS[4], key) or '0') >= tonumber(ARGV[4]) then
+    redis.call('HSET', KEYS[5], key, 'failed')
+    return 'failed'
+end
+redis.call('HSET', KEYS[5], key, 'pending')
+redis.call('RPUSH', KEYS[1], key)
+return 'pending'
+"""
+
+_REDIS_REQUEUE = """
+local requeued = 0
+local states = redis.call('HGETALL', KEYS[5])
+for i = 1, #states, 2 do
+    if states[i + 1] == 'failed' then
+        redis.call('HSET', KEYS[5], states[i], 'pending')
+        redis.call('HDEL', KEYS[4], states[i])
+        redis.call('RPUSH', KEYS[1], states[i])
+        requeued = requeued + 1
+    end
+end
+return requeued
+"""
+
+
+class RedisQueue:
+    def __init__(self, url, name, max_attempts=DEFAULT_MAX_ATTEMPTS, prefix="work_queue"):
+        import redis  # only needed for this backend
+
+        self.name = name
+        self.max_attempts = max_attempts
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self.keys = [f"{prefix}:{name}:{part}" for part in _REDIS_KEYS]
+        self._put = self.client.register_script(_REDIS_PUT)
+        self._claim = self.client.register_script(_REDIS_CLAIM)
+        self._heartbeat = self.client.register_script(_REDIS_HEARTBEAT)
+        self._complete = self.client.register_script(_REDIS_COMPLETE)
+        self._fail = self.client.register_script(_REDIS_FAIL)
+        self._requeue = self.client.register_script(_REDIS_REQUEUE)
+
+    def put(self, entries, batch_size=500):
+        added = 0
+        batch = []
+        for key, payload in entries:
+            batch += [key, json.dumps(payload, ensure_ascii=False)]
+            if len(batch) >= batch_size * 2:
+                added += self._put(keys=self.keys, args=batch)
+                batch = []
+        if batch:
+            added += self._put(keys=self.keys, args=batch)
+        return added
+
+    def claim(self, worker, lease_seconds=DEFAULT_LEASE_SECONDS):
+        now = time.time()
+        claimed = self._claim(keys=self.keys, args=[now, now + lease_seconds, worker, self.max_attempts])
+        if not claimed:
+            return None
+        return claimed[0], json.loads(claimed[1])
+
+    def heartbeat(self, keys, worker, lease_seconds=DEFAULT_LEASE_SECONDS):
+        if not keys:
+            return 0
+        return self._heartbeat(keys=self.keys, args=[time.time() + lease_seconds, worker, *keys])
+
+    def complete(self, key, worker, results):
+        return bool(self._complete(keys=self.keys, args=[
+            key, worker, json.dumps(results, ensure_ascii=False, default=str)]))
+
+    def fail(self, key, worker, error):
+        return self._fail(keys=self.keys, args=[key, worker, str(error), self.max_attempts])
+
+    def requeue_failed(self):
+        return self._requeue(keys=self.keys)
+
+    def counts(self):
+        return dict(collections.Counter(self.client.hvals(self.keys[4])))
+
+    def failures(self):
+        states = self.client.hgetall(self.keys[4])
+        failed = [key for key in self.client.lrange(self.keys[8], 0, -1) if states.get(key) == "failed"]
+        if not failed:
+            return []
+        attempts = self.client.hmget(self.keys[3], failed)
+        errors = self.client.hmget(self.keys[5], failed)
+        return [(key, int(n or 0), error) for key, n, error in zip(failed, attempts, errors)]
+
+    def results(self, batch_size=1000):
+        found = []
+        total = self.client.llen(self.keys[8])
+        for start in range(0, total, batch_size):
+            keys = self.client.lrange(self.keys[8], start, start + batch_size - 1)
+            for key, results in zip(keys, self.client.hmget(self.keys[7], keys)):
+                if results is not None:
+                    found.append((key, json.loads(results)))
+        return found
+
+    def close(self):
+        self.client.close()
+
+
+def open_queue(url, name, max_attempts=DEFAULT_MAX_ATTEMPTS):
+    """A queue named `name` at `url` (redis://..., sqlite:///path, or a plain file path)."""
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisQueue(url, name, max_attempts)
+    if url.startswith("sqlite:///"):
+        url = url[len("sqlite:///"):]
+    return SqliteQueue(url, name, max_attempts)
+
+
+# --- Scraper integration ---
+Claim = collections.namedtuple("Claim", "key payload")
+
+
+class QueuedJob(scraper.Job):
+    """
+    Runs `job` over the items of a shared queue instead of its own items().
+    Leases are renewed in the background while items are in flight, finished
+    results go to the queue's result store, and an item that errors goes back
+    to the queue (its error row is only emitted once it has failed for good).
+
+    wait: once nothing is pending, keep polling until the other workers'
+    leases are finished, so items left behind by a dead worker get picked up.
+    Items this worker still holds (in flight, or parked on an open circuit
+    breaker) don't count; the scheduler finishes them after items() ends.
+    """
+
+    def __init__(self, job, queue, worker=None, lease_seconds=DEFAULT_LEASE_SECONDS, wait=True, poll_seconds=10):
+        self.job = job
+        self.queue = queue
+        self.worker = worker or default_worker_id()
+        self.lease_seconds = lease_seconds
+        self.wait = wait
+        self.poll_seconds = poll_seconds
+        self.name = job.name
+        self.retry_exceptions = job.retry_exceptions
+        self._held = set()
+        self._held_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._heartbeat_thread = None
+
+    def enqueue(self):
+        """Adds the wrapped job's items to the queue (already queued keys are skipped)."""
+        added = self.queue.put((self.job.key(item), item) for item in self.job.items())
+        logger.info(f"{self.name}: {added} new items queued; queue now {self.queue.counts()}")
+        return added
+
+    def _renew_leases(self):
+        while not self._stop.wait(self.lease_seconds / 3):
+            with self._held_lock:
+                keys = list(self._held)
+            try:
+                self.queue.heartbeat(keys, self.worker, self.lease_seconds)
+            except Exception as e:
+                logger.warning(f"{self.name}: heartbeat failed: {e}")
+
+    def _release(self, key):
+        with self._held_lock:
+            self._held.discard(key)
+
+    def _leased_elsewhere(self):
+        """How many leased items other workers hold."""
+        # This worker's own in-flight and parked items are finished by the
+        # scheduler after items() returns; waiting on them would never end.
+        leased = self.queue.counts().get("leased", 0)
+        with self._held_lock:
+            return leased - len(self._held)
+
+    def items(self):
+        if self._heartbeat_thread is None:
+            self._heartbeat_thread = threading.Thread(target=self._renew_leases, daemon=True,
+                                                      name=f"{self.name}-heartbeat")
+            self._heartbeat_thread.start()
+        while True:
+            claimed = self.queue.claim(self.worker, self.lease_seconds)
+            if claimed is None:
+                if not self.wait or not self._leased_elsewhere():
+                    return
+                time.sleep(self.poll_seconds)
+                continue
+            with self._held_lock:
+                self._held.add(claimed[0])
+            yield Claim(*claimed)
+
+    def start(self):
+        self.job.start()
+
+    def breakers(self):
+        return self.job.breakers()
+
+    def key(self, claim):
+        return claim.key
+
+    def fetch(self, claim):
+        return self.job.fetch(claim.payload)
+
+    def extract(self, claim, fetched):
+        result = self.job.extract(claim.payload, fetched)
+        results = [] if result is None else result if isinstance(result, list) else [result]
+        stored = self.queue.complete(claim.key, self.worker, results)
+        self._release(claim.key)
+        if not stored:
+            logger.warning(f"{self.name}: lease on {claim.key} was lost; leaving it to the new holder")
+            return None
+        return result
+
+    def on_error(self, claim, error):
+        state = self.queue.fail(claim.key, self.worker, error)
+        self._release(claim.key)
+        if state == "failed":
+            return self.job.on_error(claim.payload, error)
+        logger.warning(f"{self.name}: {claim.key} returned to the queue after error: {error}")
+        return None
+
+    def close(self):
+        self._stop.set()
+        self.job.close()
+
+
+def export_results(queue, path, fieldnames=None, sink=None):
+    """
+    Writes every result in the common store to one .csv, .xlsx or .jsonl file
+    (or to `sink`, which then owns the path), in enqueue order. Returns the
+    row count.
+    """
+    sink = sink or scraper.ExportSink(path, fieldnames)
+    rows = 0
+    for _, results in queue.results():
+        for result in results:
+            sink.write(result)
+            rows += 1
+    sink.close()
+    return rows
+
+
+# --- Command line interface ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect and manage a shared scraper work queue.")
+    parser.add_argument("--queue", required=True, help="redis://host:port/db, sqlite:///path, or a SQLite file path")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    status_cmd = commands.add_parser("status", help="Item counts by state, and failures")
+    status_cmd.add_argument("name", help="Queue name (the job name, e.g. company-search)")
+
+    export_cmd = commands.add_parser("export", help="Write the common result store to .csv, .xlsx or .jsonl")
+    export_cmd.add_argument("name")
+    export_cmd.add_argument("-o", "--output", required=True)
+
+    requeue_cmd = commands.add_parser("requeue", help="Return failed items to the queue")
+    requeue_cmd.add_argument("name")
+    args = parser.parse_args(argv)
+
+    queue = open_queue(args.queue, args.name)
+    try:
+        if args.command == "status":
+            counts = queue.counts()
+            print(", ".join(f"{state}: {counts.get(state, 0)}" for state in ("pending", "leased", "done", "failed")))
+            for key, attempts, error in queue.failures():
+                print(f"  failed after {attempts} attempts: {key}: {error}")
+        elif args.command == "export":
+            print(f"Wrote {export_results(queue, args.output)} rows to {args.output}")
+        else:
+            print(f"Requeued {queue.requeue_failed()} failed items")
+    finally:
+        queue.close()
+
+
+if __name__ == "__main__":
+    main()